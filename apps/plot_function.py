@@ -6,6 +6,7 @@ project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
 os.environ["PYTHONPATH"] = project_root
 sys.path.append(project_root)
 
+from PyQt5.QtCore import pyqtSignal
 from PyQt5.QtWidgets import (
     QApplication,
     QHBoxLayout,
@@ -27,15 +28,24 @@ from src.core.constants import (
     DEFAULT_COLOR_END,
     DEFAULT_LINE_COLOR,
     DEFAULT_SLIDER_BOUNDS,
+    TRIANGLE_BUDGET,
+    TRIANGLE_BUDGET_BOUNDS,
+    SINGLE_PRECISION,
 )
 from src.utils.line_utils import create_axes
 from qt.widgets import VTKWidget, ControlWidget
 from src.math.implicit_functions import FUNCS
 from src.math.func_utils import Func
+from src.math.level_utils import parse_levels, format_levels
 from src.utils.cube_axes import create_cube_axes_actor
+from src.core.geometry_worker import GeometryWorker
+from qt.render_scheduler import RenderScheduler
 
 
 class PlotFunc(QWidget):
+    # Emitted from worker threads when built geometry is ready to be swapped in
+    geometry_ready = pyqtSignal()
+
     def __init__(self, parent=None):
         super().__init__(parent)
         self.vtk_widget = VTKWidget(self)
@@ -54,12 +64,25 @@ class PlotFunc(QWidget):
         self.vtk_widget.get_render_window().SetMultiSamples(0)
         self.vtk_widget.get_render_window().SetAlphaBitPlanes(1)
 
+        # All scene updates render through the scheduler, once per frame
+        self.render_scheduler = RenderScheduler(self.vtk_widget.get_render_window())
+
         self.functions = []
         self.func_names = []
         self.coeffs = dict()
         self.coeffs_bounds = dict()
         self.active_func = None
 
+        # Geometry is built in the background and delivered on the UI thread
+        self.geometry_worker = GeometryWorker(self.geometry_ready.emit)
+        self.geometry_ready.connect(self.deliver_geometry)
+
+        # Geometry quality tier, lowered while a slider is being dragged
+        self.quality = "final"
+
+        # Whether fields and vertices are computed in float32 where safe
+        self.single_precision = SINGLE_PRECISION
+
         # Initialize global bounds
         self.global_x_min, self.global_x_max = X_MIN, X_MAX
         self.global_y_min, self.global_y_max = Y_MIN, Y_MAX
@@ -99,6 +122,7 @@ class PlotFunc(QWidget):
             self.update_t_range,
         )
         self.t_range_slider.setVisible(False)
+        self.track_interaction(self.t_range_slider)
 
         self.u_range_slider = self.control_widget.add_range_slider(
             DEFAULT_SLIDER_BOUNDS,
@@ -107,6 +131,7 @@ class PlotFunc(QWidget):
             self.update_u_range,
         )
         self.u_range_slider.setVisible(False)
+        self.track_interaction(self.u_range_slider)
 
         self.v_range_slider = self.control_widget.add_range_slider(
             DEFAULT_SLIDER_BOUNDS,
@@ -115,6 +140,7 @@ class PlotFunc(QWidget):
             self.update_v_range,
         )
         self.v_range_slider.setVisible(False)
+        self.track_interaction(self.v_range_slider)
 
         self.surface_colors = self.control_widget.add_color_picker(
             "Surface colors",
@@ -132,6 +158,7 @@ class PlotFunc(QWidget):
         self.trace_spacing_slider = self.control_widget.add_slider(
             DEFAULT_SLIDER_BOUNDS, 1, "Trace Spacing", self.update_trace_spacing
         )
+        self.track_interaction(self.trace_spacing_slider)
 
         self.line_thickness = self.control_widget.add_slider(
             DEFAULT_SLIDER_BOUNDS,
@@ -153,6 +180,14 @@ class PlotFunc(QWidget):
             "Dash Spacing",
             self.update_dash_spacing,
         )
+        self.track_interaction(self.dash_spacing)
+
+        self.triangle_budget = self.control_widget.add_slider(
+            TRIANGLE_BUDGET_BOUNDS,
+            TRIANGLE_BUDGET,
+            "Triangle Budget (k)",
+            self.update_triangle_budget,
+        )
 
         self.show_surface_checkbox = self.control_widget.add_checkbox(
             "Surface",
@@ -165,7 +200,7 @@ class PlotFunc(QWidget):
             True,
             self.set_show_lines,
         )
-        
+
         self.show_contour_checkbox = self.control_widget.add_checkbox(
             "Contour",
             False,
@@ -173,6 +208,26 @@ class PlotFunc(QWidget):
         )
         self.show_contour_checkbox.setVisible(False)
 
+        self.narrow_band_checkbox = self.control_widget.add_checkbox(
+            "Fine surface",
+            False,
+            self.set_narrow_band,
+        )
+        self.narrow_band_checkbox.setVisible(False)
+
+        self.adaptive_mesh_checkbox = self.control_widget.add_checkbox(
+            "Adaptive mesh",
+            False,
+            self.set_adaptive_mesh,
+        )
+        self.adaptive_mesh_checkbox.setVisible(False)
+
+        self.levels_label, self.levels_text = self.control_widget.add_line_edit(
+            "Levels", "0", self.update_levels
+        )
+        self.levels_label.setVisible(False)
+        self.levels_text.setVisible(False)
+
         self.func_dropdown = self.control_widget.add_dropdown(
             "Active function", self.func_names, self.update_active_func
         )
@@ -222,7 +277,7 @@ class PlotFunc(QWidget):
             True,
             lambda state: (
                 self.math_axes.SetVisibility(state),
-                self.vtk_widget.get_render_window().Render(),
+                self.render_scheduler.request(),
             ),
         )
         self.control_widget.add_checkbox(
@@ -230,31 +285,54 @@ class PlotFunc(QWidget):
             False,
             lambda state: (
                 self.cube_axes.SetVisibility(state),
-                self.vtk_widget.get_render_window().Render(),
+                self.render_scheduler.request(),
             ),
         )
+        self.single_precision_checkbox = self.control_widget.add_checkbox(
+            "Single precision",
+            self.single_precision,
+            self.set_single_precision,
+        )
         self.control_widget.add_color_picker(
             "Background Color",
             DEFAULT_BACKGROUND_COLOR,
             lambda color: (
                 self.renderer.SetBackground(color),
-                self.vtk_widget.get_render_window().Render(),
+                self.render_scheduler.request(),
             ),
         )
 
         # Update the function, initialize the renderer, and render the scene
         self.update_global_bounds()
         set_mathematical_view(self.renderer)
-        self.vtk_widget.get_render_window().Render()
+        self.render_scheduler.request()
         self.vtk_widget.interactor.Initialize()
 
+    def deliver_geometry(self):
+        self.geometry_worker.deliver()
+
+    def track_interaction(self, slider):
+        slider.interactionStarted.connect(lambda: self.set_quality("interactive"))
+        slider.interactionFinished.connect(lambda: self.set_quality("final"))
+
+    def set_quality(self, quality):
+        if quality == self.quality:
+            return
+        self.quality = quality
+        if quality == "final":
+            # Rebuild whatever was built at the interactive tier
+            for func in self.functions:
+                func.update_render(self)
+
     def update_functions(self, coeff):
         for func in self.functions:
             if coeff in func.coeffs:
                 func.update_render(self)
 
     def update_global_bounds(self):
-        self.renderer.RemoveAllViewProps()
+        # Functions rebuild what depends on the bounds through their geometry
+        # states and swap their actors in place; implicit surfaces reuse the
+        # tiles they already cover
         self.renderer.AddActor(self.math_axes)
 
         self.cube_axes.SetBounds(
@@ -270,7 +348,13 @@ class PlotFunc(QWidget):
         for func in self.functions:
             func.update_render(self)
 
-        self.vtk_widget.get_render_window().Render()
+        self.render_scheduler.request()
+
+    def set_single_precision(self, state):
+        self.single_precision = bool(state)
+        for func in self.functions:
+            func.update_render(self)
+        self.render_scheduler.request()
 
     def update_x_range(self, val):
         if self.active_func:
@@ -346,32 +430,46 @@ class PlotFunc(QWidget):
             self.active_func.dash_spacing_bounds = bounds
             self.active_func.update_render(self)
 
-    def set_show_surface(self, state):
+    def update_triangle_budget(self, val, bounds):
         if self.active_func:
-            self.active_func.show_surface = state
+            self.active_func.triangle_budget = val
+            self.active_func.triangle_budget_bounds = bounds
             self.active_func.update_render(self)
-            if self.active_func.surface_actor:
-                self.active_func.surface_actor.SetVisibility(state)
-            self.vtk_widget.get_render_window().Render()
+
+    def set_show_surface(self, state):
+        if self.active_func:
+            self.active_func.set_show("surface", state, self)
 
     def set_show_lines(self, state):
         if self.active_func:
-            self.active_func.show_lines = state
-            self.active_func.update_render(self)
-            if self.active_func.lines_actor:
-                self.active_func.lines_actor.SetVisibility(state)
-            self.vtk_widget.get_render_window().Render()
-            
+            self.active_func.set_show("lines", state, self)
+
     def set_show_contour(self, state):
         if self.active_func:
-            self.active_func.show_contour = state
-            self.active_func.update_render(self)
-            if self.active_func.contour_actor:
-                self.active_func.contour_actor.SetVisibility(state)
-            self.vtk_widget.get_render_window().Render()
+            self.active_func.set_show("contour", state, self)
         else:
             self.show_contour_checkbox.setVisible(False)
 
+    def set_narrow_band(self, state):
+        if self.active_func:
+            self.active_func.narrow_band = bool(state)
+            self.active_func.update_render(self)
+
+    def set_adaptive_mesh(self, state):
+        if self.active_func:
+            self.active_func.adaptive_mesh = bool(state)
+            self.active_func.update_render(self)
+
+    def update_levels(self, text):
+        if self.active_func:
+            try:
+                self.active_func.levels = parse_levels(text)
+            except ValueError as e:
+                print(f"Error: {e}")
+                return
+            self.levels_text.setText(format_levels(self.active_func.levels))
+            self.active_func.update_render(self)
+
     def update_active_func(self, idx):
         if idx != -1 and len(self.functions) > idx:
             self.active_func = self.functions[idx]
@@ -411,9 +509,16 @@ class PlotFunc(QWidget):
             self.dash_spacing.set_value(
                 self.active_func.dash_spacing, self.active_func.dash_spacing_bounds
             )
+            self.triangle_budget.set_value(
+                self.active_func.triangle_budget,
+                self.active_func.triangle_budget_bounds,
+            )
             self.show_surface_checkbox.setChecked(self.active_func.show_surface)
             self.show_lines_checkbox.setChecked(self.active_func.show_lines)
             self.show_contour_checkbox.setChecked(self.active_func.show_contour)
+            self.narrow_band_checkbox.setChecked(self.active_func.narrow_band)
+            self.adaptive_mesh_checkbox.setChecked(self.active_func.adaptive_mesh)
+            self.levels_text.setText(format_levels(self.active_func.levels))
             if self.active_func.type == "implicit" or self.active_func.type == "point":
                 self.x_label.setVisible(True)
                 self.x_min.setVisible(True)
@@ -430,6 +535,13 @@ class PlotFunc(QWidget):
                 self.trace_spacing_slider.setVisible(True)
                 self.dash_spacing.setVisible(False)
                 self.show_contour_checkbox.setVisible(True)
+                self.narrow_band_checkbox.setVisible(
+                    self.active_func.type == "implicit"
+                )
+                self.adaptive_mesh_checkbox.setVisible(False)
+                self.triangle_budget.setVisible(self.active_func.type == "implicit")
+                self.levels_label.setVisible(self.active_func.type == "implicit")
+                self.levels_text.setVisible(self.active_func.type == "implicit")
             elif self.active_func.type == "parametric-1":
                 self.x_label.setVisible(False)
                 self.x_min.setVisible(False)
@@ -446,6 +558,11 @@ class PlotFunc(QWidget):
                 self.trace_spacing_slider.setVisible(False)
                 self.dash_spacing.setVisible(True)
                 self.show_contour_checkbox.setVisible(False)
+                self.narrow_band_checkbox.setVisible(False)
+                self.adaptive_mesh_checkbox.setVisible(False)
+                self.triangle_budget.setVisible(False)
+                self.levels_label.setVisible(False)
+                self.levels_text.setVisible(False)
             elif self.active_func.type == "parametric-2":
                 self.x_label.setVisible(False)
                 self.x_min.setVisible(False)
@@ -462,6 +579,11 @@ class PlotFunc(QWidget):
                 self.trace_spacing_slider.setVisible(True)
                 self.dash_spacing.setVisible(False)
                 self.show_contour_checkbox.setVisible(True)
+                self.narrow_band_checkbox.setVisible(False)
+                self.adaptive_mesh_checkbox.setVisible(True)
+                self.triangle_budget.setVisible(True)
+                self.levels_label.setVisible(False)
+                self.levels_text.setVisible(False)
 
     def update_slider(self, coeff):
         return lambda val, bounds: (
@@ -485,12 +607,13 @@ class PlotFunc(QWidget):
                 self.control_widget.remove_slider_by_label(coeff.name)
         self.coeffs = new_coeff_dict
         for coeff in list(missing_sliders):
-            self.control_widget.add_slider(
+            slider = self.control_widget.add_slider(
                 DEFAULT_SLIDER_BOUNDS,
                 1,
                 coeff.name,
                 self.update_slider(coeff),
             )
+            self.track_interaction(slider)
 
     def handle_function_input(self, text):
         old_func_names = copy.deepcopy(self.func_names)
@@ -515,13 +638,14 @@ class PlotFunc(QWidget):
         # Remove actors for functions that are no longer present
         for func in self.functions:
             if func not in new_functions:
+                self.geometry_worker.cancel(id(func))
                 if func.surface_actor:
                     self.renderer.RemoveActor(func.surface_actor)
                 if func.lines_actor:
                     self.renderer.RemoveActor(func.lines_actor)
                 if func.contour_actor:
                     self.renderer.RemoveActor(func.contour_actor)
-        self.vtk_widget.get_render_window().Render()
+        self.render_scheduler.request()
 
         # Update the functions list and coefficient sliders
         self.functions = new_functions
@@ -538,6 +662,7 @@ class PlotFunc(QWidget):
         return {
             "functions": [func.marshalize() for func in self.functions],
             "background_color": list(self.renderer.GetBackground()),
+            "single_precision": self.single_precision,
             "global_bounds": {
                 "x_min": self.global_x_min,
                 "x_max": self.global_x_max,
@@ -553,12 +678,14 @@ class PlotFunc(QWidget):
             "camera": VTKCameraManager.save_camera_state(self.renderer),
         }
 
-
     def unmarshalize(self, data):
+        self.geometry_worker.cancel()
         self.functions = []
         self.func_names = []
         self.renderer.RemoveAllViewProps()
         self.renderer.SetBackground(data["background_color"])
+        self.single_precision = data.get("single_precision", SINGLE_PRECISION)
+        self.single_precision_checkbox.setChecked(self.single_precision)
         self.global_x_min = data["global_bounds"]["x_min"]
         self.global_x_max = data["global_bounds"]["x_max"]
         self.global_y_min = data["global_bounds"]["y_min"]
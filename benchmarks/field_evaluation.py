@@ -0,0 +1,71 @@
+"""
+Benchmark of serial versus multi-process evaluation of an implicit field.
+
+Run from the repository root:
+
+    python -m benchmarks.field_evaluation --samples 300 --workers 1 2 4 8 16 32
+"""
+
+import argparse, time
+from types import SimpleNamespace
+import numpy as np
+from src.math.func_utils import Func
+from src.utils.field_utils import sample_axes
+from src.utils.parallel_field import evaluate_parallel, get_pool, worker_count
+
+DEFAULT_EXPRESSION = "sin(x*y*z)/(1+x**2+y**2+z**2) + cos(x+y+z)**2 - 0.5"
+
+
+def evaluate_serial(np_func, x, y, z):
+    Z, Y, X = np.meshgrid(z, y, x, indexing="ij", sparse=True)
+    return np.broadcast_to(np_func(X, Y, Z), (len(z), len(y), len(x))).T
+
+
+def best_time(evaluate, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        evaluate()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--expression", default=DEFAULT_EXPRESSION)
+    parser.add_argument("--samples", type=int, default=300, help="samples per axis")
+    parser.add_argument("--workers", type=int, nargs="+", default=[worker_count()])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    func = Func(args.expression)
+    if func.type != "implicit" or func.coeffs:
+        parser.error("the expression must be an implicit function of x, y, z only")
+    np_func = func.create_np_func(SimpleNamespace(coeffs={}))
+    x, y, z = sample_axes((-10, 10, -10, 10, -10, 10), (args.samples,) * 3)
+
+    serial = best_time(lambda: evaluate_serial(np_func, x, y, z), args.repeat)
+    expected = evaluate_serial(np_func, x, y, z)
+    print(f"{args.samples}^3 samples of {args.expression}")
+    print(f"serial      {serial:8.3f} s")
+
+    for workers in args.workers:
+        if workers < 2:
+            continue
+        # Start the processes and compile the kernel before timing
+        get_pool(workers)
+        values = evaluate_parallel(np_func, x, y, z, workers)
+        if values is None or not np.array_equal(values, expected, equal_nan=True):
+            print(f"{workers:3d} workers  failed")
+            continue
+        elapsed = best_time(
+            lambda: evaluate_parallel(np_func, x, y, z, workers), args.repeat
+        )
+        print(
+            f"{workers:3d} workers {elapsed:8.3f} s  "
+            f"speedup {serial / elapsed:5.2f}  efficiency {serial / elapsed / workers:4.0%}"
+        )
+
+
+if __name__ == "__main__":
+    main()
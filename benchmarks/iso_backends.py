@@ -0,0 +1,72 @@
+"""
+Benchmark of the iso-surface extraction backends on the implicit function catalog.
+
+Reports per backend and function the extraction time, the number of triangles
+and the memory of the extracted mesh. Run from the repository root:
+
+    python -m benchmarks.iso_backends --samples 100 200 --coeffs 3 4 5
+"""
+
+import argparse, time
+import numpy as np
+from src.core.constants import X_MIN, X_MAX, Y_MIN, Y_MAX, Z_MIN, Z_MAX
+from src.math.implicit_functions import FUNCS
+from src.utils.array_bridge import create_image_data
+from src.utils.field_utils import sample_axes
+from src.utils.iso_surface import ISO_SURFACE_BACKENDS, default_backend
+
+
+def sample_volume(implicit_function, bounds, samples):
+    x, y, z = sample_axes(bounds, (samples,) * 3)
+    Z, Y, X = np.meshgrid(z, y, x, indexing="ij", sparse=True)
+    with np.errstate(all="ignore"):
+        values = implicit_function(X, Y, Z)
+    values = np.broadcast_to(values, (samples,) * 3).astype(float).T
+    return create_image_data(values, bounds)
+
+
+def best_time(extract, image, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        output = extract(image)
+        times.append(time.perf_counter() - start)
+    return min(times), output
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--samples", type=int, nargs="+", default=[100, 200])
+    parser.add_argument("--coeffs", type=float, nargs=3, default=[3.0, 4.0, 5.0])
+    parser.add_argument("--backends", nargs="+", default=list(ISO_SURFACE_BACKENDS))
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    bounds = (X_MIN, X_MAX, Y_MIN, Y_MAX, Z_MIN, Z_MAX)
+    print(f"default backend: {default_backend()}")
+    for samples in args.samples:
+        totals = dict.fromkeys(args.backends, 0.0)
+        print(f"\n{samples}^3 samples, a, b, c = {tuple(args.coeffs)}")
+        print(
+            f"{'function':26s} {'backend':24s} {'time':>9s} {'triangles':>10s}  memory"
+        )
+        for name, factory in FUNCS.items():
+            image = sample_volume(factory(*args.coeffs), bounds, samples)
+            for backend in args.backends:
+                extract, _ = ISO_SURFACE_BACKENDS[backend]
+                elapsed, output = best_time(
+                    lambda image: extract(image, 0.0), image, args.repeat
+                )
+                totals[backend] += elapsed
+                print(
+                    f"{name:26s} {backend:24s} {elapsed * 1000:7.1f}ms "
+                    f"{output.GetNumberOfCells():10d}  "
+                    f"{output.GetActualMemorySize() / 1024:8.1f} MiB"
+                )
+        print("total:")
+        for backend, elapsed in sorted(totals.items(), key=lambda item: item[1]):
+            print(f"  {backend:24s} {elapsed * 1000:7.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
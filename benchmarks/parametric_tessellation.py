@@ -0,0 +1,163 @@
+"""
+Benchmark of adaptive against uniform tessellation of parametric surfaces.
+
+Builds every surface with the adaptive tessellator and measures its chord
+error, the largest distance from the exact surface to the mesh. Then it finds
+the coarsest uniform grid with at most that error and compares the vertex
+counts. Evenly curved surfaces such as the sphere gain nothing from adaptive
+refinement and pay a small overhead for it, so the check is on the whole
+catalog: exits with status 1 if the adaptive meshes need more vertices in
+total than the uniform grids. Run from the repository root:
+
+    python -m benchmarks.parametric_tessellation --samples 100
+"""
+
+import argparse, sys, time
+import numpy as np
+import vtk
+from src.core.constants import X_MIN, X_MAX, Y_MIN, Y_MAX, Z_MIN, Z_MAX
+from src.utils.surface_utils import create_parametric_func_surface_actor
+
+TAU = 2 * np.pi
+
+
+def klein_bottle(u, v):
+    r = 4 * (1 - np.cos(u) / 2)
+    x = 6 * np.cos(u) * (1 + np.sin(u)) + np.where(
+        u < np.pi, r * np.cos(u) * np.cos(v), r * np.cos(v + np.pi)
+    )
+    y = 16 * np.sin(u) + np.where(u < np.pi, r * np.sin(u) * np.cos(v), 0)
+    return x / 5, y / 5, r * np.sin(v) / 5
+
+
+def dupin_cyclide(u, v, a=4, b=3.8, c=1, d=2):
+    denominator = a - c * np.cos(u) * np.cos(v)
+    x = d * (c - a * np.cos(u) * np.cos(v)) + b * b * np.cos(u)
+    y = b * np.sin(u) * (a - d * np.cos(v))
+    z = b * np.sin(v) * (c * np.cos(u) - d)
+    return x / denominator, y / denominator, z / denominator
+
+
+SURFACES = {
+    "sphere": (
+        lambda u, v: (
+            3 * np.cos(u) * np.sin(v),
+            3 * np.sin(u) * np.sin(v),
+            3 * np.cos(v),
+        ),
+        (0, TAU),
+        (0, np.pi),
+    ),
+    "torus": (
+        lambda u, v: (
+            (3 + np.cos(v)) * np.cos(u),
+            (3 + np.cos(v)) * np.sin(u),
+            np.sin(v),
+        ),
+        (0, TAU),
+        (0, TAU),
+    ),
+    "klein_bottle": (klein_bottle, (0, TAU), (0, TAU)),
+    "dupin_cyclide": (dupin_cyclide, (0, TAU), (0, TAU)),
+    "gaussian_bump": (
+        lambda u, v: (u, v, 3 * np.exp(-4 * (u * u + v * v))),
+        (-4, 4),
+        (-4, 4),
+    ),
+}
+
+
+def build(surface, bounds, samples, adaptive):
+    function, u_range, v_range = surface
+    start = time.perf_counter()
+    actor = create_parametric_func_surface_actor(
+        function,
+        u_range,
+        v_range,
+        bounds,
+        min_samples=min(20, samples),
+        max_samples=samples,
+        adaptive=adaptive,
+    )
+    return actor.GetMapper().GetInput(), time.perf_counter() - start
+
+
+def chord_error(polydata, surface, bounds, samples=200):
+    # Largest distance from exact surface points inside the bounds to the mesh
+    function, u_range, v_range = surface
+    u, v = np.meshgrid(
+        np.linspace(*u_range, samples), np.linspace(*v_range, samples), indexing="ij"
+    )
+    with np.errstate(all="ignore"):
+        points = np.stack(
+            [np.broadcast_to(w, u.shape) for w in function(u, v)], axis=-1
+        ).reshape(-1, 3)
+    lower, upper = np.array(bounds[0::2]), np.array(bounds[1::2])
+    points = points[np.all((points > lower) & (points < upper), axis=1)]
+
+    triangles = vtk.vtkTriangleFilter()
+    triangles.SetInputData(polydata)
+    triangles.Update()
+    locator = vtk.vtkCellLocator()
+    locator.SetDataSet(triangles.GetOutput())
+    locator.BuildLocator()
+    closest, cell, sub_id, distance = (
+        [0.0] * 3,
+        vtk.reference(0),
+        vtk.reference(0),
+        vtk.reference(0.0),
+    )
+    error = 0.0
+    for point in points:
+        locator.FindClosestPoint(point, closest, cell, sub_id, distance)
+        error = max(error, distance.get())
+    return np.sqrt(error)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--samples", type=int, default=100, help="tier resolution")
+    parser.add_argument("--surfaces", nargs="+", default=list(SURFACES))
+    args = parser.parse_args()
+
+    bounds = (X_MIN, X_MAX, Y_MIN, Y_MAX, Z_MIN, Z_MAX)
+    print(
+        f"{'surface':14s} {'error':>8s} {'adaptive':>9s} {'time':>8s} "
+        f"{'uniform':>8s} {'grid':>5s} {'time':>8s} {'ratio':>6s}"
+    )
+    worse, totals = [], np.zeros(2, dtype=int)
+    for name in args.surfaces:
+        surface = SURFACES[name]
+        adaptive, adaptive_time = build(surface, bounds, args.samples, True)
+        error = chord_error(adaptive, surface, bounds)
+
+        # Coarsest uniform grid at least as accurate as the adaptive mesh
+        low, high = 2, 4 * args.samples
+        while low < high:
+            middle = (low + high) // 2
+            uniform, _ = build(surface, bounds, middle, False)
+            if chord_error(uniform, surface, bounds) <= error:
+                high = middle
+            else:
+                low = middle + 1
+        uniform, uniform_time = build(surface, bounds, low, False)
+
+        totals += (adaptive.GetNumberOfPoints(), uniform.GetNumberOfPoints())
+        ratio = adaptive.GetNumberOfPoints() / max(uniform.GetNumberOfPoints(), 1)
+        if ratio > 1:
+            worse.append(name)
+        print(
+            f"{name:14s} {error:8.4f} {adaptive.GetNumberOfPoints():9d} "
+            f"{adaptive_time * 1000:6.1f}ms {uniform.GetNumberOfPoints():8d} "
+            f"{low:5d} {uniform_time * 1000:6.1f}ms {ratio:6.2f}"
+        )
+
+    print(f"total: {totals[0]} adaptive, {totals[1]} uniform vertices")
+    if worse:
+        print(f"adaptive meshes with more vertices: {', '.join(worse)}")
+    if totals[0] > totals[1]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
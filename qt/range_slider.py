@@ -6,7 +6,7 @@ from PyQt5.QtWidgets import (
     QSpacerItem,
     QSizePolicy,
 )
-from PyQt5.QtCore import Qt, pyqtSignal, QRectF, QEvent, QSize, QLocale
+from PyQt5.QtCore import Qt, pyqtSignal, QRectF, QEvent, QSize, QLocale, QTimer
 from PyQt5.QtGui import (
     QFont,
     QDoubleValidator,
@@ -18,7 +18,7 @@ from PyQt5.QtGui import (
 )
 
 from qt.slider import BoundsDialog
-from src.core.constants import SCALE_FACTOR, DEFAULT_SLIDER_BOUNDS
+from src.core.constants import SCALE_FACTOR, DEFAULT_SLIDER_BOUNDS, SLIDER_IDLE_MS
 from qt.slider import CustomDoubleValidator
 
 LABEL_SLIDER_SPACING = 10
@@ -30,6 +30,8 @@ class RangeSlider(QWidget):
     lowerValueChanged = pyqtSignal(float)
     upperValueChanged = pyqtSignal(float)
     rangeChanged = pyqtSignal(float, float)
+    interactionStarted = pyqtSignal()
+    interactionFinished = pyqtSignal()
 
     def __init__(self, parent, bounds, values, text, update_callback):
         super().__init__(parent)
@@ -47,6 +49,11 @@ class RangeSlider(QWidget):
         self.mBackgroudColorDisabled = Qt.darkGray
         self.mBackgroudColor = self.mBackgroudColorEnabled
         self.orientation = Qt.Horizontal
+        self.interacting = False
+        self.idle_timer = QTimer(self)
+        self.idle_timer.setSingleShot(True)
+        self.idle_timer.setInterval(SLIDER_IDLE_MS)
+        self.idle_timer.timeout.connect(self.finish_interaction)
 
         self.setMouseTracking(True)
 
@@ -219,6 +226,9 @@ class RangeSlider(QWidget):
         if event.buttons() & Qt.LeftButton:
             posValue = event.pos().x()
 
+            if self.mFirstHandlePressed or self.mSecondHandlePressed:
+                self.start_interaction()
+
             if self.mFirstHandlePressed:
                 new_lower_value = (
                     posValue - self.mDelta - self.label.width()
@@ -235,6 +245,20 @@ class RangeSlider(QWidget):
     def mouseReleaseEvent(self, event):
         self.mFirstHandlePressed = False
         self.mSecondHandlePressed = False
+        self.finish_interaction()
+
+    def start_interaction(self):
+        # Dragging a handle; ends on release or after SLIDER_IDLE_MS without movement
+        self.idle_timer.start()
+        if not self.interacting:
+            self.interacting = True
+            self.interactionStarted.emit()
+
+    def finish_interaction(self):
+        self.idle_timer.stop()
+        if self.interacting:
+            self.interacting = False
+            self.interactionFinished.emit()
 
     def setLowerValue(self, value):
         value = max(min(value, self.mMaximum), self.mMinimum)
@@ -0,0 +1,37 @@
+"""
+Coalescing of render requests.
+
+Updating a scene usually touches several actors (e.g. every function tied to a
+slider), and each of them used to render the window right away. The scheduler
+collects these requests and issues a single Render() once control returns to
+the event loop, at most once per display frame.
+"""
+
+import time
+from PyQt5.QtCore import QTimer
+from src.core.constants import RENDER_FRAME_INTERVAL_MS
+
+
+class RenderScheduler:
+    def __init__(self, render_window, frame_interval=RENDER_FRAME_INTERVAL_MS):
+        self.render_window = render_window
+        self.frame_interval = frame_interval
+        self.last_render = 0.0
+        self.render_count = 0
+        self.timer = QTimer()
+        self.timer.setSingleShot(True)
+        self.timer.timeout.connect(self.flush)
+
+    def request(self):
+        """Schedules a render on a later event-loop turn unless one is pending."""
+        if self.timer.isActive():
+            return
+        elapsed = (time.perf_counter() - self.last_render) * 1000
+        self.timer.start(int(max(0, self.frame_interval - elapsed)))
+
+    def flush(self):
+        """Renders immediately and drops any pending request."""
+        self.timer.stop()
+        self.last_render = time.perf_counter()
+        self.render_count += 1
+        self.render_window.Render()
@@ -9,13 +9,18 @@ from PyQt5.QtWidgets import (
     QSizePolicy,
     QGraphicsDropShadowEffect,
 )
-from PyQt5.QtCore import Qt, QEvent
+from PyQt5.QtCore import Qt, QEvent, QTimer, pyqtSignal
 from PyQt5.QtGui import QFont, QDoubleValidator, QColor
 
-from src.core.constants import SCALE_FACTOR, DEFAULT_SLIDER_BOUNDS
+from src.core.constants import SCALE_FACTOR, DEFAULT_SLIDER_BOUNDS, SLIDER_IDLE_MS
 import re
 
 class Slider(QWidget):
+    # Emitted when the user starts moving the slider and when the movement ends
+    # (mouse released or no movement for SLIDER_IDLE_MS)
+    interactionStarted = pyqtSignal()
+    interactionFinished = pyqtSignal()
+
     def __init__(self, parent, bounds, value, text, update_callback):
         super().__init__(parent)
 
@@ -24,6 +29,11 @@ class Slider(QWidget):
 
         self.bounds = bounds
         self.update_callback = update_callback
+        self.interacting = False
+        self.idle_timer = QTimer(self)
+        self.idle_timer.setSingleShot(True)
+        self.idle_timer.setInterval(SLIDER_IDLE_MS)
+        self.idle_timer.timeout.connect(self.finish_interaction)
 
         # Use a vertical layout to stack the label, slider, and text box
         self.layout = QVBoxLayout(self)
@@ -114,10 +124,27 @@ class Slider(QWidget):
         self.slider.valueChanged.connect(update_text_from_slider)
         self.text_box.returnPressed.connect(update_slider_from_text)
 
+        # User actions (dragging, wheel, keys) precede the value change, while
+        # programmatic changes do not trigger them
+        self.slider.actionTriggered.connect(self.start_interaction)
+        self.slider.sliderReleased.connect(self.finish_interaction)
+
         # Set initial value
         self.slider.setValue(int(value * SCALE_FACTOR))
         self.text_box.setText(f"{value:.2f}")
 
+    def start_interaction(self, action=None):
+        self.idle_timer.start()
+        if not self.interacting:
+            self.interacting = True
+            self.interactionStarted.emit()
+
+    def finish_interaction(self):
+        self.idle_timer.stop()
+        if self.interacting:
+            self.interacting = False
+            self.interactionFinished.emit()
+
     def set_value(self, value, bounds=None):
         """
         Programmatically set slider value and optionally update bounds
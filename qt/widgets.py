@@ -137,6 +137,26 @@ class ControlWidget(QWidget):
 
         return label, min_text_box, max_text_box
 
+    def add_line_edit(self, text, value, update_callback):
+        label = QLabel(text, self)
+        label.setSizePolicy(QSizePolicy.Fixed, QSizePolicy.Fixed)
+        label.setAlignment(Qt.AlignLeft)
+        line_edit = QLineEdit(self)
+        line_edit.setText(value)
+
+        # Send the text to update_callback when Enter is pressed
+        line_edit.returnPressed.connect(lambda: update_callback(line_edit.text()))
+
+        # Create layout
+        line_layout = QHBoxLayout()
+        line_layout.setSpacing(10)
+        line_layout.addWidget(label, alignment=Qt.AlignLeft)
+        line_layout.addWidget(line_edit)
+        line_layout.setContentsMargins(0, 0, 0, 0)
+        self.layout.addLayout(line_layout)
+
+        return label, line_edit
+
     def add_button(self, text, callback):
         button = QPushButton(text, self)
         button.clicked.connect(callback)
@@ -18,6 +18,114 @@ DEFAULT_SLIDER_BOUNDS = (0, 7)
 DEGREES_OF_ROTATION = 5
 LINES_RESOLUTION = 100
 
+# Coefficient-affine implicit functions
+AFFINE_MAX_BASIS_FIELDS = 8  # Larger decompositions are evaluated directly
+
+# Cache of sampled scalar fields shared by all implicit builders
+FIELD_CACHE_MAX_BYTES = 512 * 2**20
+
+# Interval culling: lattice cells per block bounded at once, and the largest
+# share of the lattice worth evaluating block by block instead of densely
+INTERVAL_BLOCK_CELLS = 8
+INTERVAL_MAX_EVALUATED_FRACTION = 0.25
+
+# Single precision geometry: whether fields and vertices are float32 by default,
+# and the largest float32 round-off of the surface, in sampling cells, that the
+# range analysis accepts before falling back to float64
+SINGLE_PRECISION = False
+FLOAT32_MAX_ERROR = 0.01
+
+# Symmetric evaluation: smallest lattice and estimated operations per sample
+# (see symmetry_utils.evaluation_cost) worth reducing to the fundamental
+# region, and blocks per axis when exploiting an exchange of two coordinates
+SYMMETRY_MIN_SAMPLES = 2**15
+SYMMETRY_MIN_COST = 4
+SYMMETRY_SWAP_BLOCKS = 4
+
+# Slab streaming: samples evaluated at once when streaming an implicit surface,
+# and the lattice size above which surfaces are streamed by default
+SLAB_MAX_SAMPLES = 2**22
+STREAMING_MIN_SAMPLES = 2**24
+
+# Tiled implicit surfaces: lattice spacings are powers of 2**(1/levels), so a
+# slightly different box keeps its spacing, and the lattice is contoured in
+# tiles of this many cells per axis that are reused across boxes
+SURFACE_LATTICE_LEVELS = 4
+SURFACE_TILE_CELLS = 32
+
+# Multi-process field evaluation: worker processes (None for one per core),
+# smallest lattice worth distributing and tiles per worker for load balancing
+FIELD_WORKERS = None
+PARALLEL_MIN_SAMPLES = 2**21
+PARALLEL_TILES_PER_WORKER = 2
+
+# Iso-surface backends in order of preference, fastest first on the function
+# catalog (see benchmarks/iso_backends.py)
+ISO_SURFACE_BACKENDS_BY_SPEED = ("flying_edges", "synchronized_templates", "contour")
+
+# Newton projection of iso-surface vertices onto the level set: iterations,
+# and the largest total displacement of a vertex in sampling cells
+NEWTON_STEPS = 4
+NEWTON_MAX_CELLS = 1.0
+
+# Background geometry construction
+GEOMETRY_WORKER_THREADS = 2
+
+# Quality tiers: geometry is built at the interactive tier while a slider is
+# being dragged and rebuilt once at the final tier when it is released or idle
+QUALITY_TIERS = {
+    "final": {
+        "surface_samples": 100,  # Implicit surface grid samples per axis
+        "height_samples": 400,  # Height field surface grid samples per axis
+        "lines_resolution": LINES_RESOLUTION,  # Trace and contour grid samples
+        "parametric_samples": 100,  # Parametric surface samples per parameter
+        "curve_samples": 1000,  # Parametric curve samples
+    },
+    "interactive": {
+        "surface_samples": 60,
+        "height_samples": 200,
+        "lines_resolution": 60,
+        "parametric_samples": 50,
+        "curve_samples": 300,
+    },
+}
+INTERACTIVE_FRAME_BUDGET = 0.05  # Target build time (s) of an interactive update
+INTERACTIVE_MIN_DETAIL = 0.3  # Lowest fraction of the interactive tier resolution
+MIN_SAMPLES = 10  # Lower bound on any tier resolution
+SLIDER_IDLE_MS = 250  # Time without slider movement that ends an interaction
+
+# Decimation of large surfaces: default triangle budget of a surface in
+# thousands of triangles (0 disables decimation, which is opted into per
+# function) and its slider bounds, the weight of the constraints keeping
+# boundary edges in place, and the number of decimated meshes kept per
+# function for the geometry states they were built for
+TRIANGLE_BUDGET = 0
+TRIANGLE_BUDGET_BOUNDS = (0, 2000)
+DECIMATION_BOUNDARY_WEIGHT = 100.0
+DECIMATION_CACHE_SIZE = 4
+
+# Narrow-band sampling of implicit surfaces: a coarse lattice is refined only
+# around the surface, within the samples of the dense lattice it replaces; the
+# effective resolution per axis is at most
+# NARROW_BAND_COARSE_CELLS * 2**NARROW_BAND_LEVELS * NARROW_BAND_BRICK_CELLS
+NARROW_BAND_COARSE_CELLS = 16
+NARROW_BAND_LEVELS = 2
+NARROW_BAND_BRICK_CELLS = 8
+NARROW_BAND_SAFETY = 1.5  # Multiplier of the local gradient estimate
+
+# Adaptive tessellation of parametric surfaces: largest distance between the
+# surface and its triangles as a fraction of the diagonal of the bounds,
+# largest angle in degrees between the normals of a cell and its children,
+# and the edge length ratio beyond which a cell spans a discontinuity; cells
+# can be refined PARAMETRIC_EXTRA_LEVELS levels beyond the tier resolution
+PARAMETRIC_CHORD_TOLERANCE = 2.5e-4
+PARAMETRIC_MAX_NORMAL_ANGLE = 10.0
+PARAMETRIC_MAX_EDGE_RATIO = 3.0
+PARAMETRIC_EXTRA_LEVELS = 1
+
+# Minimum time between two coalesced renders (one display frame at 60 Hz)
+RENDER_FRAME_INTERVAL_MS = 16
+
 
 """
 Carefully curated color palette for mathematical surfaces.
@@ -0,0 +1,114 @@
+"""
+Background construction of VTK geometry.
+
+Geometry builds (function evaluation and VTK filters) run on a thread pool so
+that slider callbacks return immediately. Both NumPy and VTK release the GIL
+during heavy work, which keeps the UI thread responsive. Each job is submitted
+under a key (typically a function and one of its components); submitting a new
+job for a key supersedes the previous one, which is cancelled if it has not
+started yet and discarded when it finishes otherwise.
+
+Finished results are handed back on the UI thread by deliver(). The notify
+callback passed to the worker is called from the worker thread whenever a
+result is ready and must schedule deliver() on the UI thread, e.g. by emitting
+a queued Qt signal.
+"""
+
+import itertools, threading
+from concurrent.futures import ThreadPoolExecutor, wait
+from src.core.constants import GEOMETRY_WORKER_THREADS
+
+
+class GeometryWorker:
+    def __init__(self, notify=None, max_workers=GEOMETRY_WORKER_THREADS):
+        self.notify = notify
+        self.executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="geometry"
+        )
+        self.lock = threading.Lock()
+        self.counter = itertools.count()
+        self.jobs = dict()  # key -> (job_id, future, on_done)
+        self.completed = []  # (key, job_id, result)
+
+    def submit(self, key, build, on_done):
+        """
+        Schedules build() in the background and on_done(result) on the UI thread.
+
+        Parameters:
+        -----------
+        key : hashable
+            Identifies what is being built; a newer job with the same key
+            supersedes this one
+        build : callable
+            Function without arguments returning the built object
+        on_done : callable
+            Called by deliver() with the result of build
+        """
+        with self.lock:
+            job_id = next(self.counter)
+            previous = self.jobs.get(key)
+            if previous:
+                previous[1].cancel()
+            future = self.executor.submit(self._run, key, job_id, build)
+            self.jobs[key] = (job_id, future, on_done)
+
+    def _run(self, key, job_id, build):
+        if not self._is_current(key, job_id):
+            return
+        try:
+            result = build()
+        except Exception as e:
+            print(f"Error building geometry: {e}")
+            result = None
+        with self.lock:
+            self.completed.append((key, job_id, result))
+        if self.notify:
+            self.notify()
+
+    def _is_current(self, key, job_id):
+        with self.lock:
+            job = self.jobs.get(key)
+            return job is not None and job[0] == job_id
+
+    def deliver(self):
+        """
+        Runs the on_done callbacks of finished, non-superseded jobs.
+        Must be called on the UI thread. Returns the number of delivered jobs.
+        """
+        ready = []
+        with self.lock:
+            completed, self.completed = self.completed, []
+            for key, job_id, result in completed:
+                job = self.jobs.get(key)
+                if job and job[0] == job_id:
+                    del self.jobs[key]
+                    ready.append((job[2], result))
+
+        for on_done, result in ready:
+            on_done(result)
+        return len(ready)
+
+    def cancel(self, owner=None):
+        """
+        Drops pending jobs whose key starts with owner, or all jobs if owner
+        is None. Running jobs finish but their results are discarded.
+        """
+        with self.lock:
+            for key in list(self.jobs):
+                if owner is None or (isinstance(key, tuple) and key[0] == owner):
+                    self.jobs.pop(key)[1].cancel()
+
+    def is_busy(self):
+        with self.lock:
+            return bool(self.jobs)
+
+    def wait(self):
+        """Blocks until all submitted jobs have finished, then delivers them."""
+        with self.lock:
+            futures = [job[1] for job in self.jobs.values()]
+        wait(futures)
+        return self.deliver()
+
+    def shutdown(self):
+        self.cancel()
+        self.executor.shutdown(wait=False)
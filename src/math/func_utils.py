@@ -1,4 +1,4 @@
-import re, copy, vtk
+import re, copy, time, vtk
 from rich.console import Console
 from rich.markdown import Markdown
 import numpy as np
@@ -14,12 +14,25 @@ from src.core.constants import (
     DEFAULT_COLOR_END,
     DEFAULT_LINE_COLOR,
     DEFAULT_SLIDER_BOUNDS,
+    QUALITY_TIERS,
+    INTERACTIVE_FRAME_BUDGET,
+    INTERACTIVE_MIN_DETAIL,
+    MIN_SAMPLES,
+    SYMMETRY_MIN_COST,
+    TRIANGLE_BUDGET,
+    TRIANGLE_BUDGET_BOUNDS,
+    DECIMATION_CACHE_SIZE,
+    SINGLE_PRECISION,
 )
 from src.utils.surface_utils import (
     create_func_surface_actor,
+    create_height_field_actor,
+    decimate_surface_actor,
     set_z_gradient_coloring,
+    set_level_coloring,
     create_parametric_func_surface_actor,
     create_point_actor,
+    update_point_actor_appearance,
 )
 from src.utils.line_utils import (
     create_func_traces_actor,
@@ -27,11 +40,17 @@ from src.utils.line_utils import (
     create_parametric_surface_traces_actor,
     create_horizontal_contours_actor,
     create_parametric_horizontal_contours_actor,
+    update_curve_actor_appearance,
+    update_line_actor_appearance,
 )
 import sympy as sp
 from sympy.matrices import MatrixBase, ImmutableDenseMatrix
 
 from src.math.text_preprocessing import parse
+from src.math.affine_utils import AffineField
+from src.math.interval_utils import lambdify_interval
+from src.math.height_utils import solve_height_field
+from src.math.symmetry_utils import find_symmetries, evaluation_cost
 
 
 class Func:
@@ -61,22 +80,50 @@ class Func:
         self.show_surface = True
         self.show_lines = True
         self.show_contour = False
+        self.narrow_band = False
+        self.adaptive_mesh = False
+        self.levels = (0.0,)
+        self.triangle_budget = TRIANGLE_BUDGET
+        self.triangle_budget_bounds = TRIANGLE_BUDGET_BOUNDS
         self.func = sp.Basic()
         self.coeffs = set()
         self.surface_actor = None
         self.lines_actor = None
         self.contour_actor = None
+        self.affine_field = None
+        self.kernel = None
+        self.interval_kernel = None
+        self.gradient_kernel = None
+        self.height_field = None
+        self.height_kernel = None
+        self.symmetry = None
+        self.canonical = None
+        self.built_states = dict()
+        self.pending_states = dict()
+        self.decimated_surfaces = dict()
+        self.appearance_state = None
+        self.interactive_detail = dict()
         self.console = Console()
         self.parse_function()
 
     def parse_function(self):
+        self.affine_field = None
+        self.kernel = None
+        self.interval_kernel = None
+        self.gradient_kernel = None
+        self.height_field = None
+        self.height_kernel = None
+        self.symmetry = None
+        self.canonical = None
+        self.decimated_surfaces = dict()
+        self.invalidate()
         try:
             if self.text.strip() == "":
                 self.console.print(":arrow_forward:")
                 self.legal = False
                 return
             expr = parse(self.text)
-            if not expr:
+            if expr is None:
                 self.legal = False
                 return
             if isinstance(expr, sp.Equality):
@@ -124,6 +171,10 @@ class Func:
                 else:
                     self.type = "implicit"
                     self.legal = True
+                    self.affine_field = AffineField.from_expr(
+                        expr, self.coeffs, (x, y, z), self.get_canonical()
+                    )
+                    self.height_field = solve_height_field(expr, (x, y, z))
 
             else:
                 self.legal = False
@@ -152,36 +203,353 @@ class Func:
     def update_render(self, widget):
         if not self.legal:
             return
-        func = copy.copy(self.func)
         global_bounds = self.get_bounds(widget)
+        quality = self.get_quality(widget)
+        geometry_states = self.get_geometry_states(widget, global_bounds)
+        appearance_state = self.get_appearance_state()
+
+        # Appearance changes: update the existing actors in place
+        if appearance_state != self.appearance_state:
+            for component in ("surface", "lines", "contour"):
+                self.update_appearance(component)
+            self.appearance_state = appearance_state
+
+        # Visibility changes: only toggle the actors
+        for component, actor in self.get_actors().items():
+            if actor:
+                actor.SetVisibility(self.is_visible(component))
+
+        # Geometry changes: rebuild the shown components built for another
+        # state; hidden components are rebuilt lazily when they are shown
+        stale = [
+            component
+            for component in self.get_shown_components()
+            if self.built_states.get(component) != geometry_states[component]
+            and self.pending_states.get(component) != geometry_states[component]
+        ]
+        if stale:
+            if self.affine_field is not None:
+                # Rebuild the field from cached basis fields
+                safe_np_func = self.affine_field.bind(self.get_coeff_values(widget))
+                if safe_np_func is not None:
+                    self.attach_hooks(safe_np_func, widget)
+            else:
+                safe_np_func = self.create_np_func(widget)
+            if safe_np_func is not None:
+                for component in stale:
+                    self.request_component(
+                        component,
+                        geometry_states[component],
+                        safe_np_func,
+                        global_bounds,
+                        quality,
+                        widget,
+                    )
+        self.request_render(widget)
+
+    def request_render(self, widget):
+        # Coalesced through the widget's render scheduler when it has one
+        scheduler = getattr(widget, "render_scheduler", None)
+        if scheduler is None:
+            widget.vtk_widget.get_render_window().Render()
+        else:
+            scheduler.request()
+
+    def request_component(
+        self, component, state, np_func, global_bounds, quality, widget
+    ):
+        # Build in the background if the widget has a geometry worker; the old
+        # actor stays on screen until the new one is swapped in
+        self.pending_states[component] = state
+
+        def build():
+            start = time.perf_counter()
+            resolutions = self.get_resolutions(component, quality)
+            actor = self.build_component(
+                component, state, np_func, global_bounds, resolutions
+            )
+            if quality == "interactive":
+                self.adapt_detail(component, time.perf_counter() - start)
+            return actor
+
+        def on_done(actor):
+            if self.swap_component(component, state, actor, widget):
+                self.request_render(widget)
+
+        worker = getattr(widget, "geometry_worker", None)
+        if worker is None:
+            self.swap_component(component, state, build(), widget)
+        else:
+            worker.submit((id(self), component), build, on_done)
+
+    def swap_component(self, component, state, actor, widget):
+        # Results of superseded requests are dropped
+        if self.pending_states.get(component) != state:
+            return False
+        del self.pending_states[component]
+
+        old_actor = self.get_actors()[component]
+        if old_actor:
+            widget.renderer.RemoveActor(old_actor)
+        setattr(self, f"{component}_actor", actor)
+        if actor:
+            # Appearance may have changed while the actor was being built
+            self.update_appearance(component)
+            actor.SetVisibility(self.is_visible(component))
+            widget.renderer.AddActor(actor)
+        self.built_states[component] = state
+        return True
+
+    def build_component(self, component, state, np_func, global_bounds, resolutions):
+        # Creates the actor of a component without touching the scene, so it
+        # can run on a worker thread
+        if component == "surface":
+            return self.build_surface(state, np_func, global_bounds, resolutions)
+        elif component == "lines":
+            return self.build_lines(np_func, global_bounds, resolutions)
+        return self.build_contour(np_func, global_bounds, resolutions)
+
+    def get_quality(self, widget):
+        # "interactive" while a slider is being dragged, "final" otherwise
+        return getattr(widget, "quality", "final")
+
+    def get_resolutions(self, component, quality):
+        detail = 1.0
+        if quality == "interactive":
+            detail = self.interactive_detail.get(component, 1.0)
+        resolutions = {
+            key: max(MIN_SAMPLES, int(value * detail))
+            for key, value in QUALITY_TIERS[quality].items()
+        }
+        # Narrow-band sampling and decimation are too slow to follow a slider
+        resolutions["narrow_band"] = self.narrow_band and quality == "final"
+        resolutions["decimate"] = quality == "final"
+        return resolutions
+
+    def adapt_detail(self, component, elapsed):
+        # Scale the interactive resolution so that builds fit the frame budget;
+        # the cost of a surface grows with the cube of its resolution
+        ratio = (INTERACTIVE_FRAME_BUDGET / max(elapsed, 1e-6)) ** (1 / 3)
+        detail = self.interactive_detail.get(component, 1.0) * min(2.0, max(0.5, ratio))
+        self.interactive_detail[component] = min(
+            1.0, max(INTERACTIVE_MIN_DETAIL, detail)
+        )
+
+    def get_geometry_states(self, widget, global_bounds):
+        # Everything that requires re-evaluating each component
+        coeff_values = self.get_coeff_values(widget)
+        common = (
+            self.get_quality(widget),
+            getattr(widget, "single_precision", SINGLE_PRECISION),
+            global_bounds,
+            tuple(
+                (coeff.name, coeff_values[coeff]) for coeff in self.get_coeff_order()
+            ),
+            tuple(self.t_range),
+            tuple(self.u_range),
+            tuple(self.v_range),
+        )
+        return {
+            "surface": common
+            + (
+                self.narrow_band,
+                self.adaptive_mesh,
+                self.get_levels(),
+                self.triangle_budget,
+            ),
+            "lines": common
+            + (
+                self.trace_spacing,
+                self.dash_spacing,
+                self.thickness == 0,
+                self.opacity == 0,
+            ),
+            "contour": common
+            + (self.trace_spacing, self.thickness == 0, self.opacity == 0),
+        }
+
+    def get_appearance_state(self):
+        # Everything that only changes actor properties
+        return (
+            tuple(self.color_start[i] for i in range(3)),
+            tuple(self.color_end[i] for i in range(3)),
+            tuple(self.line_color[i] for i in range(3)),
+            self.thickness,
+            self.opacity,
+        )
+
+    def get_actors(self):
+        return {
+            "surface": self.surface_actor,
+            "lines": self.lines_actor,
+            "contour": self.contour_actor,
+        }
+
+    def get_shown_components(self):
+        components = []
+        if self.show_surface or self.type == "point":
+            components.append("surface")
+        if self.show_lines:
+            components.append("lines")
+        if self.show_contour:
+            components.append("contour")
+        return components
+
+    def is_visible(self, component):
+        if component == "surface":
+            return self.show_surface
+        elif component == "lines":
+            return self.show_lines
+        return self.show_contour
+
+    def set_show(self, component, state, widget):
+        # Toggling an up-to-date component only flips its visibility
+        setattr(self, f"show_{component}", state)
+        self.update_render(widget)
+
+    def invalidate(self):
+        # Force a geometry rebuild on the next update_render
+        self.built_states = dict()
+        self.pending_states = dict()
+
+    def update_appearance(self, component):
+        actor = self.get_actors()[component]
+        if not actor or not actor.GetMapper():
+            return
+        if component == "surface":
+            if self.type == "point":
+                update_point_actor_appearance(
+                    actor, self.line_color, self.thickness, self.opacity
+                )
+            else:
+                self.color_surface(actor)
+        elif component == "lines" and self.type == "parametric-1":
+            update_curve_actor_appearance(
+                actor, self.line_color, self.thickness, self.opacity
+            )
+        else:
+            update_line_actor_appearance(
+                actor, self.line_color, self.thickness, self.opacity
+            )
 
-        # Replace coefficients with values
+    def get_coeff_values(self, widget):
+        values = dict()
         for coeff in self.coeffs:
             if coeff in widget.coeffs:
-                # if isinstance(func, sp.Basic):
-                func = func.subs(coeff, widget.coeffs[coeff])
-                # elif isinstance(func, tuple):
-                # func = tuple([f.subs(coeff, widget.coeffs[coeff]) for f in func])
+                values[coeff] = widget.coeffs[coeff]
             else:
                 raise ValueError(f"Missing coefficient: {coeff}")
+        return values
 
-        if sp.S.ComplexInfinity in sp.preorder_traversal(func):
-            return
-
-        # Create a numpy function from the sympy function
-        if isinstance(func, sp.Basic) and self.type == "implicit":
-            x, y, z = sp.symbols("x y z")
-            np_func = sp.lambdify((x, y, z), func, "numpy")
-        elif isinstance(func, MatrixBase):
-            func = tuple([item for sublist in func.tolist() for item in sublist])
-            if self.type == "parametric-1":
-                t = sp.symbols("t")
-                np_func = sp.lambdify(t, func, "numpy")
-            elif self.type == "parametric-2":
-                u, v = sp.symbols("u v")
-                np_func = sp.lambdify((u, v), func, "numpy")
-            elif self.type == "point":
-                np_func = func
+    def get_variables(self):
+        if self.type == "implicit":
+            return sp.symbols("x y z")
+        elif self.type == "parametric-1":
+            return (sp.symbols("t"),)
+        elif self.type == "parametric-2":
+            return sp.symbols("u v")
+        return ()
+
+    def get_coeff_order(self):
+        return sorted(self.coeffs, key=lambda coeff: coeff.name)
+
+    def get_canonical(self):
+        # Content address of the expression, shared by equal expressions
+        if self.canonical is None:
+            self.canonical = sp.srepr(self.func)
+        return self.canonical
+
+    def get_kernel(self):
+        # Compile once; coefficients are passed as trailing arguments
+        if self.kernel is None:
+            func = self.func
+            if isinstance(func, MatrixBase):
+                func = tuple([item for sublist in func.tolist() for item in sublist])
+            try:
+                self.kernel = sp.lambdify(
+                    (*self.get_variables(), *self.get_coeff_order()),
+                    func,
+                    "numpy",
+                    cse=True,
+                )
+            except Exception as e:
+                print(f"Error compiling {self.text}: {e}")
+        return self.kernel
+
+    def get_interval_kernel(self):
+        # Interval extension of implicit functions, used to cull empty blocks
+        if self.interval_kernel is None and self.type == "implicit":
+            self.interval_kernel = lambdify_interval(
+                (*self.get_variables(), *self.get_coeff_order()), self.func
+            )
+        return self.interval_kernel
+
+    def get_gradient_kernel(self):
+        # Analytic gradient of implicit functions, used to refine surfaces
+        if self.gradient_kernel is None and self.type == "implicit":
+            variables = self.get_variables()
+            gradient = tuple(sp.diff(self.func, v) for v in variables)
+            # e.g. the derivatives of Abs, which sympy leaves unevaluated
+            if any(d.has(sp.Derivative) for d in gradient):
+                return None
+            try:
+                self.gradient_kernel = sp.lambdify(
+                    (*variables, *self.get_coeff_order()),
+                    gradient,
+                    "numpy",
+                    cse=True,
+                )
+            except Exception as e:
+                print(f"Error compiling the gradient of {self.text}: {e}")
+        return self.gradient_kernel
+
+    def get_height_kernel(self):
+        # Implicit functions linear in a coordinate, solved for it
+        if self.height_kernel is None and self.height_field is not None:
+            axis, height, _ = self.height_field
+            plane_variables = [
+                v for i, v in enumerate(self.get_variables()) if i != axis
+            ]
+            try:
+                self.height_kernel = sp.lambdify(
+                    (*plane_variables, *self.get_coeff_order()),
+                    height,
+                    "numpy",
+                    cse=True,
+                )
+            except Exception as e:
+                print(f"Error compiling the height field of {self.text}: {e}")
+        return self.height_kernel
+
+    def get_symmetry(self):
+        # Reflections and exchanges of coordinates leaving the function
+        # unchanged, and the estimated cost of evaluating it per sample
+        if self.symmetry is None and self.type == "implicit":
+            variables = self.get_variables()
+            self.symmetry = (
+                find_symmetries(self.func, variables),
+                evaluation_cost(self.func, variables),
+            )
+        return self.symmetry
+
+    def create_np_func(self, widget):
+        kernel = self.get_kernel()
+        if kernel is None:
+            return None
+
+        # NumPy scalars make division by zero yield inf instead of raising
+        coeff_values = self.get_coeff_values(widget)
+        args = [np.float64(coeff_values[coeff]) for coeff in self.get_coeff_order()]
+        # Single precision inputs get single precision coefficients, which
+        # would otherwise promote the whole computation to float64
+        single_args = [np.float32(arg) for arg in args]
+
+        def np_func(*variables):
+            single = all(
+                getattr(variable, "dtype", None) == np.float32 for variable in variables
+            )
+            with np.errstate(all="ignore"):
+                return kernel(*variables, *(single_args if single else args))
 
         def safe_np_func(*args):
             try:
@@ -201,12 +569,7 @@ class Func:
                     return r
 
                 # Apply numpy function to arguments
-                if self.type == "point":
-                    return np_func
-                if not isinstance(np_func, tuple):
-                    result = np_func(*args)
-                else:
-                    raise ValueError("Tuple functions not supported in safe_np_func")
+                result = np_func(*args)
 
                 # Apply sanitization to tuple or single result
                 if isinstance(result, np.ndarray):
@@ -222,15 +585,63 @@ class Func:
                 # Comprehensive error handling
                 print(f"Error in safe_np_func: {e}")
 
-        if self.show_surface or self.type == "point":
-            self.update_surface(safe_np_func, widget.renderer, global_bounds)
-            if self.surface_actor:
-                self.surface_actor.SetVisibility(self.show_surface)
-        if self.show_lines:
-            self.update_lines(safe_np_func, widget.renderer, global_bounds)
-        if self.show_contour:
-            self.update_contour(safe_np_func, widget.renderer, global_bounds)
-        widget.vtk_widget.get_render_window().Render()
+        safe_np_func.cache_key = (self.get_canonical(), tuple(args))
+        return self.attach_hooks(safe_np_func, widget)
+
+    def attach_hooks(self, np_func, widget):
+        # Optional capabilities of implicit functions used by the builders
+        # (see field_utils); NumPy scalars keep division by zero quiet
+        coeff_values = self.get_coeff_values(widget)
+        args = [np.float64(coeff_values[coeff]) for coeff in self.get_coeff_order()]
+
+        interval_kernel = self.get_interval_kernel()
+        if interval_kernel is not None:
+            # Implicit functions can also be compiled again in worker processes
+            np_func.kernel_spec = (
+                self.get_canonical(),
+                tuple(s.name for s in (*self.get_variables(), *self.get_coeff_order())),
+                tuple(float(arg) for arg in args),
+            )
+            np_func.bound = lambda x, y, z: interval_kernel(
+                x, y, z, *((arg, arg) for arg in args)
+            )
+
+        gradient_kernel = self.get_gradient_kernel()
+        if gradient_kernel is not None:
+
+            def gradient(x, y, z):
+                with np.errstate(all="ignore"):
+                    return gradient_kernel(x, y, z, *args)
+
+            np_func.gradient = gradient
+
+        height_kernel = self.get_height_kernel()
+        if height_kernel is not None:
+            axis, _, slope = self.height_field
+            try:
+                slope_value = float(slope.subs(coeff_values))
+            except TypeError:
+                slope_value = np.nan
+            # With a vanishing slope the surface is no longer a height field
+            if np.isfinite(slope_value) and slope_value != 0:
+
+                def height(u, v):
+                    with np.errstate(all="ignore"):
+                        return height_kernel(u, v, *args)
+
+                np_func.height_field = (axis, height)
+
+        if self.get_symmetry() is not None:
+            symmetry, cost = self.get_symmetry()
+            # Mirroring samples only beats evaluating cheap functions directly
+            # when they are assembled from several fields (see affine_utils)
+            if any(symmetry) and (
+                cost >= SYMMETRY_MIN_COST or hasattr(np_func, "evaluate_grid")
+            ):
+                np_func.symmetry = symmetry
+
+        np_func.single_precision = getattr(widget, "single_precision", SINGLE_PRECISION)
+        return np_func
 
     def get_bounds(self, widget):
         if self.type == "parametric-1" or self.type == "parametric-2":
@@ -275,20 +686,38 @@ class Func:
         )
         return (x_min, x_max, y_min, y_max, z_min, z_max)
 
-    def update_surface(self, np_func, renderer, global_bounds):
-        if self.surface_actor:
-            renderer.RemoveActor(self.surface_actor)
-            self.surface_actor = None
+    def build_surface(self, state, np_func, global_bounds, resolutions):
+        decimate = resolutions["decimate"] and self.get_triangle_budget() > 0
+        if decimate and state in self.decimated_surfaces:
+            return self.get_decimated_surface(state)
         if self.type == "implicit":
-            self.surface_actor = create_func_surface_actor(
-                np_func,
-                global_bounds,
-            )
-            set_z_gradient_coloring(
-                self.surface_actor, self.color_start, self.color_end, self.opacity
-            )
+            levels = self.get_levels()
+            height_field = getattr(np_func, "height_field", None)
+            if height_field is not None and levels == (0.0,):
+                actor = create_height_field_actor(
+                    height_field[1],
+                    height_field[0],
+                    global_bounds,
+                    (resolutions["height_samples"],) * 2,
+                    implicit_function=np_func,
+                )
+            else:
+                actor = create_func_surface_actor(
+                    np_func,
+                    global_bounds,
+                    (resolutions["surface_samples"],) * 3,
+                    iso_value=levels if len(levels) > 1 else levels[0],
+                    narrow_band=resolutions["narrow_band"],
+                    project=True,
+                    tiled=True,
+                )
+            if actor:
+                if decimate:
+                    self.decimate_surface(actor, state, np_func)
+                self.color_surface(actor)
+            return actor
         elif self.type == "parametric-2":
-            self.surface_actor = create_parametric_func_surface_actor(
+            actor = create_parametric_func_surface_actor(
                 np_func,
                 self.u_range,
                 self.v_range,
@@ -296,29 +725,89 @@ class Func:
                 self.color_start,
                 self.color_end,
                 self.opacity,
+                min_samples=min(20, resolutions["parametric_samples"]),
+                max_samples=resolutions["parametric_samples"],
+                adaptive=self.adaptive_mesh,
             )
+            if decimate and self.decimate_surface(actor, state):
+                set_z_gradient_coloring(
+                    actor, self.color_start, self.color_end, self.opacity
+                )
+            return actor
         elif self.type == "point":
-            self.surface_actor = create_point_actor(
+            return create_point_actor(
                 np_func, self.line_color, self.thickness, self.opacity, global_bounds
             )
-        if self.surface_actor:
-            renderer.AddActor(self.surface_actor)
+        return None
+
+    def get_levels(self):
+        # Iso-values of the implicit surface, a single 0 unless a family of
+        # level sets was requested
+        if self.type != "implicit" or not self.levels:
+            return (0.0,)
+        return tuple(self.levels)
+
+    def color_surface(self, actor):
+        if len(self.get_levels()) > 1:
+            set_level_coloring(
+                actor,
+                self.get_levels(),
+                self.color_start,
+                self.color_end,
+                self.opacity,
+            )
+        else:
+            set_z_gradient_coloring(
+                actor, self.color_start, self.color_end, self.opacity
+            )
+
+    def decimate_surface(self, actor, state, implicit_function=None):
+        # The quadric pass takes much longer than building the surface, so the
+        # decimated meshes of the last geometry states are kept and reused
+        if not decimate_surface_actor(
+            actor, self.get_triangle_budget(), implicit_function
+        ):
+            return False
+        cached = vtk.vtkPolyData()
+        cached.ShallowCopy(actor.GetMapper().GetInput())
+        self.decimated_surfaces[state] = cached
+        while len(self.decimated_surfaces) > DECIMATION_CACHE_SIZE:
+            del self.decimated_surfaces[next(iter(self.decimated_surfaces))]
+        return True
+
+    def get_decimated_surface(self, state):
+        # Colors are added to a copy, not to the cached mesh
+        polydata = vtk.vtkPolyData()
+        polydata.ShallowCopy(self.decimated_surfaces[state])
+        mapper = vtk.vtkPolyDataMapper()
+        mapper.SetInputData(polydata)
+        actor = vtk.vtkActor()
+        actor.SetMapper(mapper)
+        if self.type == "implicit":
+            self.color_surface(actor)
+        else:
+            set_z_gradient_coloring(
+                actor, self.color_start, self.color_end, self.opacity
+            )
+        return actor
 
-    def update_lines(self, np_func, renderer, global_bounds):
-        if self.lines_actor:
-            renderer.RemoveActor(self.lines_actor)
-            self.lines_actor = None
+    def get_triangle_budget(self):
+        # The budget is set in thousands of triangles
+        return int(round(self.triangle_budget * 1000))
+
+    def build_lines(self, np_func, global_bounds, resolutions):
         if self.type == "implicit":
-            self.lines_actor = create_func_traces_actor(
+            return create_func_traces_actor(
                 np_func,
                 global_bounds,
                 self.trace_spacing,
                 self.thickness,
                 self.line_color,
                 self.opacity,
+                resolutions["lines_resolution"],
             )
         elif self.type == "parametric-1":
-            self.lines_actor = create_parametric_curve_actor(
+            return create_parametric_curve_actor(
                 np_func,
                 self.t_range,
                 self.line_color,
@@ -326,9 +815,10 @@ class Func:
                 self.opacity,
                 self.dash_spacing,
                 global_bounds,
+                resolutions["curve_samples"],
             )
         elif self.type == "parametric-2":
-            self.lines_actor = create_parametric_surface_traces_actor(
+            return create_parametric_surface_traces_actor(
                 np_func,
                 self.u_range,
                 self.v_range,
@@ -338,24 +828,21 @@ class Func:
                 self.thickness,
                 self.opacity,
             )
-        if self.lines_actor:
-            renderer.AddActor(self.lines_actor)
+        return None
 
-    def update_contour(self, np_func, renderer, global_bounds):
-        if self.contour_actor:
-            renderer.RemoveActor(self.contour_actor)
-            self.contour_actor = None
+    def build_contour(self, np_func, global_bounds, resolutions):
         if self.type == "implicit":
-            self.contour_actor = create_horizontal_contours_actor(
+            return create_horizontal_contours_actor(
                 np_func,
                 global_bounds,
                 self.trace_spacing,
                 self.thickness,
                 self.line_color,
                 self.opacity,
+                resolutions["lines_resolution"],
             )
         elif self.type == "parametric-2":
-            self.contour_actor = create_parametric_horizontal_contours_actor(
+            return create_parametric_horizontal_contours_actor(
                 np_func,
                 self.u_range,
                 self.v_range,
@@ -364,9 +851,9 @@ class Func:
                 self.line_color,
                 self.thickness,
                 self.opacity,
+                resolutions["lines_resolution"],
             )
-        if self.contour_actor:
-            renderer.AddActor(self.contour_actor)
+        return None
 
     def __eq__(self, other):
         if isinstance(other, Func):
@@ -436,6 +923,11 @@ class Func:
             "show_surface": self.show_surface,
             "show_lines": self.show_lines,
             "show_contour": self.show_contour,
+            "narrow_band": self.narrow_band,
+            "adaptive_mesh": self.adaptive_mesh,
+            "levels": list(self.levels),
+            "triangle_budget": self.triangle_budget,
+            "triangle_budget_bounds": self.triangle_budget_bounds,
         }
 
     def unmarshalize(self, data):
@@ -467,5 +959,12 @@ class Func:
         self.show_surface = data["show_surface"]
         self.show_lines = data["show_lines"]
         self.show_contour = data.get("show_contour", False)
+        self.narrow_band = data.get("narrow_band", False)
+        self.adaptive_mesh = data.get("adaptive_mesh", False)
+        self.levels = tuple(data.get("levels", (0.0,)))
+        self.triangle_budget = data.get("triangle_budget", TRIANGLE_BUDGET)
+        self.triangle_budget_bounds = data.get(
+            "triangle_budget_bounds", TRIANGLE_BUDGET_BOUNDS
+        )
         self.parse_function()
         return self
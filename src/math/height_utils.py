@@ -0,0 +1,44 @@
+"""
+Detection of implicit functions that are explicit height fields.
+
+Many implicit inputs such as z = x^2 - y^2 are linear in one coordinate, i.e.
+f = slope * w + rest with w absent from slope and rest. Solving for that
+coordinate gives w = -rest / slope as a function of the two other coordinates,
+which can be sampled on a 2D grid instead of a 3D lattice.
+"""
+
+import sympy as sp
+
+
+def solve_height_field(expr, variables):
+    """
+    Solves an implicit function for a coordinate it is linear in.
+
+    Only slopes that depend on coefficients alone are accepted: a slope that
+    varies in space vanishes on curves where the height has poles, which a
+    height field cannot represent.
+
+    Parameters:
+    -----------
+    expr : sympy expression
+        Implicit function in the variables and coefficients
+    variables : tuple of sympy symbols
+        Spatial variables (x, y, z); z is preferred, then y, then x
+
+    Returns:
+        tuple (axis, height, slope) with the index of the solved variable, its
+        expression in the other two variables and the coefficient of the
+        solved variable in expr, or None if expr is not linear in any variable
+    """
+    for axis in (2, 1, 0):
+        w = variables[axis]
+        if not expr.has(w):
+            continue
+        slope = sp.diff(expr, w)
+        if slope.has(*variables) or slope.is_zero:
+            continue
+        rest = sp.expand(expr - slope * w)
+        if rest.has(w):
+            continue
+        return axis, -rest / slope, slope
+    return None
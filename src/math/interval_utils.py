@@ -0,0 +1,268 @@
+"""
+Interval arithmetic on sympy expressions.
+
+An expression tree is compiled into a function of intervals: given a range
+(lo, hi) for every symbol it returns a range that is guaranteed to contain
+every value the expression takes on the box. Bounds are rounded outwards and
+anything the evaluator does not understand (or that becomes undefined on the
+box) yields (-inf, inf), so the result is always conservative.
+
+Intervals are pairs of NumPy arrays, which lets a single call bound the
+expression on many boxes at once.
+"""
+
+import numpy as np
+import sympy as sp
+
+
+def widen(lo, hi):
+    """Rounds a range outwards by one unit in the last place."""
+    return np.nextafter(lo, -np.inf), np.nextafter(hi, np.inf)
+
+
+def unbounded(*intervals):
+    shape = np.broadcast_shapes(*(np.shape(lo) for lo, _ in intervals))
+    return np.full(shape, -np.inf), np.full(shape, np.inf)
+
+
+def interval_add(a, b):
+    return widen(a[0] + b[0], a[1] + b[1])
+
+
+def interval_mul(a, b):
+    products = [a[0] * b[0], a[0] * b[1], a[1] * b[0], a[1] * b[1]]
+    # 0 * inf is taken as 0, as in extended interval arithmetic
+    products = [np.where(np.isnan(p), 0.0, p) for p in products]
+    return widen(np.minimum.reduce(products), np.maximum.reduce(products))
+
+
+def interval_reciprocal(a):
+    lo, hi = a
+    contains_zero = (lo <= 0) & (hi >= 0)
+    return widen(
+        np.where(contains_zero, -np.inf, 1 / hi),
+        np.where(contains_zero, np.inf, 1 / lo),
+    )
+
+
+def interval_integer_power(a, n):
+    if n == 0:
+        return np.ones_like(a[0]), np.ones_like(a[0])
+    if n < 0:
+        return interval_reciprocal(interval_integer_power(a, -n))
+
+    lo, hi = a
+    lo_n, hi_n = lo**n, hi**n
+    if n % 2:
+        return widen(lo_n, hi_n)
+    # Even powers have their minimum at zero
+    return widen(
+        np.where(lo >= 0, lo_n, np.where(hi <= 0, hi_n, 0.0)),
+        np.maximum(lo_n, hi_n),
+    )
+
+
+def interval_real_power(a, p):
+    # Non-integer powers are undefined (NaN in NumPy) for negative bases
+    lo, hi = np.maximum(a[0], 0.0), a[1]
+    lo, hi = np.where(a[1] < 0, np.nan, lo), np.where(a[1] < 0, np.nan, hi)
+    if p > 0:
+        return widen(lo**p, hi**p)
+    return widen(hi**p, lo**p)
+
+
+def interval_exp(a):
+    return widen(np.exp(a[0]), np.exp(a[1]))
+
+
+def interval_log(a):
+    return widen(np.log(np.maximum(a[0], 0.0)), np.log(a[1]))
+
+
+def interval_pow(base, exponent):
+    # General powers as exp(exponent * log(base)), valid for positive bases
+    lo, hi = interval_exp(interval_mul(exponent, interval_log(base)))
+    return np.where(base[0] >= 0, lo, -np.inf), np.where(base[0] >= 0, hi, np.inf)
+
+
+def contains_period(a, offset, period=2 * np.pi):
+    """Checks whether the range contains offset + k * period for some integer k."""
+    k = np.ceil((a[0] - offset) / period)
+    return offset + k * period <= a[1]
+
+
+def periodic(function, maximum, minimum):
+    """Interval extension of a 2 pi periodic function in [-1, 1] with its
+    maxima at maximum + 2 k pi and its minima at minimum + 2 k pi."""
+
+    def interval_function(a):
+        lo, hi = a
+        # The endpoints are evaluated with function itself rather than a phase
+        # shifted sin, whose rounding would move the bounds by a few units
+        value_lo, value_hi = function(lo), function(hi)
+        full = (hi - lo) >= 2 * np.pi
+        upper = np.where(
+            full | contains_period(a, maximum), 1.0, np.maximum(value_lo, value_hi)
+        )
+        lower = np.where(
+            full | contains_period(a, minimum), -1.0, np.minimum(value_lo, value_hi)
+        )
+        return widen(lower, upper)
+
+    return interval_function
+
+
+interval_sin = periodic(np.sin, np.pi / 2, -np.pi / 2)
+interval_cos = periodic(np.cos, 0.0, np.pi)
+
+
+def interval_tan(a):
+    # tan is increasing between two consecutive poles
+    pole = contains_period(a, np.pi / 2, np.pi) | ((a[1] - a[0]) >= np.pi)
+    lo, hi = widen(np.tan(a[0]), np.tan(a[1]))
+    return np.where(pole, -np.inf, lo), np.where(pole, np.inf, hi)
+
+
+def interval_abs(a):
+    lo, hi = a
+    return (
+        np.where(lo >= 0, lo, np.where(hi <= 0, -hi, 0.0)),
+        np.maximum(np.abs(lo), np.abs(hi)),
+    )
+
+
+def interval_cosh(a):
+    lo, hi = interval_abs(a)
+    return widen(np.cosh(lo), np.cosh(hi))
+
+
+def increasing(function, domain=(-np.inf, np.inf)):
+    """Interval extension of a non-decreasing function defined on domain."""
+
+    def interval_function(a):
+        lo, hi = np.maximum(a[0], domain[0]), np.minimum(a[1], domain[1])
+        outside = (a[1] < domain[0]) | (a[0] > domain[1])
+        lo, hi = widen(function(lo), function(hi))
+        return np.where(outside, np.nan, lo), np.where(outside, np.nan, hi)
+
+    return interval_function
+
+
+def decreasing(function, domain=(-np.inf, np.inf)):
+    """Interval extension of a non-increasing function defined on domain."""
+    flipped = increasing(lambda v: -function(v), domain)
+
+    def interval_function(a):
+        lo, hi = flipped(a)
+        return -hi, -lo
+
+    return interval_function
+
+
+INTERVAL_FUNCTIONS = {
+    sp.exp: interval_exp,
+    sp.log: interval_log,
+    sp.sin: interval_sin,
+    sp.cos: interval_cos,
+    sp.tan: interval_tan,
+    sp.Abs: interval_abs,
+    sp.cosh: interval_cosh,
+    sp.sinh: increasing(np.sinh),
+    sp.tanh: increasing(np.tanh),
+    sp.atan: increasing(np.arctan),
+    sp.asin: increasing(np.arcsin, (-1.0, 1.0)),
+    sp.acos: decreasing(np.arccos, (-1.0, 1.0)),
+    sp.floor: increasing(np.floor),
+    sp.ceiling: increasing(np.ceil),
+    sp.sign: increasing(np.sign),
+}
+
+
+def compile_interval(expr, index):
+    """
+    Turns an expression tree into nested closures over a list of intervals.
+
+    Parameters:
+    -----------
+    expr : sympy expression
+        Expression to compile
+    index : dict
+        Maps each symbol to the position of its interval in the argument list
+
+    Returns:
+        callable taking the list of intervals and returning (lo, hi)
+    """
+    if expr.is_Symbol:
+        if expr not in index:
+            return lambda intervals: unbounded(*intervals)
+        position = index[expr]
+        return lambda intervals: intervals[position]
+
+    if expr.is_number:
+        try:
+            value = float(expr)
+        except TypeError:
+            # Complex constants
+            return lambda intervals: unbounded(*intervals)
+        lo, hi = widen(value, value)
+        return lambda intervals: (lo, hi)
+
+    args = [compile_interval(arg, index) for arg in expr.args]
+
+    if expr.is_Add or expr.is_Mul:
+        combine = interval_add if expr.is_Add else interval_mul
+
+        def interval_reduce(intervals):
+            result = args[0](intervals)
+            for arg in args[1:]:
+                result = combine(result, arg(intervals))
+            return result
+
+        return interval_reduce
+
+    if expr.is_Pow:
+        base, exponent = args
+        power = expr.exp
+        if power.is_Integer:
+            return lambda intervals: interval_integer_power(base(intervals), int(power))
+        if power.is_number and power.is_real:
+            return lambda intervals: interval_real_power(base(intervals), float(power))
+        return lambda intervals: interval_pow(base(intervals), exponent(intervals))
+
+    function = INTERVAL_FUNCTIONS.get(expr.func)
+    if function is not None and len(args) == 1:
+        return lambda intervals: function(args[0](intervals))
+
+    return lambda intervals: unbounded(*intervals)
+
+
+def lambdify_interval(symbols, expr):
+    """
+    Compiles a sympy expression into an interval function.
+
+    Parameters:
+    -----------
+    symbols : sequence of sympy symbols
+        Arguments of the compiled function, in order
+    expr : sympy expression
+        Scalar expression to bound
+
+    Returns:
+        callable taking one (lo, hi) pair of arrays or scalars per symbol and
+        returning a (lo, hi) pair of arrays enclosing the expression
+    """
+    evaluate = compile_interval(expr, {s: i for i, s in enumerate(symbols)})
+
+    def interval_function(*intervals):
+        intervals = [
+            (np.asarray(lo, float), np.asarray(hi, float)) for lo, hi in intervals
+        ]
+        with np.errstate(all="ignore"):
+            lo, hi = evaluate(intervals)
+            shape = np.broadcast_shapes(*(lo.shape for lo, _ in intervals))
+            lo, hi = np.broadcast_to(lo, shape), np.broadcast_to(hi, shape)
+            # Undefined somewhere on the box: nothing can be excluded
+            undefined = np.isnan(lo) | np.isnan(hi)
+        return np.where(undefined, -np.inf, lo), np.where(undefined, np.inf, hi)
+
+    return interval_function
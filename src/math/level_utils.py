@@ -0,0 +1,49 @@
+"""
+Parsing of the levels of implicit surface families.
+
+A function f can be drawn as the family of nested level sets f = c for a list
+of values "1, 2, 4" or a range "start:stop:count" of evenly spaced values,
+like shells of a potential. All levels are extracted from one sampled field.
+"""
+
+import numpy as np
+
+
+def parse_levels(text):
+    """
+    Parses a list or range of levels.
+
+    Parameters:
+    -----------
+    text : str
+        Comma separated values, or "start:stop:count" for count evenly spaced
+        values from start to stop
+
+    Returns:
+        tuple of distinct floats in increasing order, (0.0,) for empty text
+
+    Raises:
+        ValueError if the text is not a list or range of finite numbers
+    """
+    text = text.strip()
+    if not text:
+        return (0.0,)
+    if ":" in text:
+        parts = text.split(":")
+        if len(parts) != 3:
+            raise ValueError(f"Expected start:stop:count, got {text!r}")
+        start, stop = float(parts[0]), float(parts[1])
+        count = int(parts[2])
+        if count < 1:
+            raise ValueError(f"Expected a positive count, got {count}")
+        levels = np.linspace(start, stop, count)
+    else:
+        levels = np.array([float(part) for part in text.split(",") if part.strip()])
+    if len(levels) == 0 or not np.all(np.isfinite(levels)):
+        raise ValueError(f"Expected finite levels, got {text!r}")
+    return tuple(float(level) for level in np.unique(levels))
+
+
+def format_levels(levels):
+    """Formats levels as comma separated values, the inverse of parse_levels."""
+    return ", ".join(f"{level:.15g}" for level in levels)
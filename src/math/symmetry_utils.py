@@ -0,0 +1,91 @@
+"""
+Detection of reflection symmetries of implicit functions.
+
+Quadrics and many other implicit surfaces are even in some coordinates
+(f(-x, y, z) = f(x, y, z)) or invariant under exchanging two coordinates
+(f(y, x, z) = f(x, y, z)). On a lattice that shares the symmetry, the samples
+of a fundamental region determine all the others. Mirroring those samples
+costs about one pass over the lattice, so it only pays off for functions that
+take more than a few operations per sample (see evaluation_cost).
+"""
+
+from itertools import combinations
+import sympy as sp
+
+# Cost of a function such as sin or sqrt relative to an addition
+FUNCTION_COST = 8
+
+
+def is_invariant(expr, transformed, variables):
+    # sympy canonicalizes even powers, cos(-x), Abs(-x), ... by itself, so a
+    # structural comparison settles most cases; polynomials are also expanded
+    if transformed == expr:
+        return True
+    if expr.is_polynomial(*variables):
+        return sp.expand(transformed - expr) == 0
+    return False
+
+
+def find_symmetries(expr, variables):
+    """
+    Finds the reflection symmetries of an implicit function.
+
+    Parameters:
+    -----------
+    expr : sympy expression
+        Implicit function in the variables and coefficients
+    variables : tuple of sympy symbols
+        Spatial variables (x, y, z)
+
+    Returns:
+        tuple (mirrors, swaps) with the indices of the variables expr is even
+        in and the index pairs of the variables it is symmetric in
+    """
+    mirrors = tuple(
+        axis
+        for axis, w in enumerate(variables)
+        if expr.has(w) and is_invariant(expr, expr.xreplace({w: -w}), variables)
+    )
+    swaps = tuple(
+        (a, b)
+        for a, b in combinations(range(len(variables)), 2)
+        if expr.has(variables[a], variables[b])
+        and is_invariant(
+            expr,
+            expr.xreplace({variables[a]: variables[b], variables[b]: variables[a]}),
+            variables,
+        )
+    )
+    return mirrors, swaps
+
+
+def evaluation_cost(expr, variables):
+    """
+    Estimates the work per sample of evaluating expr on broadcast axes.
+
+    Only operations on arrays spanning every variable expr depends on are
+    counted; everything else is evaluated on smaller, broadcast arrays.
+
+    Parameters:
+    -----------
+    expr : sympy expression
+        Implicit function in the variables and coefficients
+    variables : tuple of sympy symbols
+        Spatial variables (x, y, z)
+
+    Returns:
+        int, the number of full-lattice operations, with functions and
+        non-integer powers counting FUNCTION_COST each
+    """
+    spatial = expr.free_symbols & set(variables)
+    cost = 0
+    for node in sp.preorder_traversal(expr):
+        if not node.args or not spatial <= node.free_symbols:
+            continue
+        if isinstance(node, (sp.Add, sp.Mul)):
+            cost += len(node.args) - 1
+        elif isinstance(node, sp.Pow) and node.exp.is_Integer:
+            cost += 1
+        else:
+            cost += FUNCTION_COST
+    return cost
@@ -283,7 +283,38 @@ def transform_func_calls(expr_str, custom_funcs):
     return astor.to_source(modified_tree).strip()
 
 
+def split_equation(expr_str):
+    """
+    Splits an equation "lhs = rhs" (or "lhs == rhs") at its top-level equals
+    sign, outside of parentheses and brackets.
+
+    Returns:
+        tuple (lhs, rhs), or None if the string is not a single equation
+    """
+    depth, splits = 0, []
+    for match in re.finditer(r"[()\[\]]|[<>!=]?==?", expr_str):
+        token = match.group()
+        if token in "([":
+            depth += 1
+        elif token in ")]":
+            depth -= 1
+        elif depth == 0 and token in ("=", "=="):
+            splits.append(match.span())
+    if len(splits) != 1:
+        return None
+    start, end = splits[0]
+    return expr_str[:start], expr_str[end:]
+
+
 def parse(expr_str):
+    # An equation is parsed side by side into a sympy Equality
+    sides = split_equation(expr_str)
+    if sides is not None:
+        lhs, rhs = (parse(side) for side in sides)
+        if lhs is None or rhs is None:
+            return None
+        return sp.Eq(lhs, rhs, evaluate=False)
+
     # Transform the expression
     transformed_expr = transform_func_calls(expr_str, CUSTOM_FUNCTIONS)
 
@@ -0,0 +1,261 @@
+"""
+Zero-copy bridge between NumPy arrays and VTK data arrays.
+
+VTK stores structured volumes with the x index varying fastest, which is
+NumPy's Fortran order for a field indexed as field[i, j, k] = f(x_i, y_j, z_k).
+The helpers below hand such buffers to VTK without copying whenever the memory
+layout already matches, and fall back to a single vectorized copy otherwise.
+
+Lifetime: numpy_to_vtk(..., deep=False) attaches the NumPy buffer to the
+underlying vtkBuffer, so the memory stays alive for as long as the VTK array
+(and therefore the dataset holding it) is alive.
+"""
+
+import numpy as np
+import vtk
+import vtk.util.numpy_support as numpy_support  # type: ignore
+
+
+def as_vtk_array(values, name=None):
+    """
+    Wraps a 1D or (n, k) NumPy array as a vtkDataArray without copying.
+
+    Parameters:
+    -----------
+    values : numpy array
+        Contiguous array of shape (n,) or (n, k)
+    name : str
+        Optional name of the resulting array
+
+    Returns:
+        vtkDataArray sharing memory with values
+    """
+    values = np.ascontiguousarray(values)
+    if values.dtype == np.bool_ or values.dtype.kind == "c":
+        values = values.real.astype(np.float64)
+    vtk_array = numpy_support.numpy_to_vtk(values, deep=False)
+    if name:
+        vtk_array.SetName(name)
+    return vtk_array
+
+
+def field_to_vtk_array(field, name=None):
+    """
+    Wraps a 3D scalar field indexed as field[i, j, k] (x, y, z) as a VTK array.
+
+    The field is shared without copying if it is Fortran-contiguous, which is
+    what VTK expects for structured data. Other layouts are copied once.
+
+    Parameters:
+    -----------
+    field : numpy array
+        Array of shape (nx, ny, nz)
+    name : str
+        Optional name of the resulting array
+
+    Returns:
+        vtkDataArray with nx * ny * nz values
+    """
+    field = np.asarray(field)
+    if field.dtype.kind not in "fiu":
+        field = field.real
+    if field.dtype.kind != "f":
+        field = field.astype(np.float64)
+    flat = np.asfortranarray(field).ravel(order="F")
+    return as_vtk_array(flat, name)
+
+
+def create_image_data(field, bounds, name="values"):
+    """
+    Creates a vtkImageData whose point scalars share memory with field.
+
+    Parameters:
+    -----------
+    field : numpy array
+        Scalar field of shape (nx, ny, nz) sampled on a uniform grid
+    bounds : tuple
+        (xmin, xmax, ymin, ymax, zmin, zmax) covered by the field
+    name : str
+        Name of the scalar array
+
+    Returns:
+        vtkImageData object
+    """
+    dims = field.shape
+    image = vtk.vtkImageData()
+    image.SetDimensions(dims)
+    image.SetOrigin(bounds[0], bounds[2], bounds[4])
+    image.SetSpacing(
+        [
+            (
+                (bounds[2 * axis + 1] - bounds[2 * axis]) / (dims[axis] - 1)
+                if dims[axis] > 1
+                else 1.0
+            )
+            for axis in range(3)
+        ]
+    )
+    image.GetPointData().SetScalars(field_to_vtk_array(field, name))
+    return image
+
+
+def points_to_vtk(points):
+    """
+    Wraps an (n, 3) array of coordinates as vtkPoints without copying.
+
+    Parameters:
+    -----------
+    points : numpy array
+        Array of shape (n, 3)
+
+    Returns:
+        vtkPoints object
+    """
+    points = np.asarray(points)
+    if points.dtype.kind != "f":
+        points = points.astype(np.float64)
+    vtk_points = vtk.vtkPoints()
+    vtk_points.SetData(as_vtk_array(points.reshape(-1, 3)))
+    return vtk_points
+
+
+def colors_to_vtk(colors, name="Colors"):
+    """
+    Wraps an (n, 4) array of RGBA values in [0, 255] as a vtkUnsignedCharArray.
+
+    Parameters:
+    -----------
+    colors : numpy array
+        Array of shape (n, 4)
+    name : str
+        Name of the resulting array
+
+    Returns:
+        vtkUnsignedCharArray object
+    """
+    colors = np.asarray(colors, dtype=np.uint8).reshape(-1, 4)
+    return as_vtk_array(colors, name)
+
+
+def structured_grid_from_arrays(points, values, dims, name="values"):
+    """
+    Creates a vtkStructuredGrid from point coordinates and scalar values.
+
+    Parameters:
+    -----------
+    points : numpy array
+        Array of shape (n, 3) ordered with the first grid index varying fastest
+    values : numpy array
+        Array of shape (n,) with one scalar per point
+    dims : tuple
+        Grid dimensions (ni, nj, nk)
+    name : str
+        Name of the scalar array
+
+    Returns:
+        vtkStructuredGrid object
+    """
+    grid = vtk.vtkStructuredGrid()
+    grid.SetDimensions(dims)
+    grid.SetPoints(points_to_vtk(points))
+    grid.GetPointData().SetScalars(as_vtk_array(np.ravel(values), name))
+    return grid
+
+
+def id_array_to_vtk(ids):
+    """
+    Wraps an integer array as a vtkIdTypeArray without copying when possible.
+
+    Parameters:
+    -----------
+    ids : numpy array
+        One-dimensional array of point or cell ids
+
+    Returns:
+        vtkIdTypeArray object
+    """
+    id_type = numpy_support.get_numpy_array_type(vtk.VTK_ID_TYPE)
+    ids = np.ascontiguousarray(ids, dtype=id_type).ravel()
+    return numpy_support.numpy_to_vtkIdTypeArray(ids, deep=False)
+
+
+def create_cell_array(offsets, connectivity):
+    """
+    Creates a vtkCellArray in one shot from offsets and connectivity arrays.
+
+    Parameters:
+    -----------
+    offsets : numpy array
+        Array of length n_cells + 1 with the start of each cell in connectivity
+    connectivity : numpy array
+        Flat array of point ids
+
+    Returns:
+        vtkCellArray object
+    """
+    cells = vtk.vtkCellArray()
+    cells.SetData(id_array_to_vtk(offsets), id_array_to_vtk(connectivity))
+    return cells
+
+
+def triangles_to_vtk(points, triangles):
+    """
+    Creates polydata from (m, 3) triangles, keeping only the points they use.
+
+    Parameters:
+    -----------
+    points : numpy array
+        Array of shape (n, 3)
+    triangles : numpy array
+        Array of shape (m, 3) with the point ids of every triangle
+
+    Returns:
+        vtkPolyData object
+    """
+    used = np.zeros(len(points), dtype=bool)
+    used[triangles] = True
+    triangles = (np.cumsum(used) - 1)[triangles]
+
+    polydata = vtk.vtkPolyData()
+    polydata.SetPoints(points_to_vtk(points[used]))
+    polydata.SetPolys(
+        create_cell_array(np.arange(0, 3 * len(triangles) + 1, 3), triangles.ravel())
+    )
+    return polydata
+
+
+def points_from_vtk(vtk_points):
+    """
+    Returns an (n, 3) NumPy view of the coordinates stored in vtkPoints.
+
+    Parameters:
+    -----------
+    vtk_points : vtkPoints
+        Points to expose
+
+    Returns:
+        numpy array of shape (n, 3)
+    """
+    return numpy_support.vtk_to_numpy(vtk_points.GetData())
+
+
+def set_points_dtype(polydata, dtype):
+    """
+    Stores the points of polydata with the given floating point type.
+
+    Parameters:
+    -----------
+    polydata : vtkPolyData
+        Mesh whose points are converted in place
+    dtype : numpy dtype
+        np.float32 or np.float64
+
+    Returns:
+        the polydata
+    """
+    if polydata.GetPoints() is None:
+        return polydata
+    points = points_from_vtk(polydata.GetPoints())
+    if points.dtype != dtype:
+        polydata.SetPoints(points_to_vtk(points.astype(dtype)))
+    return polydata
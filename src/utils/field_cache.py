@@ -0,0 +1,102 @@
+"""
+Content-addressed cache of sampled scalar fields.
+
+Fields are keyed by what determines their values (canonical expression,
+coefficient values and sampling lattice) rather than by the object that
+produced them, so switching functions, moving a slider back to an earlier
+value or reloading a scene reuses earlier evaluations. Surface pieces
+contoured from those fields are stored as tuples of arrays alongside them.
+"""
+
+from collections import OrderedDict
+import threading
+import numpy as np
+from src.core.constants import FIELD_CACHE_MAX_BYTES
+
+
+def array_nbytes(array):
+    """Returns the memory held by array, not counting broadcast dimensions."""
+    if isinstance(array, tuple):
+        return sum(array_nbytes(item) for item in array)
+    size = np.prod(
+        [n for n, stride in zip(array.shape, array.strides) if stride != 0],
+        dtype=np.int64,
+    )
+    return int(size) * array.itemsize
+
+
+class FieldCache:
+    """
+    LRU cache of NumPy arrays (or tuples of arrays) bounded by their total size
+    in bytes.
+    Safe to use from the geometry worker threads.
+    """
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        """Returns the cached value for key, or None on a miss."""
+        with self.lock:
+            value = self.entries.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        """Stores value under key, evicting least recently used entries."""
+        if array_nbytes(value) > self.max_bytes:
+            return value
+
+        # Cached arrays are shared between callers and must not change
+        for array in value if isinstance(value, tuple) else (value,):
+            array.flags.writeable = False
+        with self.lock:
+            if key in self.entries:
+                self.nbytes -= array_nbytes(self.entries.pop(key))
+            self.entries[key] = value
+            self.nbytes += array_nbytes(value)
+
+            while self.nbytes > self.max_bytes:
+                _, evicted = self.entries.popitem(last=False)
+                self.nbytes -= array_nbytes(evicted)
+                self.evictions += 1
+        return value
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.nbytes = 0
+
+    def stats(self):
+        """Returns hit/miss statistics and the current memory usage."""
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "entries": len(self.entries),
+            "nbytes": self.nbytes,
+            "max_bytes": self.max_bytes,
+        }
+
+    def __repr__(self):
+        stats = self.stats()
+        return (
+            f"FieldCache({stats['entries']} fields, "
+            f"{stats['nbytes'] / 2**20:.1f}/{stats['max_bytes'] / 2**20:.0f} MiB, "
+            f"hit rate {stats['hit_rate']:.0%})"
+        )
+
+
+FIELD_CACHE = FieldCache(FIELD_CACHE_MAX_BYTES)
@@ -0,0 +1,458 @@
+"""
+Evaluation of implicit functions on axis-aligned sampling lattices.
+
+All implicit builders sample f(x, y, z) on lattices described by three 1D
+axes (a plane is a lattice with a single value on one axis). Functions may
+provide their own `evaluate_grid(x, y, z)` method, e.g. to reuse cached data
+for a lattice they have already seen; plain callables are evaluated directly
+on broadcastable axes, so no dense coordinate arrays are ever allocated and
+peak memory scales with the output field only.
+Functions carrying a `cache_key` attribute (a hashable description of the
+expression and its coefficient values) have their samples stored in the
+shared field cache, and functions carrying a `kernel_spec` attribute are
+evaluated on all cores for large lattices (see parallel_field).
+Callers that only need the zero level set (contouring at 0) may also let
+functions carrying a `bound` attribute, an interval extension of f, skip the
+blocks of the lattice where f provably does not vanish.
+Functions carrying a `symmetry` attribute, a tuple (mirrors, swaps) of the
+axes f is even in and the pairs of axes it is symmetric in, are only
+evaluated on the fundamental region of lattices sharing the symmetry.
+Functions carrying a true `single_precision` attribute are evaluated on
+float32 axes and produce float32 fields, unless the range analysis of
+field_dtype finds that float32 would blur the surface.
+"""
+
+import numpy as np
+from src.core.constants import (
+    INTERVAL_BLOCK_CELLS,
+    INTERVAL_MAX_EVALUATED_FRACTION,
+    SYMMETRY_MIN_SAMPLES,
+    SYMMETRY_SWAP_BLOCKS,
+    FLOAT32_MAX_ERROR,
+)
+from src.utils.field_cache import FIELD_CACHE
+from src.utils.parallel_field import evaluate_parallel
+
+# Number of samples evaluated per vectorized call when culling blocks
+CULLED_CHUNK_POINTS = 2**22
+
+
+def sample_axes(bounds, sample_dims):
+    """
+    Creates the 1D sampling axes for a uniform lattice.
+
+    Parameters:
+    -----------
+    bounds : tuple
+        (xmin, xmax, ymin, ymax, zmin, zmax) defining the volume to sample
+    sample_dims : tuple
+        Number of samples in each dimension (nx, ny, nz)
+
+    Returns:
+        tuple of three numpy arrays (x, y, z)
+    """
+    return tuple(
+        np.linspace(bounds[2 * axis], bounds[2 * axis + 1], sample_dims[axis])
+        for axis in range(3)
+    )
+
+
+def lattice_key(x, y, z):
+    """
+    Returns a hashable description of the lattice spanned by uniform axes.
+    """
+    return tuple(
+        (float(axis[0]), float(axis[-1]), len(axis)) if len(axis) else (0.0, 0.0, 0)
+        for axis in (np.atleast_1d(x), np.atleast_1d(y), np.atleast_1d(z))
+    )
+
+
+def box_signs(bound, lower, upper):
+    """
+    Determines the sign of a function on axis-aligned boxes.
+
+    Parameters:
+    -----------
+    bound : callable
+        Interval extension of the function, taking one (lo, hi) pair per axis
+    lower, upper : tuples of three broadcastable numpy arrays
+        Box corners along x, y and z
+
+    Returns:
+        int8 array that is 1 where f > 0 on the whole box, -1 where f < 0 and 0
+        where f may vanish
+    """
+    lo, hi = bound(*zip(lower, upper))
+    return np.where(lo > 0, 1, np.where(hi < 0, -1, 0)).astype(np.int8)
+
+
+def may_vanish(implicit_function, bounds):
+    """
+    Checks whether the function may vanish inside the box given by bounds.
+
+    Parameters:
+    -----------
+    implicit_function : callable
+        Function of x, y, z, optionally carrying a `bound` attribute
+    bounds : tuple
+        (xmin, xmax, ymin, ymax, zmin, zmax) of the box
+
+    Returns:
+        False only if the function's interval extension excludes zero
+    """
+    bound = getattr(implicit_function, "bound", None)
+    if bound is None:
+        return True
+    return box_signs(bound, bounds[0::2], bounds[1::2]) == 0
+
+
+def evaluate_culled(
+    implicit_function, bound, x, y, z, block_cells=INTERVAL_BLOCK_CELLS
+):
+    """
+    Evaluates an implicit function only in the blocks where it may vanish.
+
+    The lattice is split into blocks of block_cells cells per axis, which are
+    bounded with interval arithmetic. Samples inside blocks that may contain
+    the zero level set, plus a one-sample halo so that gradients at the surface
+    only see real values, are evaluated; all other samples are set to the
+    known sign of f (+1 or -1), which contours identically at 0.
+
+    Parameters:
+    -----------
+    implicit_function : callable
+        A function that takes three numpy arrays (x,y,z) and returns scalar values
+    bound : callable
+        Interval extension of implicit_function
+    x, y, z : numpy arrays
+        1D sampling axes
+    block_cells : int
+        Number of lattice cells per block edge
+
+    Returns:
+        numpy array of shape (nx, ny, nz) laid out with x varying fastest, the raw
+        result if the function did not return an array, or None if too few
+        blocks could be culled to make this worthwhile
+    """
+    axes = (x, y, z)
+    # An axis with a single sample is a single block of zero width
+    cells = [max(len(axis) - 1, 1) for axis in axes]
+    lower, upper = [], []
+    for axis, (values, count) in enumerate(zip(axes, cells)):
+        starts = np.arange(0, count, block_cells)
+        shape = [1, 1, 1]
+        shape[axis] = -1
+        lower.append(values[starts].reshape(shape))
+        upper.append(
+            values[np.minimum(starts + block_cells, len(values) - 1)].reshape(shape)
+        )
+
+    signs = box_signs(bound, lower, upper)
+    blocks = np.argwhere(signs == 0)
+    offsets = [
+        np.arange(-1, block_cells + 2) if len(axis) > 1 else np.zeros(1, dtype=int)
+        for axis in axes
+    ]
+    # Blocks are sampled with their halo, which only pays off for few blocks
+    points = np.prod([len(o) for o in offsets])
+    if (
+        len(blocks) * points
+        > INTERVAL_MAX_EVALUATED_FRACTION * x.size * y.size * z.size
+    ):
+        return None
+
+    # Any block containing a sample that is not evaluated has its sign. The
+    # last sample of an axis may start a block of its own, which repeats the
+    # previous one
+    fill = np.pad(signs.T, ((0, 1),) * 3, mode="edge")
+    for axis, size in enumerate((len(z), len(y), len(x))):
+        if size > 1:
+            fill = np.repeat(fill, block_cells, axis=axis)
+        fill = np.take(fill, np.arange(size), axis=axis)
+    values = np.empty(
+        (len(z), len(y), len(x)), dtype=np.result_type(x, y, z, np.float32)
+    )
+    values[...] = fill
+    values = values.T
+
+    # Sample the remaining blocks as a stack of small lattices on broadcastable
+    # axes
+    chunk = max(1, CULLED_CHUNK_POINTS // points)
+    for start in range(0, len(blocks), chunk):
+        index = [
+            np.clip(
+                blocks[start : start + chunk, axis, None] * block_cells + offsets[axis],
+                0,
+                len(axes[axis]) - 1,
+            )
+            for axis in range(3)
+        ]
+        ix = index[0][:, :, None, None]
+        iy = index[1][:, None, :, None]
+        iz = index[2][:, None, None, :]
+        result = implicit_function(x[ix], y[iy], z[iz])
+        if not isinstance(result, np.ndarray):
+            return result
+        values[ix, iy, iz] = result
+    return values
+
+
+def evaluate_lattice(implicit_function, x, y, z, bound=None):
+    """
+    Evaluates an implicit function on a lattice, bypassing cache and symmetry.
+    """
+    evaluate_grid = getattr(implicit_function, "evaluate_grid", None)
+    if evaluate_grid is not None:
+        values = evaluate_grid(x, y, z)
+    else:
+        values = None
+        if bound is not None:
+            values = evaluate_culled(implicit_function, bound, x, y, z)
+        if values is None:
+            values = evaluate_parallel(implicit_function, x, y, z)
+
+    if values is None:
+        # Evaluate in (z, y, x) order so that the transposed result is a
+        # Fortran-ordered view, which is what VTK expects. The axes are sparse
+        # and broadcast against each other inside the function
+        Z, Y, X = np.meshgrid(z, y, x, indexing="ij", sparse=True)
+        values = implicit_function(X, Y, Z)
+        if isinstance(values, np.ndarray):
+            values = np.broadcast_to(values, (len(z), len(y), len(x))).T
+    return values
+
+
+def is_mirrored(axis):
+    """Checks whether a sampling axis is symmetric about 0."""
+    scale = np.max(np.abs(axis)) if len(axis) else 0.0
+    return len(axis) >= 2 and np.allclose(axis, -axis[::-1], rtol=0, atol=1e-12 * scale)
+
+
+def evaluate_swapped(implicit_function, axes, swap, bound=None):
+    """
+    Evaluates a function symmetric in two axes with identical samples.
+
+    Both axes are split into SYMMETRY_SWAP_BLOCKS blocks; only the blocks on
+    and above the diagonal are evaluated, the others are their transposes.
+    """
+    a, b = swap
+    output = np.empty(
+        [len(axis) for axis in axes], order="F", dtype=np.result_type(*axes, np.float32)
+    )
+    edges = np.unique(np.linspace(0, len(axes[a]), SYMMETRY_SWAP_BLOCKS + 1, dtype=int))
+    blocks = [slice(start, stop) for start, stop in zip(edges[:-1], edges[1:])]
+    for i, first in enumerate(blocks):
+        for second in blocks[i:]:
+            block_axes = list(axes)
+            block_axes[a], block_axes[b] = axes[a][first], axes[b][second]
+            values = evaluate_lattice(implicit_function, *block_axes, bound)
+            if not isinstance(values, np.ndarray):
+                return values
+            index = [slice(None)] * 3
+            index[a], index[b] = first, second
+            output[tuple(index)] = values
+            if first != second:
+                index[a], index[b] = second, first
+                output[tuple(index)] = np.swapaxes(values, a, b)
+    return output
+
+
+def evaluate_symmetric(implicit_function, symmetry, x, y, z, bound=None):
+    """
+    Evaluates an implicit function on the fundamental region of a lattice.
+
+    Parameters:
+    -----------
+    implicit_function : callable
+        A function that takes three numpy arrays (x,y,z) and returns scalar values
+    symmetry : tuple
+        (mirrors, swaps): the axes the function is even in and the pairs of
+        axes it is symmetric in
+    x, y, z : numpy arrays
+        1D sampling axes
+    bound : callable or None
+        Interval extension used to cull blocks (see evaluate_culled)
+
+    Returns:
+        the samples as evaluate_lattice would return them, or None if the
+        lattice does not share any of the symmetries
+    """
+    mirrors, swaps = symmetry
+    axes = [x, y, z]
+    mirrored = [axis for axis in mirrors if is_mirrored(axes[axis])]
+    reduced = list(axes)
+    for axis in mirrored:
+        reduced[axis] = axes[axis][len(axes[axis]) // 2 :]
+    swap = next(
+        (
+            (a, b)
+            for a, b in swaps
+            if len(reduced[a]) >= SYMMETRY_SWAP_BLOCKS
+            and np.array_equal(reduced[a], reduced[b])
+        ),
+        None,
+    )
+    if not mirrored and swap is None:
+        return None
+
+    if swap is None:
+        values = evaluate_lattice(implicit_function, *reduced, bound)
+    else:
+        values = evaluate_swapped(implicit_function, reduced, swap, bound)
+    if not isinstance(values, np.ndarray):
+        return values
+
+    # Axes the function does not depend on stay broadcast
+    shape = [len(axis) for axis in axes]
+    values = np.broadcast_to(values, [len(axis) for axis in reduced])
+    flat = [a for a in range(3) if values.strides[a] == 0 and values.shape[a] > 1]
+    values = values[tuple(slice(0, 1) if a in flat else slice(None) for a in range(3))]
+
+    # Write the fundamental region into the upper halves of the mirrored axes,
+    # then reflect the filled part into the lower halves one axis at a time
+    output = np.empty(
+        [1 if a in flat else shape[a] for a in range(3)],
+        order="F",
+        dtype=np.result_type(*axes, np.float32),
+    )
+    region = [slice(None)] * 3
+    for axis in mirrored:
+        region[axis] = slice(len(axes[axis]) // 2, None)
+    output[tuple(region)] = values
+    for axis in mirrored:
+        length = len(axes[axis])
+        target, source = list(region), list(region)
+        target[axis] = slice(0, length // 2)
+        source[axis] = slice(length - 1, length - length // 2 - 1, -1)
+        output[tuple(target)] = output[tuple(source)]
+        region[axis] = slice(None)
+    return np.broadcast_to(output, shape) if flat else output
+
+
+def single_precision_error(implicit_function, bounds):
+    """
+    Estimates the float32 round-off of the level sets of a function in a box.
+
+    Coordinates are rounded relative to their magnitude. Values are rounded
+    relative to the magnitude of the terms they are summed from, which the
+    interval extension of the function bounds (cancelling terms widen it), and
+    a value error moves the level set by that error over the gradient, taken
+    as the variation of the function across the box.
+
+    Parameters:
+    -----------
+    implicit_function : callable
+        Function of x, y, z, optionally carrying a `bound` attribute
+    bounds : tuple
+        (xmin, xmax, ymin, ymax, zmin, zmax) of the box
+
+    Returns:
+        float, the estimated displacement of the level sets in world units
+    """
+    eps = float(np.finfo(np.float32).eps)
+    error = eps * float(np.max(np.abs(bounds)))
+
+    bound = getattr(implicit_function, "bound", None)
+    if bound is None:
+        return error
+    with np.errstate(all="ignore"):
+        lo, hi = bound(*zip(bounds[0::2], bounds[1::2]))
+        lo, hi = float(np.min(lo)), float(np.max(hi))
+    # Unbounded ranges come from poles, where no precision is meaningful
+    if not (np.isfinite(lo) and np.isfinite(hi)) or hi <= lo:
+        return error
+    extent = float(np.linalg.norm(np.subtract(bounds[1::2], bounds[0::2])))
+    return error + eps * max(abs(lo), abs(hi)) * extent / (hi - lo)
+
+
+def field_dtype(implicit_function, x, y, z):
+    """
+    Chooses the precision of the samples of a function on a lattice.
+
+    Returns:
+        np.float32 if the function asks for single precision and its float32
+        round-off stays below FLOAT32_MAX_ERROR sampling cells, else np.float64
+    """
+    if not getattr(implicit_function, "single_precision", False):
+        return np.float64
+    axes = [np.atleast_1d(axis) for axis in (x, y, z)]
+    bounds = tuple(v for axis in axes for v in (float(axis.min()), float(axis.max())))
+    cells = [
+        (bounds[2 * a + 1] - bounds[2 * a]) / (len(axis) - 1)
+        for a, axis in enumerate(axes)
+        if len(axis) > 1
+    ]
+    cell_size = min(cells) if cells else float(np.max(np.abs(bounds))) or 1.0
+    if (
+        single_precision_error(implicit_function, bounds)
+        > FLOAT32_MAX_ERROR * cell_size
+    ):
+        return np.float64
+    return np.float32
+
+
+def evaluate_on_grid(
+    implicit_function, x, y, z, zero_set=False, cache=True, dtype=None
+):
+    """
+    Evaluates an implicit function on the lattice spanned by the axes x, y, z.
+
+    Parameters:
+    -----------
+    implicit_function : callable
+        A function that takes three numpy arrays (x,y,z) and returns scalar values
+    x, y, z : numpy arrays
+        1D sampling axes
+    zero_set : bool
+        Whether only the zero level set of the samples is needed, which allows
+        culling blocks with the function's interval extension (see
+        evaluate_culled)
+    cache : bool
+        Whether to use the field cache; one-off samples such as slabs of a
+        streamed volume would only evict useful entries
+    dtype : numpy dtype or None
+        Precision of the samples, by default chosen by field_dtype; pieces of
+        a larger lattice pass the precision chosen for all of it
+
+    Returns:
+        numpy array of shape (nx, ny, nz) laid out with x varying fastest, or the
+        raw result if the function did not return an array
+    """
+    if dtype is None:
+        dtype = field_dtype(implicit_function, x, y, z)
+    x, y, z = (np.atleast_1d(axis).astype(dtype, copy=False) for axis in (x, y, z))
+    bound = getattr(implicit_function, "bound", None) if zero_set else None
+
+    # Functions with a cache key share results through the field cache
+    cache_key = getattr(implicit_function, "cache_key", None) if cache else None
+    if cache_key is not None:
+        cache_key = (
+            cache_key,
+            lattice_key(x, y, z),
+            bound is not None,
+            np.dtype(dtype).name,
+        )
+        values = FIELD_CACHE.get(cache_key)
+        if values is not None:
+            return values
+
+    values = None
+    symmetry = getattr(implicit_function, "symmetry", None)
+    if symmetry is not None and len(x) * len(y) * len(z) >= SYMMETRY_MIN_SAMPLES:
+        values = evaluate_symmetric(implicit_function, symmetry, x, y, z, bound)
+    if values is None:
+        values = evaluate_lattice(implicit_function, x, y, z, bound)
+
+    # Fields of functions that compute in double precision anyway (e.g. on
+    # other processes) are stored in single precision all the same; broadcast
+    # fields are left as they are rather than expanded
+    if (
+        isinstance(values, np.ndarray)
+        and values.dtype != dtype
+        and 0 not in values.strides
+    ):
+        values = values.astype(dtype)
+
+    if cache_key is not None and isinstance(values, np.ndarray):
+        FIELD_CACHE.put(cache_key, values)
+    return values
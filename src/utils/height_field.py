@@ -0,0 +1,120 @@
+"""
+Triangulation of explicit height fields.
+
+A surface w = g(u, v) over the two other coordinates is sampled on a 2D grid,
+which costs O(n^2) evaluations instead of the O(n^3) of a lattice, and the
+grid is triangulated directly. Triangles are then clipped to the bounds of
+the solved coordinate.
+"""
+
+import numpy as np
+import vtk
+from src.utils.array_bridge import (
+    as_vtk_array,
+    points_from_vtk,
+    triangles_to_vtk,
+)
+
+
+def corner_slices(grid):
+    """Returns the four corners of every cell of a 2D grid, counterclockwise."""
+    return grid[:-1, :-1], grid[1:, :-1], grid[1:, 1:], grid[:-1, 1:]
+
+
+def clip_to_range(polydata, axis, lower, upper):
+    """
+    Clips a mesh to the part where the coordinate along axis is in [lower, upper].
+    """
+    values = points_from_vtk(polydata.GetPoints())[:, axis]
+    polydata.GetPointData().SetScalars(as_vtk_array(values, "height"))
+    output = polydata
+    for value, inside_out in ((lower, False), (upper, True)):
+        clipper = vtk.vtkClipPolyData()
+        clipper.SetInputData(output)
+        clipper.SetValue(value)
+        clipper.SetInsideOut(inside_out)
+        clipper.Update()
+        output = clipper.GetOutput()
+    output.GetPointData().SetScalars(None)
+    return output
+
+
+def create_height_field_polydata(height_function, axis, bounds, samples):
+    """
+    Triangulates the surface w = g(u, v) within bounds.
+
+    Parameters:
+    -----------
+    height_function : callable
+        Function of the two other coordinates (in x, y, z order) returning the
+        solved coordinate
+    axis : int
+        Index of the solved coordinate (0 for x, 1 for y, 2 for z)
+    bounds : tuple
+        (xmin, xmax, ymin, ymax, zmin, zmax) to triangulate and clip to
+    samples : tuple
+        Number of samples along each of the two other coordinates
+
+    Returns:
+        vtkPolyData with the triangles, or None if the surface misses bounds
+    """
+    plane_axes = [a for a in range(3) if a != axis]
+    u, v = (
+        np.linspace(bounds[2 * a], bounds[2 * a + 1], n)
+        for a, n in zip(plane_axes, samples)
+    )
+    U, V = np.meshgrid(u, v, indexing="ij", sparse=True)
+    with np.errstate(all="ignore"):
+        W = np.broadcast_to(height_function(U, V), (len(u), len(v))).astype(float)
+
+    points = np.empty((len(u), len(v), 3))
+    points[..., plane_axes[0]] = U
+    points[..., plane_axes[1]] = V
+    points[..., axis] = W
+    points = points.reshape(-1, 3)
+
+    # Two triangles per grid cell, kept if their corners are defined and they
+    # reach into the bounds; per-corner flags are combined on grid slices
+    lower, upper = bounds[2 * axis], bounds[2 * axis + 1]
+    ids = np.arange(len(u) * len(v)).reshape(len(u), len(v))
+    defined, above, below, ids = (
+        corner_slices(grid) for grid in (np.isfinite(W), W >= lower, W <= upper, ids)
+    )
+    keep, crossing, triangles = [], [], []
+    for triangle in ((0, 1, 2), (0, 2, 3)):
+        reaches = np.ones(W[1:, 1:].shape, dtype=bool)
+        contained = reaches.copy()
+        for flags in (above, below):
+            reaches &= flags[triangle[0]] | flags[triangle[1]] | flags[triangle[2]]
+        for corner in triangle:
+            reaches &= defined[corner]
+            contained &= above[corner] & below[corner]
+        keep.append(reaches.ravel())
+        crossing.append(~contained.ravel())
+        triangles.append(
+            np.stack([ids[corner] for corner in triangle], axis=-1).reshape(-1, 3)
+        )
+
+    keep = np.concatenate(keep)
+    crossing = np.concatenate(crossing)[keep]
+    triangles = np.concatenate(triangles)[keep]
+    if len(triangles) == 0:
+        return None
+    if not np.any(crossing):
+        return triangles_to_vtk(points, triangles)
+
+    # Only the triangles crossing the bounds need to be clipped
+    clipped = clip_to_range(
+        triangles_to_vtk(points, triangles[crossing]), axis, lower, upper
+    )
+    if np.all(crossing):
+        return clipped if clipped.GetNumberOfCells() else None
+    polydata = triangles_to_vtk(points, triangles[~crossing])
+    append = vtk.vtkAppendPolyData()
+    append.AddInputData(polydata)
+    append.AddInputData(clipped)
+    append.Update()
+    polydata = append.GetOutput()
+    if polydata.GetNumberOfCells() == 0:
+        return None
+    return polydata
@@ -0,0 +1,293 @@
+"""
+Iso-surface extraction backends.
+
+Every backend turns a vtkImageData of samples into a triangle mesh at one iso
+value, or at several at once; multi-level meshes carry the level of every
+vertex in a "Levels" point array:
+
+- flying_edges: vtkFlyingEdges3D, a multi-threaded marching cubes variant
+- synchronized_templates: vtkSynchronizedTemplates3D
+- contour: the generic vtkContourFilter, which picks an algorithm for the
+  input type itself
+- surface_nets: vtkSurfaceNets3D on the inside/outside labels of the samples.
+  This dual method places its vertices by constrained smoothing instead of
+  interpolating the samples; it is cheap and already smooth, but only accurate
+  to about half a cell. Requires VTK 9.3 or later.
+
+The interpolating backends output normals computed from the sample gradients
+and are smoothed afterwards by the surface pipeline. All backends orient
+triangles and normals like VTK contours, towards decreasing values.
+
+Instead of being smoothed, a mesh can also be refined with the analytic
+gradient of the function: project_to_level_set moves every vertex onto the
+exact level set with a few Newton steps, which recovers the accuracy of a much
+finer lattice at the cost of evaluating the function at the vertices only.
+set_gradient_normals shades a mesh with the exact normals of the level set,
+so it looks smooth without smoothing the geometry.
+"""
+
+import numpy as np
+import vtk
+import vtk.util.numpy_support as numpy_support  # type: ignore
+from src.core.constants import (
+    ISO_SURFACE_BACKENDS_BY_SPEED,
+    NEWTON_STEPS,
+    NEWTON_MAX_CELLS,
+)
+from src.utils.array_bridge import as_vtk_array, points_from_vtk, points_to_vtk
+
+
+def is_multi_level(iso_value):
+    """Checks whether iso_value is a sequence of several iso values."""
+    return np.ndim(iso_value) > 0 and np.size(iso_value) > 1
+
+
+def run_contour_algorithm(algorithm, image, iso_value):
+    # Several values are contoured in a single pass over the samples, with
+    # the value of each vertex output as its scalar
+    levels = np.atleast_1d(iso_value)
+    algorithm.SetInputData(image)
+    algorithm.SetNumberOfContours(len(levels))
+    for index, level in enumerate(levels):
+        algorithm.SetValue(index, float(level))
+    algorithm.Update()
+    output = algorithm.GetOutput()
+    if len(levels) > 1 and output.GetPointData().GetScalars() is not None:
+        output.GetPointData().GetScalars().SetName("Levels")
+    return output
+
+
+def extract_flying_edges(image, iso_value=0.0, normals=True):
+    contours = vtk.vtkFlyingEdges3D()
+    contours.SetComputeNormals(normals)
+    contours.SetComputeScalars(is_multi_level(iso_value))
+    return run_contour_algorithm(contours, image, iso_value)
+
+
+def extract_synchronized_templates(image, iso_value=0.0, normals=True):
+    contours = vtk.vtkSynchronizedTemplates3D()
+    contours.SetComputeNormals(normals)
+    contours.SetComputeScalars(is_multi_level(iso_value))
+    return run_contour_algorithm(contours, image, iso_value)
+
+
+def extract_contour(image, iso_value=0.0, normals=True):
+    contours = vtk.vtkContourFilter()
+    contours.SetComputeNormals(normals)
+    return run_contour_algorithm(contours, image, iso_value)
+
+
+def extract_surface_nets(image, iso_value=0.0, normals=True):
+    # The labels only separate two regions, so levels are extracted one by one
+    if is_multi_level(iso_value):
+        append = vtk.vtkAppendPolyData()
+        for level in np.atleast_1d(iso_value):
+            output = extract_surface_nets(image, float(level), normals)
+            levels = np.full(output.GetNumberOfPoints(), level, dtype=np.float32)
+            output.GetPointData().SetScalars(as_vtk_array(levels, "Levels"))
+            append.AddInputData(output)
+        append.Update()
+        return append.GetOutput()
+
+    # Label the samples above the iso value, so that the boundary of the
+    # labeled region faces decreasing values; NaN samples are not labeled
+    values = numpy_support.vtk_to_numpy(image.GetPointData().GetScalars())
+    with np.errstate(invalid="ignore"):
+        labels = (values > iso_value).astype(np.uint8)
+    labeled = vtk.vtkImageData()
+    labeled.CopyStructure(image)
+    labeled.GetPointData().SetScalars(as_vtk_array(labels, "labels"))
+
+    nets = vtk.vtkSurfaceNets3D()
+    nets.SetInputData(labeled)
+    nets.SetValue(0, 1)
+    nets.SetBackgroundLabel(0)
+    nets.SetOutputMeshTypeToTriangles()
+    nets.SetOutputStyleToBoundary()
+    if not normals:
+        nets.Update()
+        return nets.GetOutput()
+
+    mesh_normals = vtk.vtkPolyDataNormals()
+    mesh_normals.SetInputConnection(nets.GetOutputPort())
+    mesh_normals.SplittingOff()
+    mesh_normals.Update()
+    return mesh_normals.GetOutput()
+
+
+# name -> (extraction function, whether the mesh should still be smoothed)
+ISO_SURFACE_BACKENDS = {
+    "flying_edges": (extract_flying_edges, True),
+    "synchronized_templates": (extract_synchronized_templates, True),
+    "contour": (extract_contour, True),
+}
+if hasattr(vtk, "vtkSurfaceNets3D"):
+    ISO_SURFACE_BACKENDS["surface_nets"] = (extract_surface_nets, False)
+
+# Backends placing vertices inside the cells instead of on the lattice edges;
+# meshes contoured from separate blocks of samples cannot be welded
+DUAL_BACKENDS = {"surface_nets"}
+
+
+def default_backend():
+    """
+    Returns the fastest available backend that interpolates the samples,
+    following the ranking measured by benchmarks/iso_backends.py.
+    """
+    for name in ISO_SURFACE_BACKENDS_BY_SPEED:
+        if name in ISO_SURFACE_BACKENDS:
+            return name
+    return "contour"
+
+
+def extract_iso_surface(image, iso_value=0.0, backend=None, normals=True):
+    """
+    Extracts an iso-surface from sampled image data.
+
+    Parameters:
+    -----------
+    image : vtk.vtkImageData
+        Samples with point scalars
+    iso_value : float or sequence of floats
+        The value at which to extract the isosurface, or several values to
+        extract in one pass
+    backend : str or None
+        Name of an entry of ISO_SURFACE_BACKENDS, or None for the default
+    normals : bool
+        Whether to compute point normals
+
+    Returns:
+        tuple (polydata, smooth) with the extracted mesh and whether it should
+        still be smoothed
+    """
+    extract, smooth = ISO_SURFACE_BACKENDS[backend or default_backend()]
+    return extract(image, iso_value, normals), smooth
+
+
+def evaluate_at_points(function, points):
+    """
+    Evaluates a function of (x, y, z) at an (n, 3) array of points.
+
+    Returns:
+        numpy array of shape (n,), or (n, k) if the function returns a tuple of
+        k components; constant results are broadcast
+    """
+    values = function(points[:, 0], points[:, 1], points[:, 2])
+    if isinstance(values, tuple):
+        return np.column_stack([np.broadcast_to(v, len(points)) for v in values])
+    return np.broadcast_to(values, len(points))
+
+
+def project_to_level_set(
+    polydata,
+    implicit_function,
+    iso_value=0.0,
+    cell_size=1.0,
+    steps=NEWTON_STEPS,
+    bounds=None,
+):
+    """
+    Moves the vertices of a mesh onto the level set f = iso_value in place.
+
+    Every vertex takes Newton steps p - (f(p) - iso_value) * grad f / |grad f|^2
+    along the analytic gradient. A step is only taken where it reduces
+    |f - iso_value| and keeps the vertex within NEWTON_MAX_CELLS cells of its
+    original position (and within bounds), so vertices near singular points or
+    outside the domain of the function stay where the contouring put them.
+
+    Parameters:
+    -----------
+    polydata : vtk.vtkPolyData
+        Extracted mesh
+    implicit_function : callable
+        Function carrying a `gradient` attribute, a function of (x, y, z)
+        returning the three partial derivatives
+    iso_value : float or numpy array
+        The value of the level set, or one value per vertex for meshes of
+        several levels
+    cell_size : float
+        Diagonal of a sampling cell, the scale of the contouring error
+    steps : int
+        Number of Newton iterations
+    bounds : tuple or None
+        (xmin, xmax, ymin, ymax, zmin, zmax) the vertices must stay in
+
+    Returns:
+        True if the vertices were projected, False if the function has no
+        gradient
+    """
+    gradient = getattr(implicit_function, "gradient", None)
+    if gradient is None or polydata.GetNumberOfPoints() == 0:
+        return False
+
+    original = points_from_vtk(polydata.GetPoints()).astype(float)
+    points = original.copy()
+    max_offset = (NEWTON_MAX_CELLS * cell_size) ** 2
+    with np.errstate(all="ignore"):
+        residual = evaluate_at_points(implicit_function, points) - iso_value
+        for _ in range(steps):
+            g = evaluate_at_points(gradient, points)
+            step = (residual / np.einsum("ij,ij->i", g, g))[:, None] * g
+            candidate = points - step
+            candidate_residual = (
+                evaluate_at_points(implicit_function, candidate) - iso_value
+            )
+            offset = candidate - original
+            # NaN residuals or gradients never compare as improvements
+            accept = (np.abs(candidate_residual) < np.abs(residual)) & (
+                np.einsum("ij,ij->i", offset, offset) <= max_offset
+            )
+            if bounds is not None:
+                accept &= np.all(
+                    (candidate >= bounds[0::2]) & (candidate <= bounds[1::2]), axis=1
+                )
+            if not np.any(accept):
+                break
+            points[accept] = candidate[accept]
+            residual = np.where(accept, candidate_residual, residual)
+
+    polydata.SetPoints(points_to_vtk(points))
+    return True
+
+
+def set_gradient_normals(polydata, implicit_function):
+    """
+    Sets the point normals of a mesh to the normalized analytic gradient.
+
+    The normals point towards decreasing values, like those of VTK contours.
+    Vertices where the gradient vanishes or is undefined get the normals of
+    the mesh instead.
+
+    Parameters:
+    -----------
+    polydata : vtk.vtkPolyData
+        Extracted mesh
+    implicit_function : callable
+        Function carrying a `gradient` attribute (see project_to_level_set)
+
+    Returns:
+        True if the normals were set, False if the function has no gradient
+    """
+    gradient = getattr(implicit_function, "gradient", None)
+    if gradient is None or polydata.GetNumberOfPoints() == 0:
+        return False
+
+    points = points_from_vtk(polydata.GetPoints()).astype(float)
+    with np.errstate(all="ignore"):
+        g = evaluate_at_points(gradient, points)
+        normals = -g / np.linalg.norm(g, axis=1)[:, None]
+    degenerate = ~np.all(np.isfinite(normals), axis=1)
+    if np.any(degenerate):
+        mesh_normals = vtk.vtkPolyDataNormals()
+        mesh_normals.SetInputData(polydata)
+        mesh_normals.SplittingOff()
+        mesh_normals.ConsistencyOff()
+        mesh_normals.Update()
+        normals[degenerate] = numpy_support.vtk_to_numpy(
+            mesh_normals.GetOutput().GetPointData().GetNormals()
+        )[degenerate]
+
+    polydata.GetPointData().SetNormals(
+        as_vtk_array(normals.astype(np.float32), "Normals")
+    )
+    return True
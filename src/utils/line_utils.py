@@ -13,6 +13,13 @@ from src.core.constants import (
 )
 import vtk.numpy_interface.dataset_adapter as dsa  # type: ignore
 import vtk.util.numpy_support as numpy_support  # type: ignore
+from src.utils.array_bridge import (
+    points_to_vtk,
+    create_cell_array,
+    create_image_data,
+    structured_grid_from_arrays,
+)
+from src.utils.field_utils import sample_axes, evaluate_on_grid, may_vanish
 
 
 def create_axes(length=AXES_LENGTH, line_width=0.5, font_size=24, cone_radius=0.2):
@@ -94,97 +101,43 @@ def create_axes(length=AXES_LENGTH, line_width=0.5, font_size=24, cone_radius=0.
     return axes
 
 
-def create_plane_points(bounds, k, is_x_plane, resolution):
+def create_plane_contour_polydata(implicit_func, plane_bounds, resolution):
     """
-    Creates points for a vertical plane at x=k or y=k using vectorized operations.
+    Creates VTK polydata for the zero contour of the function on an axis-aligned
+    plane. The plane is sampled as an image, so no coordinate arrays are built.
 
     Parameters:
     -----------
-    bounds : tuple
-        The bounds of the function (xmin, xmax, ymin, ymax, zmin, zmax)
-    k : float
-        The position of the plane
-    is_x_plane : bool
-        True if creating points for x=k plane, False for y=k plane
-    resolution : int
-        Number of points along each dimension
-
-    Returns:
-        numpy array of points
-    """
-    if is_x_plane:
-        y = np.linspace(bounds[2], bounds[3], resolution)
-        z = np.linspace(bounds[4], bounds[5], resolution)
-        Y, Z = np.meshgrid(y, z, indexing="ij")
-        X = np.full_like(Y, k)
-    else:
-        x = np.linspace(bounds[0], bounds[1], resolution)
-        z = np.linspace(bounds[4], bounds[5], resolution)
-        X, Z = np.meshgrid(x, z, indexing="ij")
-        Y = np.full_like(X, k)
-
-    return np.stack([X.ravel(), Y.ravel(), Z.ravel()], axis=1)
-
-
-def evaluate_function_on_points(points, implicit_func):
-    """
-    Vectorized evaluation of the implicit function on given points.
-
-    Parameters:
-    -----------
-    points : numpy array
-        Array of 3D points
     implicit_func : callable
         Function that accepts arrays x, y, z
+    plane_bounds : tuple
+        (xmin, xmax, ymin, ymax, zmin, zmax) with equal min and max on the axis
+        normal to the plane
+    resolution : int
+        Number of points along each in-plane dimension
 
     Returns:
-        numpy array of function values
+        vtkPolyData object, or None if the function could not be evaluated
     """
+    dims = tuple(
+        1 if plane_bounds[2 * axis] == plane_bounds[2 * axis + 1] else resolution
+        for axis in range(3)
+    )
     try:
-        values = implicit_func(points[:, 0], points[:, 1], points[:, 2])
-        return values
+        # Planes the surface provably misses are not sampled at all
+        if not may_vanish(implicit_func, plane_bounds):
+            return None
+        values = evaluate_on_grid(implicit_func, *sample_axes(plane_bounds, dims))
     except Exception as e:
         print(f"Error: {e}")
-        return np.ones(len(points))
-
-
-def create_contour_polydata(points, values, resolution):
-    """
-    Creates VTK polydata for contour lines using structured grid.
-
-    Parameters:
-    -----------
-    points : numpy array
-        Array of 3D points
-    values : numpy array
-        Function values at points
-    resolution : int
-        Grid resolution
-
-    Returns:
-        vtkPolyData object
-    """
-    # Create structured grid
-    grid = vtk.vtkStructuredGrid()
-    grid.SetDimensions(resolution, resolution, 1)  # 2D grid
-
-    if points.size < grid.GetNumberOfPoints() or values.size < grid.GetNumberOfPoints():
-        print("Error: Insufficient points or values")
         return None
-
-    # Set the points
-    vtk_points = vtk.vtkPoints()
-    vtk_points.SetData(numpy_support.numpy_to_vtk(points, deep=True))
-    grid.SetPoints(vtk_points)
-
-    # Set the scalar values
-    vtk_scalars = numpy_support.numpy_to_vtk(values, deep=True)
-    vtk_scalars.SetName("values")
-    grid.GetPointData().SetScalars(vtk_scalars)
+    if not isinstance(values, np.ndarray):
+        return None
 
     # Create and update contour filter
     contour = vtk.vtkContourFilter()
-    contour.SetInputData(grid)
+    image = create_image_data(np.broadcast_to(values, dims), plane_bounds)
+    contour.SetInputData(image)
     contour.SetValue(0, 0.0)
     contour.Update()
 
@@ -233,18 +186,22 @@ def create_func_traces_actor(
     # Create x-plane contours using vectorized operations
     x_values = np.arange(bounds[0], bounds[1] + space, space)
     for x in x_values:
-        points = create_plane_points(bounds, x, True, resolution)
-        values = evaluate_function_on_points(points, implicit_func)
-        contour_data = create_contour_polydata(points, values, resolution)
-        append_filter.AddInputData(contour_data)
+        plane_bounds = (x, x, bounds[2], bounds[3], bounds[4], bounds[5])
+        contour_data = create_plane_contour_polydata(
+            implicit_func, plane_bounds, resolution
+        )
+        if contour_data:
+            append_filter.AddInputData(contour_data)
 
     # Create y-plane contours using vectorized operations
     y_values = np.arange(bounds[2], bounds[3] + space, space)
     for y in y_values:
-        points = create_plane_points(bounds, y, False, resolution)
-        values = evaluate_function_on_points(points, implicit_func)
-        contour_data = create_contour_polydata(points, values, resolution)
-        append_filter.AddInputData(contour_data)
+        plane_bounds = (bounds[0], bounds[1], y, y, bounds[4], bounds[5])
+        contour_data = create_plane_contour_polydata(
+            implicit_func, plane_bounds, resolution
+        )
+        if contour_data:
+            append_filter.AddInputData(contour_data)
 
     append_filter.Update()
 
@@ -283,6 +240,7 @@ def create_parametric_curve_actor(
     opacity=1.0,  # Actor opacity
     dash_spacing=0.0,  # Dash spacing (0 = solid line)
     global_bounds=(X_MIN, X_MAX, Y_MIN, Y_MAX, Z_MIN, Z_MAX),
+    max_resolution=1000,  # Upper bound on the number of samples
 ):
     if thickness == 0 or opacity == 0:
         return None
@@ -297,21 +255,17 @@ def create_parametric_curve_actor(
     curvature_resolution = int(base_resolution * thickness_factor)
 
     # Bound the resolution to prevent extreme values
-    resolution = max(50, min(curvature_resolution, 1000))
+    resolution = max(50, min(curvature_resolution, max_resolution))
 
     # Generate points
     t_min, t_max = t_range
     t_values = np.linspace(t_min, t_max, resolution)
 
-    # Unpack bounds
-    x_min, x_max, y_min, y_max, z_min, z_max = global_bounds
-
-    def is_within_bounds(x, y, z):
-        return x_min <= x <= x_max and y_min <= y <= y_max and z_min <= z <= z_max
-
-    # Create points and cells for the complete curve
-    points = vtk.vtkPoints()
-    lines = vtk.vtkCellArray()
+    # Evaluate the curve and keep only the samples within the global bounds
+    curve_points = evaluate_parametric_curve(parametric_func, t_values)
+    lower = np.array(global_bounds[0::2], dtype=float)
+    upper = np.array(global_bounds[1::2], dtype=float)
+    in_bounds = np.all((curve_points >= lower) & (curve_points <= upper), axis=1)
 
     if dash_spacing > 0:
         # Invert dash spacing logic: larger value = larger gaps
@@ -321,52 +275,33 @@ def create_parametric_curve_actor(
         )  # space grows with dash_spacing
         dash_points = base_dash_points  # keep dash size constant
 
-        # Create dashed line segments
-        current_point = 0
-        while current_point < resolution:
-            # Add a dash segment
-            if current_point + dash_points <= resolution:
-                # Collect points for this dash segment
-                dash_point_ids = []
-                for i in range(dash_points):
-                    idx = current_point + i
-                    x, y, z = parametric_func(t_values[idx])
-                    if is_within_bounds(x, y, z):
-                        point_id = points.InsertNextPoint(x, y, z)
-                        dash_point_ids.append(point_id)
-
-                # Only create line segment if we have at least 2 valid points
-                if len(dash_point_ids) >= 2:
-                    line = vtk.vtkPolyLine()
-                    line.GetPointIds().SetNumberOfIds(len(dash_point_ids))
-                    for i, point_id in enumerate(dash_point_ids):
-                        line.GetPointIds().SetId(i, point_id)
-                    lines.InsertNextCell(line)
-
-                current_point += dash_points + space_points
-            else:
-                break
+        # Label each sample with the dash it belongs to (-1 for gaps)
+        period = dash_points + space_points
+        n_dashes = (resolution - dash_points) // period + 1
+        sample_ids = np.arange(resolution)
+        dash_ids = np.where(
+            (sample_ids % period < dash_points) & (sample_ids // period < n_dashes),
+            sample_ids // period,
+            -1,
+        )
     else:
         # Create continuous line, collecting only valid points
-        valid_point_ids = []
-        for i in range(resolution):
-            x, y, z = parametric_func(t_values[i])
-            if is_within_bounds(x, y, z):
-                point_id = points.InsertNextPoint(x, y, z)
-                valid_point_ids.append(point_id)
-
-        # Only create line if we have at least 2 valid points
-        if len(valid_point_ids) >= 2:
-            line = vtk.vtkPolyLine()
-            line.GetPointIds().SetNumberOfIds(len(valid_point_ids))
-            for i, point_id in enumerate(valid_point_ids):
-                line.GetPointIds().SetId(i, point_id)
-            lines.InsertNextCell(line)
-
-    # Create polydata
+        dash_ids = np.zeros(resolution, dtype=int)
+
+    # Build one polyline per dash from its valid samples
+    keep = in_bounds & (dash_ids >= 0)
+    kept_dash_ids = dash_ids[keep]
+    dash_values, counts = np.unique(kept_dash_ids, return_counts=True)
+    long_enough = np.isin(kept_dash_ids, dash_values[counts >= 2])
+    counts = counts[counts >= 2]
+
     polydata = vtk.vtkPolyData()
-    polydata.SetPoints(points)
-    polydata.SetLines(lines)
+    polydata.SetPoints(points_to_vtk(curve_points[keep][long_enough]))
+    polydata.SetLines(
+        create_cell_array(
+            np.concatenate([[0], np.cumsum(counts)]), np.arange(np.sum(counts))
+        )
+    )
 
     # Create tube filter
     tube_filter = vtk.vtkTubeFilter()
@@ -385,6 +320,30 @@ def create_parametric_curve_actor(
     actor.SetMapper(mapper)
 
     # Configure properties
+    update_curve_actor_appearance(actor, color, thickness, opacity)
+
+    return actor
+
+
+def update_curve_actor_appearance(actor, color, thickness, opacity):
+    """
+    Applies color, tube thickness and opacity to a parametric curve actor in
+    place, without rebuilding its geometry.
+
+    Parameters:
+    -----------
+    actor : vtk.vtkActor
+        Actor created by create_parametric_curve_actor
+    color : tuple
+        RGB values (0-1) for the curve
+    thickness : float
+        Tube thickness
+    opacity : float
+        Opacity value (0-1) for the curve
+    """
+    tube_filter = actor.GetMapper().GetInputConnection(0, 0).GetProducer()
+    tube_filter.SetRadius(thickness / 40)
+
     property = actor.GetProperty()
     property.SetColor(color)
     property.SetOpacity(opacity)
@@ -402,17 +361,75 @@ def create_parametric_curve_actor(
         # Set surface representation
         property.SetRepresentationToSurface()
         # Disable scalar visibility
-        mapper.SetScalarVisibility(False)
+        actor.GetMapper().SetScalarVisibility(False)
         # Set Phong interpolation
         property.SetInterpolationToPhong()
         actor.Modified()
     else:
+        actor.ForceTranslucentOff()
+        property.SetInterpolationToGouraud()
         property.SetAmbient(0.3)
         property.SetDiffuse(0.7)
         property.SetSpecular(0.2)
         property.SetSpecularPower(20)
 
-    return actor
+
+def update_line_actor_appearance(actor, color, thickness, opacity):
+    """
+    Applies color, line width and opacity to a traces or contours actor in
+    place, without rebuilding its geometry.
+
+    Parameters:
+    -----------
+    actor : vtk.vtkActor
+        Line actor to modify
+    color : tuple
+        RGB values (0-1) for the lines
+    thickness : int
+        Width of the lines
+    opacity : float
+        Opacity value (0-1) for the lines
+    """
+    properties = actor.GetProperty()
+    properties.SetColor(color)
+    properties.SetLineWidth(thickness)
+    properties.SetOpacity(opacity)
+
+
+def evaluate_parametric_curve(parametric_func, t_values):
+    """
+    Evaluates a parametric curve on an array of parameter values.
+
+    The curve is evaluated in a single vectorized call. Components that are
+    returned as scalars are broadcast, and if vectorized evaluation fails the
+    curve is evaluated sample by sample instead.
+
+    Parameters:
+    -----------
+    parametric_func : callable
+        Function (t) -> (x, y, z)
+    t_values : numpy array
+        Parameter values
+
+    Returns:
+        numpy array of shape (len(t_values), 3), NaN where undefined
+    """
+    n = len(t_values)
+    try:
+        result = parametric_func(t_values)
+        return np.column_stack(
+            [np.broadcast_to(np.asarray(c, dtype=float), (n,)) for c in result]
+        )
+    except Exception:
+        pass
+
+    points = np.full((n, 3), np.nan)
+    for i, t in enumerate(t_values):
+        try:
+            points[i] = np.asarray(parametric_func(t), dtype=float)
+        except Exception:
+            continue
+    return points
 
 
 def calculate_adaptive_resolution(param_range, trace_spacing):
@@ -486,70 +503,45 @@ def create_curve_polydata_with_clipping(points, global_bounds):
         return None
 
     # Check which points are within bounds
-    in_bounds = np.all(
-        [
-            (points[:, 0] >= global_bounds[0]) & (points[:, 0] <= global_bounds[1]),
-            (points[:, 1] >= global_bounds[2]) & (points[:, 1] <= global_bounds[3]),
-            (points[:, 2] >= global_bounds[4]) & (points[:, 2] <= global_bounds[5]),
-        ],
-        axis=0,
-    )
+    lower = np.array(global_bounds[0::2], dtype=float)
+    upper = np.array(global_bounds[1::2], dtype=float)
+    in_bounds = np.all((points >= lower) & (points <= upper), axis=1)
 
     # Find segments where at least one point is in bounds
-    valid_segments = []
-    for i in range(len(points) - 1):
-        p1_in = in_bounds[i]
-        p2_in = in_bounds[i + 1]
-
-        if p1_in or p2_in:
-            p1 = points[i]
-            p2 = points[i + 1]
-
-            # If both points are in bounds, add segment as is
-            if p1_in and p2_in:
-                valid_segments.append((p1, p2))
-            # If only one point is in bounds, clip the segment
-            else:
-                t_values = []
-                for dim in range(3):
-                    dim_min = global_bounds[2 * dim]
-                    dim_max = global_bounds[2 * dim + 1]
-
-                    if p2[dim] != p1[dim]:
-                        t1 = (dim_min - p1[dim]) / (p2[dim] - p1[dim])
-                        t2 = (dim_max - p1[dim]) / (p2[dim] - p1[dim])
-                        t_values.extend([t for t in [t1, t2] if 0 <= t <= 1])
-
-                if t_values:
-                    t_values = [
-                        0 if p1_in else min(t_values),
-                        1 if p2_in else max(t_values),
-                    ]
-                    clipped_p1 = p1 + t_values[0] * (p2 - p1)
-                    clipped_p2 = p1 + t_values[1] * (p2 - p1)
-                    valid_segments.append((clipped_p1, clipped_p2))
-
-    if not valid_segments:
+    p1, p2 = points[:-1], points[1:]
+    p1_in, p2_in = in_bounds[:-1], in_bounds[1:]
+    delta = p2 - p1
+
+    # Parameters where each segment crosses the bounding planes
+    with np.errstate(divide="ignore", invalid="ignore"):
+        t = np.concatenate([(lower - p1) / delta, (upper - p1) / delta], axis=1)
+    crossing = (t >= 0) & (t <= 1) & np.tile(delta != 0, 2)
+    t_first = np.where(crossing, t, np.inf).min(axis=1)
+    t_last = np.where(crossing, t, -np.inf).max(axis=1)
+
+    # Segments fully inside are kept as is, partial ones are clipped
+    valid = (p1_in & p2_in) | ((p1_in | p2_in) & crossing.any(axis=1))
+    if not np.any(valid):
         return None
 
+    t_start = np.where(p1_in, 0.0, t_first)[valid, np.newaxis]
+    t_end = np.where(p2_in, 1.0, t_last)[valid, np.newaxis]
+    p1, p2, delta = p1[valid], p2[valid], delta[valid]
+    with np.errstate(invalid="ignore"):
+        clipped_p1 = np.where(t_start == 0, p1, p1 + t_start * delta)
+        clipped_p2 = np.where(t_end == 1, p2, p1 + t_end * delta)
+
     # Create polydata from valid segments
+    segment_points = np.stack([clipped_p1, clipped_p2], axis=1).reshape(-1, 3)
+    n_segments = len(segment_points) // 2
+
     polydata = vtk.vtkPolyData()
-    vtk_points = vtk.vtkPoints()
-    lines = vtk.vtkCellArray()
-
-    point_id = 0
-    for p1, p2 in valid_segments:
-        vtk_points.InsertNextPoint(p1)
-        vtk_points.InsertNextPoint(p2)
-
-        line = vtk.vtkLine()
-        line.GetPointIds().SetId(0, point_id)
-        line.GetPointIds().SetId(1, point_id + 1)
-        lines.InsertNextCell(line)
-        point_id += 2
-
-    polydata.SetPoints(vtk_points)
-    polydata.SetLines(lines)
+    polydata.SetPoints(points_to_vtk(segment_points))
+    polydata.SetLines(
+        create_cell_array(
+            np.arange(0, 2 * n_segments + 1, 2), np.arange(2 * n_segments)
+        )
+    )
     return polydata
 
 
@@ -663,32 +655,31 @@ def create_horizontal_contours_actor(
     y = np.linspace(bounds[2], bounds[3], resolution)
     z_levels = np.arange(bounds[4], bounds[5] + space, space)
 
-    # Pre-allocate arrays for efficiency
-    X, Y = np.meshgrid(x, y)
-
-    # Create structured grid for VTK
-    grid = vtk.vtkStructuredGrid()
-    grid.SetDimensions(resolution, resolution, 1)
-
     # Create append filter for combining all contours
     append_filter = vtk.vtkAppendPolyData()
 
     # Process each z-level
     for z_level in z_levels:
-        # Evaluate function on 2D grid at current z-level
-        Z = np.full_like(X, z_level)
-        values = implicit_func(X.ravel(), Y.ravel(), Z.ravel()).reshape(X.shape)
-
-        # Create points for VTK structured grid
-        points = np.stack([X, Y, Z], axis=-1)
-        vtk_points = vtk.vtkPoints()
-        vtk_points.SetData(numpy_support.numpy_to_vtk(points.reshape(-1, 3), deep=True))
-        grid.SetPoints(vtk_points)
+        plane_bounds = (bounds[0], bounds[1], bounds[2], bounds[3], z_level, z_level)
+        if not may_vanish(implicit_func, plane_bounds):
+            continue
 
-        # Set scalar values
-        vtk_scalars = numpy_support.numpy_to_vtk(values.ravel(), deep=True)
-        vtk_scalars.SetName("values")
-        grid.GetPointData().SetScalars(vtk_scalars)
+        # Evaluate function on 2D grid at current z-level
+        values = evaluate_on_grid(implicit_func, x, y, [z_level])
+        if not isinstance(values, np.ndarray):
+            continue
+        values = np.broadcast_to(values, (resolution, resolution, 1))
+
+        # Skip levels outside the domain of the function and levels without
+        # a sign change; the scalar tree cannot handle a degenerate scalar range
+        if not np.isfinite(values).any():
+            continue
+        with np.errstate(invalid="ignore"):
+            if not (np.nanmin(values) < 0 < np.nanmax(values)):
+                continue
+
+        # The plane is an image, so only the values are handed to VTK
+        grid = create_image_data(values, plane_bounds)
 
         # Create contour filter with optimized settings
         contour = vtk.vtkContourFilter()
@@ -751,6 +742,7 @@ def create_parametric_horizontal_contours_actor(
     color=vtk.vtkNamedColors().GetColor3d("charcoal"),
     thickness=2,
     opacity=1.0,
+    resolution=100,
 ):
     """
     Creates a VTK actor for horizontal contour traces of a parametric surface using
@@ -775,6 +767,8 @@ def create_parametric_horizontal_contours_actor(
         Thickness of the contour lines
     opacity : float
         Transparency of the contours (0 = fully transparent, 1 = fully opaque)
+    resolution : int
+        Number of samples along each parameter
 
     Returns:
         vtkActor object or None if invalid parameters
@@ -782,13 +776,19 @@ def create_parametric_horizontal_contours_actor(
     if trace_spacing <= 0 or thickness <= 0 or opacity <= 0:
         return None
 
-    # Create parameter space grid
-    u = np.linspace(u_range[0], u_range[1], 100)
-    v = np.linspace(v_range[0], v_range[1], 100)
-    U, V = np.meshgrid(u, v)
+    # Create parameter space grid as broadcastable axes
+    u = np.linspace(u_range[0], u_range[1], resolution)
+    v = np.linspace(v_range[0], v_range[1], resolution)
+    U, V = np.meshgrid(u, v, sparse=True)
 
     # Pre-evaluate surface points
-    X, Y, Z = parametric_function(U, V)
+    shape = (resolution, resolution)
+    X, Y, Z = (np.broadcast_to(w, shape) for w in parametric_function(U, V))
+
+    # The points are shared by all levels; each level contours z itself
+    grid = structured_grid_from_arrays(
+        np.stack([X, Y, Z], axis=-1).reshape(-1, 3), Z.ravel(), (*shape, 1), "z"
+    )
 
     # Create append filter for combining all contours
     append_filter = vtk.vtkAppendPolyData()
@@ -799,26 +799,10 @@ def create_parametric_horizontal_contours_actor(
     )
 
     for z_level in z_levels:
-        # Create structured grid for VTK
-        grid = vtk.vtkStructuredGrid()
-        grid.SetDimensions(X.shape[0], X.shape[1], 1)
-
-        # Create points at parametric positions
-        points = np.stack([X, Y, Z], axis=-1)
-        vtk_points = vtk.vtkPoints()
-        vtk_points.SetData(numpy_support.numpy_to_vtk(points.reshape(-1, 3), deep=True))
-        grid.SetPoints(vtk_points)
-
-        # Create scalar field as the distance from the z-level
-        values = Z - z_level
-        vtk_scalars = numpy_support.numpy_to_vtk(values.ravel(), deep=True)
-        vtk_scalars.SetName("z_distance")
-        grid.GetPointData().SetScalars(vtk_scalars)
-
         # Create contour filter
         contour = vtk.vtkContourFilter()
         contour.SetInputData(grid)
-        contour.SetValue(0, 0.0)
+        contour.SetValue(0, z_level)
         contour.Update()
 
         # Add valid contours to the append filter
@@ -0,0 +1,563 @@
+"""
+Narrow-band (sparse octree) sampling of implicit surfaces.
+
+A dense lattice spends almost all of its samples far away from the surface.
+Here a coarse lattice is evaluated first and its cells are subdivided
+recursively, level by level, but only where the surface may pass: cells whose
+corner values change sign, or whose smallest |f| is within reach of a local
+gradient estimate times the cell diagonal. The cells left at the last level
+are bricks that are sampled densely and contoured on their own; the brick
+meshes are merged into a single surface. Functions carrying an interval extension
+(a `bound` attribute, see field_utils) also have cells culled before their
+children are evaluated.
+
+With the default settings the effective resolution is up to 16 * 2**2 * 8 =
+512 cells per axis while only a thin shell of bricks around the surface is
+evaluated. Given a sample budget, refinement stops before the shell outgrows
+it, so large surfaces are sampled more coarsely.
+"""
+
+import itertools
+import numpy as np
+import vtk
+import vtk.util.numpy_support as numpy_support  # type: ignore
+from src.core.constants import (
+    NARROW_BAND_COARSE_CELLS,
+    NARROW_BAND_LEVELS,
+    NARROW_BAND_BRICK_CELLS,
+    NARROW_BAND_SAFETY,
+)
+from src.utils.array_bridge import (
+    as_vtk_array,
+    points_to_vtk,
+    points_from_vtk,
+    create_cell_array,
+)
+from src.utils.field_utils import sample_axes, evaluate_on_grid, box_signs
+
+# Number of lattice points evaluated per vectorized call
+CHUNK_POINTS = 2**22
+
+# Distance from a lattice plane below which a vertex is taken to lie on it
+EDGE_TOLERANCE = 1e-5
+
+
+def lattice_cell_activity(values, spacing, safety=NARROW_BAND_SAFETY):
+    """
+    Flags the cells of one or more lattices that may contain the zero level set.
+
+    Parameters:
+    -----------
+    values : numpy array
+        Samples of shape (..., nx + 1, ny + 1, nz + 1) indexed as (x, y, z)
+    spacing : numpy array
+        Cell size along x, y and z
+    safety : float
+        Multiplier of the gradient estimate used for the distance test
+
+    Returns:
+        boolean array of shape (..., nx, ny, nz)
+    """
+    n = [size - 1 for size in values.shape[-3:]]
+    corners = [
+        values[..., a : a + n[0], b : b + n[1], c : c + n[2]]
+        for a, b, c in itertools.product((0, 1), repeat=3)
+    ]
+
+    with np.errstate(invalid="ignore"):
+        # NaN samples are ignored as long as one corner is finite
+        f_min = np.fmin.reduce(corners)
+        f_max = np.fmax.reduce(corners)
+        crossing = (f_min <= 0) & (f_max >= 0)
+
+        # Largest finite difference along the cell edges
+        gradient = np.zeros(f_min.shape)
+        for axis in range(3):
+            edges = np.abs(np.diff(values, axis=axis - 3)) / spacing[axis]
+            shifts = [(0,) if other == axis else (0, 1) for other in range(3)]
+            for shift in itertools.product(*shifts):
+                index = tuple(slice(s, s + n[i]) for i, s in enumerate(shift))
+                gradient = np.fmax(gradient, edges[(Ellipsis,) + index])
+
+        distance = np.fmin(np.abs(f_min), np.abs(f_max))
+        # A zero inside the cell is at most half a diagonal from a corner
+        near = distance <= safety * gradient * np.linalg.norm(spacing) / 2
+    return crossing | near
+
+
+def cull_cells(implicit_function, origin, spacing, cells):
+    """
+    Drops the cells where the function's interval extension excludes zero.
+
+    Parameters:
+    -----------
+    implicit_function : callable
+        Function of broadcastable x, y, z arrays, optionally carrying a `bound`
+        attribute (see field_utils)
+    origin : numpy array
+        Position of lattice index (0, 0, 0)
+    spacing : numpy array
+        Cell size along x, y and z
+    cells : numpy array
+        Integer array of shape (n, 3) with the cell indices
+
+    Returns:
+        the cells that may contain the surface
+    """
+    bound = getattr(implicit_function, "bound", None)
+    if bound is None or len(cells) == 0:
+        return cells
+    lower = origin + cells * spacing
+    signs = box_signs(bound, tuple(lower.T), tuple((lower + spacing).T))
+    return cells[signs == 0]
+
+
+def evaluate_cell_lattices(implicit_function, origin, spacing, cells, points):
+    """
+    Evaluates the function on a small lattice anchored at each cell.
+
+    Parameters:
+    -----------
+    implicit_function : callable
+        Function of broadcastable x, y, z arrays
+    origin : numpy array
+        Position of lattice index (0, 0, 0)
+    spacing : numpy array
+        Lattice spacing along x, y and z
+    cells : numpy array
+        Integer array of shape (n, 3) with the lattice index of each anchor
+    points : int
+        Number of lattice points per axis
+
+    Returns:
+        numpy array of shape (n, points, points, points) indexed as (z, y, x)
+    """
+    offsets = np.arange(points)
+    x, y, z = (
+        origin[axis] + (cells[:, axis, None] + offsets) * spacing[axis]
+        for axis in range(3)
+    )
+    with np.errstate(all="ignore"):
+        values = implicit_function(
+            x[:, None, None, :], y[:, None, :, None], z[:, :, None, None]
+        )
+    shape = (len(cells), points, points, points)
+    return np.ascontiguousarray(np.broadcast_to(values, shape), dtype=float)
+
+
+def fitting_brick_cells(count, max_samples, brick_cells=NARROW_BAND_BRICK_CELLS):
+    """
+    Returns the largest brick edge, up to brick_cells, with which count
+    bricks take at most max_samples samples (all of brick_cells for None).
+    """
+    if max_samples is None:
+        return brick_cells
+    return min(brick_cells, int(np.cbrt(max_samples / max(count, 1)) + 1e-6) - 1)
+
+
+def narrow_band_bricks(
+    implicit_function,
+    bounds,
+    coarse_cells=NARROW_BAND_COARSE_CELLS,
+    levels=NARROW_BAND_LEVELS,
+    max_samples=None,
+    brick_cells=NARROW_BAND_BRICK_CELLS,
+):
+    """
+    Finds the cells of the finest octree level that may contain the surface.
+
+    Parameters:
+    -----------
+    implicit_function : callable
+        Function of broadcastable x, y, z arrays
+    bounds : tuple
+        (xmin, xmax, ymin, ymax, zmin, zmax) defining the volume to sample
+    coarse_cells : int
+        Number of cells per axis of the coarse lattice
+    levels : int
+        Largest number of times active cells are split in eight
+    max_samples : int
+        Approximate number of samples of the bricks made of the cells; a level
+        is only split if its bricks, shrunk to fit, are still finer than those
+        of the level above (None for no limit)
+    brick_cells : int
+        Largest number of cells per brick edge
+
+    Returns:
+        tuple (cells, spacing) with the (n, 3) integer indices of the active
+        cells and their size
+    """
+    origin = np.array(bounds[0::2], dtype=float)
+    spacing = (np.array(bounds[1::2], dtype=float) - origin) / coarse_cells
+
+    # Coarse level: one dense, cacheable lattice
+    values = evaluate_on_grid(
+        implicit_function, *sample_axes(bounds, (coarse_cells + 1,) * 3)
+    )
+    if not isinstance(values, np.ndarray):
+        return np.empty((0, 3), dtype=np.int64), spacing
+    values = np.broadcast_to(values, (coarse_cells + 1,) * 3)
+    cells = np.argwhere(lattice_cell_activity(values, spacing))
+
+    # Finer levels: split the active cells and test their children
+    for _ in range(levels):
+        cells = cull_cells(implicit_function, origin, spacing, cells)
+        child_spacing = spacing / 2
+        chunk = max(1, CHUNK_POINTS // 27)
+        children = []
+        for start in range(0, len(cells), chunk):
+            parents = cells[start : start + chunk]
+            lattice = evaluate_cell_lattices(
+                implicit_function, origin, child_spacing, 2 * parents, 3
+            )
+            # Back to (x, y, z) indexing for the activity test
+            active = lattice_cell_activity(lattice.transpose(0, 3, 2, 1), child_spacing)
+            parent, a, b, c = np.nonzero(active)
+            children.append(2 * parents[parent] + np.stack([a, b, c], axis=1))
+        children = np.concatenate(children) if children else cells[:0]
+        finer = fitting_brick_cells(len(children), max_samples, brick_cells)
+        if 2 * finer <= fitting_brick_cells(len(cells), max_samples, brick_cells):
+            break
+        cells, spacing = children, child_spacing
+    return cull_cells(implicit_function, origin, spacing, cells), spacing
+
+
+def sample_bricks(
+    implicit_function, origin, spacing, bricks, brick_cells, extent, iso_value=0.0
+):
+    """
+    Samples bricks densely, adding neighbours until the surface is closed.
+
+    The activity test can miss a brick that the surface only enters through
+    one of its faces. Such faces show a sign change in the samples of the
+    brick on the other side, so their neighbours are added and sampled too.
+
+    Parameters:
+    -----------
+    implicit_function : callable
+        Function of broadcastable x, y, z arrays
+    origin : numpy array
+        Position of the lattice origin
+    spacing : numpy array
+        Sample spacing along x, y and z
+    bricks : numpy array
+        Integer array of shape (n, 3) with the brick indices
+    brick_cells : int
+        Number of cells per brick edge
+    extent : int
+        Number of bricks per axis
+    iso_value : float
+        Contoured value
+
+    Returns:
+        tuple (bricks, samples) with samples of shape (m, p, p, p) indexed as
+        (z, y, x), where p = brick_cells + 1
+    """
+    points = brick_cells + 1
+    chunk = max(1, CHUNK_POINTS // points**3)
+    all_bricks, all_samples = [], []
+    known = np.ravel_multi_index(bricks.T, (extent,) * 3)
+
+    while len(bricks):
+        samples = np.concatenate(
+            [
+                evaluate_cell_lattices(
+                    implicit_function,
+                    origin,
+                    spacing,
+                    bricks[start : start + chunk] * brick_cells,
+                    points,
+                )
+                for start in range(0, len(bricks), chunk)
+            ]
+        )
+        all_bricks.append(bricks)
+        all_samples.append(samples)
+
+        # Faces crossed by the surface need the brick on their other side
+        neighbours = []
+        for axis in range(3):
+            for side, index in ((-1, 0), (1, -1)):
+                face = np.take(samples, index, axis=3 - axis).reshape(len(bricks), -1)
+                with np.errstate(invalid="ignore"):
+                    crossing = (np.fmin.reduce(face, axis=1) <= iso_value) & (
+                        np.fmax.reduce(face, axis=1) >= iso_value
+                    )
+                shifted = bricks[crossing]
+                shifted[:, axis] += side
+                neighbours.append(shifted)
+        neighbours = np.concatenate(neighbours)
+        neighbours = neighbours[np.all((neighbours >= 0) & (neighbours < extent), 1)]
+        keys = np.unique(np.ravel_multi_index(neighbours.T, (extent,) * 3))
+        keys = keys[~np.isin(keys, known)]
+        known = np.concatenate([known, keys])
+        bricks = np.stack(np.unravel_index(keys, (extent,) * 3), axis=1)
+
+    return np.concatenate(all_bricks), np.concatenate(all_samples)
+
+
+def snap_to_lattice_edges(points, samples, iso_value=0.0, tolerance=EDGE_TOLERANCE):
+    """
+    Recomputes contour vertices on a lattice in double precision.
+
+    Contour filters output single precision points, which cannot resolve
+    positions within a cell far away from the origin. Along x and y the
+    lattice is small and the rounded positions are exact enough to tell which
+    edge a vertex lies on; every other vertex is taken to lie on a z edge. The
+    crossing is interpolated again on the edge, among the nearest ones along
+    that axis, whose samples bracket the iso value closest to the vertex and
+    within the rounding error of it.
+
+    Where the surface passes through a lattice point in a z face of the
+    samples (next to NaN padding), the rounded position cannot tell an edge
+    lying in the face from a z edge leaving it, which the block on the other
+    side does not have. Vertices within the rounding error of such a point
+    are therefore moved onto it, so that both blocks agree on them.
+
+    Parameters:
+    -----------
+    points : numpy array
+        Array of shape (n, 3) with vertices in lattice index coordinates
+    samples : numpy array
+        Lattice values of shape (nz, ny, nx)
+    iso_value : float
+        Contoured value
+    tolerance : float
+        Largest rounding error of the points, in lattice index units
+
+    Returns:
+        numpy array of shape (n, 3) with the exact vertices
+    """
+    points = np.asarray(points, dtype=float)
+    rounded = np.round(points)
+    fraction = np.abs(points - rounded)
+    axis = np.where(
+        fraction[:, 0] > EDGE_TOLERANCE,
+        0,
+        np.where(fraction[:, 1] > EDGE_TOLERANCE, 1, 2),
+    )
+    rows = np.arange(len(points))
+    coordinate = points[rows, axis]
+
+    # Flat sample index of the candidate edge starts and step along the edge
+    nz, ny, nx = samples.shape
+    stride = np.array([1, nx, nx * ny])[axis]
+    size = np.array([nx, ny, nz])[axis]
+    lattice = rounded.astype(np.int64)
+    starts = np.clip(
+        np.floor(coordinate).astype(np.int64)[:, None] + np.array([-1, 0, 1]),
+        0,
+        size[:, None] - 2,
+    )
+    base = (lattice[:, 2] * ny + lattice[:, 1]) * nx + lattice[:, 0]
+    base -= lattice[rows, axis] * stride
+    index = base[:, None] + starts * stride[:, None]
+
+    values = samples.reshape(-1)
+    v0 = values[index]
+    v1 = values[index + stride[:, None]]
+    with np.errstate(all="ignore"):
+        t = (iso_value - v0) / (v1 - v0)
+        position = starts + t
+        distance = np.abs(position - coordinate[:, None])
+        distance[~((t >= 0) & (t <= 1) & (distance <= tolerance))] = np.inf
+    choice = np.argmin(distance, axis=1)
+    found = np.isfinite(distance[rows, choice])
+
+    exact = rounded
+    exact[rows, axis] = np.where(found, position[rows, choice], coordinate)
+
+    # Lattice points in a z face (next to NaN padding) lying on the surface,
+    # that is with an x or y edge in the face crossing the iso value at them
+    node = np.round(exact[rows, axis])
+    near = np.abs(exact[rows, axis] - node) <= tolerance
+    lattice[rows, axis] = node
+    x, y, z = lattice.T
+    index = (z * ny + y) * nx + x
+    inner = near & (z > 0) & (z < nz - 1)
+    near[inner] = np.isnan(values[index[inner] - nx * ny]) | np.isnan(
+        values[index[inner] + nx * ny]
+    )
+    edges = ((-1, x > 0), (1, x < nx - 1), (-nx, y > 0), (nx, y < ny - 1))
+    on_surface = np.zeros(len(points), dtype=bool)
+    for step, valid in edges:
+        valid &= near
+        v0 = values[index[valid]]
+        v1 = values[index[valid] + step]
+        with np.errstate(invalid="ignore"):
+            crossing = np.abs(iso_value - v0) <= EDGE_TOLERANCE * np.abs(v1 - v0)
+        on_surface[valid] |= crossing
+    exact[on_surface] = lattice[on_surface]
+    return exact
+
+
+def contour_stacked_bricks(samples, iso_value=0.0, tolerance=EDGE_TOLERANCE):
+    """
+    Contours bricks stacked along z into a single image.
+
+    Each brick is followed by a layer of NaN samples, so every triangle in the
+    cells between two stacked bricks has a NaN vertex and is dropped.
+
+    Parameters:
+    -----------
+    samples : numpy array
+        Brick samples of shape (n, p, p, p) indexed as (z, y, x)
+    iso_value : float
+        Contoured value
+    tolerance : float
+        Largest rounding error of the contour vertices in the stack (see
+        snap_to_lattice_edges)
+
+    Returns:
+        tuple (points, brick, triangles) with the vertices in the lattice
+        coordinates of their brick, the brick index of every vertex and the
+        (m, 3) vertex indices of the triangles
+    """
+    count, points = len(samples), samples.shape[-1]
+    layers = points + 1
+    padded = np.full((count, layers, points, points), np.nan)
+    padded[:, :points] = samples
+
+    stack = vtk.vtkImageData()
+    stack.SetDimensions(points, points, layers * count)
+    stack.GetPointData().SetScalars(as_vtk_array(padded.ravel(), "values"))
+
+    contours = vtk.vtkFlyingEdges3D()
+    contours.SetInputData(stack)
+    contours.SetValue(0, iso_value)
+    contours.ComputeNormalsOff()
+    contours.ComputeGradientsOff()
+    contours.ComputeScalarsOff()
+    contours.Update()
+
+    output = contours.GetOutput()
+    stacked = np.empty((0, 3))
+    triangles = np.empty((0, 3), dtype=np.int64)
+    if output.GetNumberOfCells():
+        stacked = points_from_vtk(output.GetPoints()).astype(float)
+        triangles = numpy_support.vtk_to_numpy(
+            output.GetPolys().GetConnectivityArray()
+        ).reshape(-1, 3)
+
+    finite = np.all(np.isfinite(stacked), axis=1)
+    triangles = triangles[np.all(finite[triangles], axis=1)]
+
+    # Keep only the vertices of the remaining triangles
+    used = np.zeros(len(stacked), dtype=bool)
+    used[triangles] = True
+    triangles = (np.cumsum(used) - 1)[triangles]
+    stacked = snap_to_lattice_edges(
+        stacked[used], padded.reshape(-1, points, points), iso_value, tolerance
+    )
+
+    brick = np.clip((stacked[:, 2] + 1) // layers, 0, count - 1).astype(np.int64)
+    stacked[:, 2] -= brick * layers
+    return stacked, brick, triangles
+
+
+def create_narrow_band_polydata(
+    implicit_function,
+    bounds,
+    iso_value=0.0,
+    coarse_cells=NARROW_BAND_COARSE_CELLS,
+    levels=NARROW_BAND_LEVELS,
+    brick_cells=NARROW_BAND_BRICK_CELLS,
+    max_samples=None,
+):
+    """
+    Extracts an implicit surface by contouring only the bricks near it.
+
+    The octree is refined only as long as its bricks fit in max_samples, so
+    the resolution adapts to the size of the surface: a small surface gets the
+    full resolution, while one filling the volume stops at a coarser level and
+    with smaller bricks. The bricks the surface crosses are contoured in a few
+    large batches rather than one by one (see contour_stacked_bricks) and
+    moved back to their positions. Vertices shared by neighbouring bricks are
+    welded afterwards.
+
+    Parameters:
+    -----------
+    implicit_function : callable
+        Function of broadcastable x, y, z arrays
+    bounds : tuple
+        (xmin, xmax, ymin, ymax, zmin, zmax) defining the volume to sample
+    iso_value : float
+        The value at which to extract the isosurface
+    coarse_cells, levels, brick_cells : int
+        Octree settings; the effective resolution is at most
+        coarse_cells * 2**levels * brick_cells cells per axis
+    max_samples : int
+        Approximate number of brick samples to evaluate (None for no limit)
+
+    Returns:
+        vtkPolyData with the merged surface, or None if nothing was found or
+        the bricks fitting in max_samples are no finer than a dense lattice of
+        max_samples samples
+    """
+    bricks, brick_spacing = narrow_band_bricks(
+        implicit_function, bounds, coarse_cells, levels, max_samples, brick_cells
+    )
+    if len(bricks) == 0:
+        return None
+    extent = int(np.rint((bounds[1] - bounds[0]) / brick_spacing[0]))
+    brick_cells = max(2, fitting_brick_cells(len(bricks), max_samples, brick_cells))
+    # A surface filling the volume is better served by a dense lattice
+    if max_samples is not None and extent * brick_cells <= np.cbrt(max_samples):
+        return None
+
+    origin = np.array(bounds[0::2], dtype=float)
+    spacing = brick_spacing / brick_cells
+    bricks, samples = sample_bricks(
+        implicit_function,
+        origin,
+        spacing,
+        bricks,
+        brick_cells,
+        extent,
+        iso_value,
+    )
+
+    # Only bricks whose samples straddle the iso value contain triangles
+    with np.errstate(invalid="ignore"):
+        flat = samples.reshape(len(samples), -1)
+        crossed = (np.fmin.reduce(flat, axis=1) <= iso_value) & (
+            np.fmax.reduce(flat, axis=1) >= iso_value
+        )
+    bricks, samples = bricks[crossed], samples[crossed]
+    if len(bricks) == 0:
+        return None
+
+    chunk = max(1, CHUNK_POINTS // (brick_cells + 2) // (brick_cells + 1) ** 2)
+    # Rounding error of the single precision points at the top of a full
+    # stack, the same for every batch so that all bricks snap alike
+    tolerance = max(
+        EDGE_TOLERANCE, float(np.spacing(np.float32(chunk * (brick_cells + 2))))
+    )
+    all_points, all_triangles, offset = [], [], 0
+    for start in range(0, len(bricks), chunk):
+        local, brick, triangles = contour_stacked_bricks(
+            samples[start : start + chunk], iso_value, tolerance
+        )
+        # Move the points from the stack back to their bricks
+        corner = bricks[start : start + chunk][brick] * brick_cells
+        all_points.append(origin + (corner + local) * spacing)
+        all_triangles.append(triangles + offset)
+        offset += len(local)
+
+    triangles = np.concatenate(all_triangles)
+    if len(triangles) == 0:
+        return None
+
+    polydata = vtk.vtkPolyData()
+    polydata.SetPoints(points_to_vtk(np.concatenate(all_points)))
+    polydata.SetPolys(
+        create_cell_array(np.arange(0, 3 * len(triangles) + 1, 3), triangles.ravel())
+    )
+
+    # Weld the vertices shared by neighbouring bricks
+    clean = vtk.vtkStaticCleanPolyData()
+    clean.SetInputData(polydata)
+    clean.ToleranceIsAbsoluteOn()
+    clean.SetAbsoluteTolerance(1e-6 * float(np.min(spacing)))
+    clean.Update()
+    return clean.GetOutput()
@@ -0,0 +1,143 @@
+"""
+Multi-process evaluation of implicit fields.
+
+The NumPy ufunc chains produced by sympy.lambdify run on a single core. Large
+lattices are therefore split into tiles of z layers, which a persistent pool
+of worker processes evaluates directly into a shared-memory output buffer.
+
+Functions opt in with a `kernel_spec` attribute, a tuple (source, names,
+args): the srepr of the expression, the names of its arguments in order, and
+the values of the trailing coefficient arguments. Workers compile each
+expression once and keep the kernel, so later lattices (e.g. after a slider
+move) only ship the coefficient values.
+"""
+
+import os, threading
+import multiprocessing as mp
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import shared_memory
+import numpy as np
+from src.core.constants import (
+    FIELD_WORKERS,
+    PARALLEL_MIN_SAMPLES,
+    PARALLEL_TILES_PER_WORKER,
+)
+
+# Kernels compiled in a worker process, keyed by (source, names)
+KERNELS = dict()
+
+# Worker pools, keyed by their number of processes
+POOLS = dict()
+POOLS_LOCK = threading.Lock()
+
+
+def compile_kernel(source, names):
+    """Compiles an expression from its srepr, reusing earlier compilations."""
+    kernel = KERNELS.get((source, names))
+    if kernel is None:
+        import sympy as sp
+
+        expr = sp.sympify(source)
+        # Reuse the expression's own symbols, which may carry assumptions
+        symbols = {symbol.name: symbol for symbol in expr.free_symbols}
+        args = [symbols.get(name, sp.Symbol(name)) for name in names]
+        kernel = sp.lambdify(args, expr, "numpy", cse=True)
+        KERNELS[(source, names)] = kernel
+    return kernel
+
+
+def evaluate_tile(kernel_spec, buffer_name, x, y, z, start, stop):
+    """
+    Evaluates layers [start, stop) of a lattice into the shared output buffer.
+    Runs in a worker process.
+    """
+    source, names, args = kernel_spec
+    kernel = compile_kernel(source, names)
+
+    # Spawned workers share the resource tracker of the parent, which unlinks
+    # the buffer once all tiles are done
+    buffer = shared_memory.SharedMemory(name=buffer_name)
+    try:
+        output = np.ndarray((len(z), len(y), len(x)), dtype=float, buffer=buffer.buf)
+        Z, Y, X = np.meshgrid(z[start:stop], y, x, indexing="ij", sparse=True)
+        with np.errstate(all="ignore"):
+            output[start:stop] = kernel(X, Y, Z, *args)
+        del output
+    finally:
+        buffer.close()
+
+
+def worker_count(workers=FIELD_WORKERS):
+    """Resolves the number of worker processes, one per core by default."""
+    return workers or os.cpu_count() or 1
+
+
+def get_pool(workers):
+    """Returns the persistent pool with the given number of processes."""
+    with POOLS_LOCK:
+        pool = POOLS.get(workers)
+        if pool is None:
+            # Forking would copy the Qt and VTK state of the parent
+            pool = ProcessPoolExecutor(workers, mp_context=mp.get_context("spawn"))
+            POOLS[workers] = pool
+        return pool
+
+
+def evaluate_parallel(implicit_function, x, y, z, workers=FIELD_WORKERS):
+    """
+    Evaluates an implicit function on a lattice using all cores.
+
+    Parameters:
+    -----------
+    implicit_function : callable
+        Function carrying a `kernel_spec` attribute
+    x, y, z : numpy arrays
+        1D sampling axes
+    workers : int or None
+        Number of worker processes, one per core if None
+
+    Returns:
+        numpy array of shape (nx, ny, nz) laid out with x varying fastest, or
+        None if the lattice is too small, the function cannot be shipped to
+        other processes or the evaluation failed
+    """
+    kernel_spec = getattr(implicit_function, "kernel_spec", None)
+    size = len(x) * len(y) * len(z)
+    if kernel_spec is None or size < PARALLEL_MIN_SAMPLES:
+        return None
+    workers = worker_count(workers)
+    if workers < 2:
+        return None
+
+    pool = get_pool(workers)
+    tiles = np.array_split(np.arange(len(z)), workers * PARALLEL_TILES_PER_WORKER)
+    buffer = shared_memory.SharedMemory(create=True, size=size * 8)
+    futures = []
+    try:
+        futures = [
+            pool.submit(
+                evaluate_tile, kernel_spec, buffer.name, x, y, z, tile[0], tile[-1] + 1
+            )
+            for tile in tiles
+            if len(tile)
+        ]
+        for future in futures:
+            future.result()
+        shape = (len(z), len(y), len(x))
+        values = np.ndarray(shape, dtype=float, buffer=buffer.buf).copy()
+    except Exception as e:
+        for future in futures:
+            future.cancel()
+        if isinstance(e, BrokenProcessPool):
+            # A worker died; start over with a fresh pool next time
+            with POOLS_LOCK:
+                POOLS.pop(workers, None)
+        print(f"Parallel evaluation failed, evaluating serially: {e}")
+        return None
+    finally:
+        buffer.close()
+        buffer.unlink()
+
+    # The (z, y, x) buffer transposes to the Fortran-ordered layout VTK expects
+    return values.T
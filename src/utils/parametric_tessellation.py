@@ -0,0 +1,370 @@
+"""
+Adaptive tessellation of parametric surfaces.
+
+A uniform (u, v) grid fine enough for the tightest bend of a surface wastes
+most of its vertices on the flat parts. Here a coarse grid of cells is
+refined as a quadtree instead: a cell is split in four when the surface at
+its edge midpoints and center deviates from the flat cell by more than a
+chord tolerance, or when the normals of its four children deviate from its
+own by more than an angle. All the cells of one level are tested with a
+single batched evaluation of the function.
+
+Nodes live on the integer lattice of the finest level, so they are shared
+exactly by neighbouring cells. The quadtree is balanced (neighbouring leaves
+differ by at most one level), and leaves with a finer neighbour are fanned
+from their center through the hanging midpoints of their edges, so the
+triangulation has no cracks.
+"""
+
+import numpy as np
+from src.core.constants import (
+    PARAMETRIC_CHORD_TOLERANCE,
+    PARAMETRIC_MAX_NORMAL_ANGLE,
+    PARAMETRIC_MAX_EDGE_RATIO,
+    PARAMETRIC_EXTRA_LEVELS,
+)
+from src.utils.array_bridge import triangles_to_vtk
+
+# Offsets of the corners (even slots) and edge midpoints (odd slots) around a
+# cell of size 2, counterclockwise in (u, v), and of its center
+BOUNDARY_OFFSETS = np.array(
+    [(0, 0), (1, 0), (2, 0), (2, 1), (2, 2), (1, 2), (0, 2), (0, 1)]
+)
+CENTER_OFFSET = np.array((1, 1))
+# Nodes added by splitting a cell
+SPLIT_OFFSETS = np.vstack((BOUNDARY_OFFSETS[1::2], CENTER_OFFSET))
+
+
+class NodeLattice:
+    """
+    Surface points of the nodes of the finest (u, v) lattice evaluated so
+    far, stored under integer keys.
+    """
+
+    def __init__(self, parametric_function, u_range, v_range, size):
+        self.function = parametric_function
+        self.origin = np.array((u_range[0], v_range[0]), dtype=float)
+        self.step = np.array((u_range[1] - u_range[0], v_range[1] - v_range[0])) / size
+        self.size = size
+        self.stride = size + 1
+        # Whether the surface closes up across the ends of each parameter
+        self.periodic = (False, False)
+        self.keys = np.empty(0, dtype=np.int64)
+        self.points = np.empty((0, 3))
+
+    def key(self, nodes):
+        return nodes[..., 0].astype(np.int64) * self.stride + nodes[..., 1]
+
+    def contains(self, keys):
+        index = np.searchsorted(self.keys, keys)
+        found = index < len(self.keys)
+        found[found] = self.keys[index[found]] == keys[found]
+        return found
+
+    def evaluate(self, nodes):
+        """Evaluates the function at the nodes not known yet in one call."""
+        keys = np.unique(self.key(nodes))
+        keys = keys[~self.contains(keys)]
+        if len(keys) == 0:
+            return
+        params = self.origin + np.stack(divmod(keys, self.stride), axis=-1) * self.step
+        with np.errstate(all="ignore"):
+            values = self.function(params[:, 0], params[:, 1])
+        points = np.stack(
+            [np.broadcast_to(w, keys.shape).astype(float) for w in values], axis=1
+        )
+
+        keys = np.concatenate((self.keys, keys))
+        order = np.argsort(keys)
+        self.keys = keys[order]
+        self.points = np.concatenate((self.points, points))[order]
+
+    def corners(self, cells):
+        """
+        Returns the sorted keys of the corners of the cells, with the corners
+        on the ends of a periodic parameter repeated on the opposite end.
+        """
+        nodes = cell_nodes(cells, BOUNDARY_OFFSETS[0::2]).reshape(-1, 2)
+        for axis in np.flatnonzero(self.periodic):
+            for end, opposite in ((0, self.size), (self.size, 0)):
+                wrapped = nodes[nodes[:, axis] == end]
+                wrapped[:, axis] = opposite
+                nodes = np.concatenate((nodes, wrapped))
+        return np.unique(self.key(nodes))
+
+    def index(self, nodes):
+        return np.searchsorted(self.keys, self.key(nodes))
+
+    def __getitem__(self, nodes):
+        return self.points[self.index(nodes)]
+
+
+def cell_nodes(cells, offsets):
+    """
+    Returns the nodes at offsets (in half cells) of (n, 3) cells (i, j, size).
+    """
+    return cells[:, None, :2] + offsets * cells[:, None, 2:] // 2
+
+
+def needs_refinement(lattice, cells, tolerance, max_angle, inside):
+    """Tells which cells the surface deviates too much from."""
+    boundary = lattice[cell_nodes(cells, BOUNDARY_OFFSETS)]
+    center = lattice[cell_nodes(cells, CENTER_OFFSET[None])][:, 0]
+    corners = boundary[:, 0::2]
+    midpoints = boundary[:, 1::2]
+
+    with np.errstate(all="ignore"):
+        # Distance of the surface to the chords of the edges and to the
+        # bilinear patch at the center
+        chords = (corners + np.roll(corners, -1, axis=1)) / 2
+        error = np.maximum(
+            np.linalg.norm(midpoints - chords, axis=-1).max(axis=1),
+            np.linalg.norm(center - corners.mean(axis=1), axis=-1),
+        )
+        refine = error > tolerance
+
+        # Normals of the children, from their diagonals, against the normal
+        # of the cell
+        normal = np.cross(corners[:, 2] - corners[:, 0], corners[:, 3] - corners[:, 1])
+        normal /= np.linalg.norm(normal, axis=-1, keepdims=True)
+        for child in range(4):
+            first = boundary[:, 2 * child]
+            before = boundary[:, (2 * child - 1) % 8]
+            after = boundary[:, 2 * child + 1]
+            child_normal = np.cross(center - first, before - after)
+            cosine = np.sum(normal * child_normal, axis=-1) / np.linalg.norm(
+                child_normal, axis=-1
+            )
+            refine |= cosine < np.cos(max_angle)
+
+    # Cells crossing the edge of the domain or of the bounds are refined to
+    # follow it
+    samples = np.concatenate((inside(boundary), inside(center)[:, None]), axis=1)
+    refine |= samples.any(axis=1) & ~samples.all(axis=1)
+    return refine
+
+
+def split_cells(cells):
+    """Returns the four children of every cell."""
+    half = cells[:, 2:] // 2
+    children = np.repeat(cells, 4, axis=0)
+    children[:, 0] += np.tile((0, 1, 1, 0), len(cells)) * np.repeat(half[:, 0], 4)
+    children[:, 1] += np.tile((0, 0, 1, 1), len(cells)) * np.repeat(half[:, 0], 4)
+    children[:, 2] = np.repeat(half[:, 0], 4)
+    return children
+
+
+def balance(lattice, leaves):
+    """
+    Splits leaves until neighbouring leaves differ by at most one level.
+
+    A leaf has a neighbour more than one level finer exactly when the corners
+    of the leaves include a quarter point of one of its edges.
+    """
+    quarters = np.array(
+        [(1, 0), (3, 0), (4, 1), (4, 3), (3, 4), (1, 4), (0, 3), (0, 1)]
+    )
+    while True:
+        corners = lattice.corners(leaves)
+        coarse = leaves[:, 2] >= 4
+        nodes = leaves[coarse, None, :2] + quarters * (leaves[coarse, None, 2:] // 4)
+        keys = lattice.key(nodes)
+        index = np.minimum(np.searchsorted(corners, keys), len(corners) - 1)
+        split = np.zeros(len(leaves), dtype=bool)
+        split[coarse] = (corners[index] == keys).any(axis=1)
+        if not split.any():
+            return leaves
+        children = split_cells(leaves[split])
+        lattice.evaluate(cell_nodes(children, BOUNDARY_OFFSETS[0::2]))
+        leaves = np.concatenate((leaves[~split], children))
+
+
+def triangulate(lattice, leaves):
+    """
+    Triangulates balanced leaves without cracks.
+
+    Leaves without hanging nodes are split along their shorter diagonal; the
+    others are fanned from their center.
+
+    Returns:
+        (m, 3) array of lattice point indices
+    """
+    corners = lattice.corners(leaves)
+    nodes = cell_nodes(leaves, BOUNDARY_OFFSETS)
+    keys = lattice.key(nodes)
+    index = np.minimum(np.searchsorted(corners, keys), len(corners) - 1)
+    present = corners[index] == keys
+    present[:, 0::2] = True
+    # A leaf of the finest level cannot have a finer neighbour
+    present[leaves[:, 2] < 2, 1::2] = False
+    hanging = present[:, 1::2].any(axis=1)
+    fans = leaves[hanging]
+    centers = cell_nodes(fans, CENTER_OFFSET[None])[:, 0]
+
+    # Evaluating nodes moves the known points around, so everything is
+    # evaluated before indexing; midpoints on a periodic end may only be known
+    # on the opposite end
+    lattice.evaluate(np.concatenate((nodes[present], centers)))
+
+    # Two triangles per plain leaf
+    plain = lattice.index(nodes[~hanging][:, 0::2])
+    points = lattice.points[plain]
+    with np.errstate(invalid="ignore"):
+        flip = np.linalg.norm(points[:, 3] - points[:, 1], axis=-1) < np.linalg.norm(
+            points[:, 2] - points[:, 0], axis=-1
+        )
+    quads = np.where(flip[:, None], np.roll(plain, -1, axis=1), plain)
+    triangles = [quads[:, [0, 1, 2]], quads[:, [0, 2, 3]]]
+
+    # A fan from the center to every pair of consecutive boundary nodes of the
+    # other leaves
+    center = lattice.index(centers)
+    boundary = lattice.index(nodes[hanging])
+    present = present[hanging]
+    for slot in range(8):
+        # The node after a corner is its midpoint if any, else the next corner
+        after = (slot + 1) % 8
+        if slot % 2:
+            following = boundary[:, after]
+        else:
+            following = np.where(
+                present[:, after], boundary[:, after], boundary[:, (slot + 2) % 8]
+            )
+        keep = present[:, slot]
+        triangles.append(
+            np.stack((center[keep], boundary[keep, slot], following[keep]), axis=1)
+        )
+    return np.concatenate(triangles)
+
+
+def tessellate_parametric(
+    parametric_function,
+    u_range,
+    v_range,
+    bounds,
+    cells=19,
+    levels=3,
+    tolerance=None,
+    max_angle=PARAMETRIC_MAX_NORMAL_ANGLE,
+    max_edge_ratio=PARAMETRIC_MAX_EDGE_RATIO,
+):
+    """
+    Triangulates a parametric surface adaptively.
+
+    Parameters:
+    -----------
+    parametric_function : callable
+        Function that takes arrays (u, v) and returns arrays (x, y, z)
+    u_range, v_range : tuple
+        (min, max) of the parameters
+    bounds : tuple
+        (xmin, xmax, ymin, ymax, zmin, zmax); triangles leaving them are
+        dropped
+    cells : int
+        Cells per parameter of the coarsest grid
+    levels : int
+        Largest number of times a cell is split
+    tolerance : float
+        Largest distance between the surface and its triangles, by default
+        PARAMETRIC_CHORD_TOLERANCE times the diagonal of the bounds
+    max_angle : float
+        Largest angle in degrees between the normals of a cell and its children
+    max_edge_ratio : float
+        Leaves whose longest edge exceeds this ratio times their average edge
+        length span a discontinuity of the parametrization and are dropped
+
+    Returns:
+        tuple (points, triangles) with the (n, 3) surface points and the
+        (m, 3) point indices of the triangles
+    """
+    lower, upper = np.array(bounds[0::2]), np.array(bounds[1::2])
+    if tolerance is None:
+        tolerance = PARAMETRIC_CHORD_TOLERANCE * np.linalg.norm(upper - lower)
+
+    def inside(points):
+        with np.errstate(invalid="ignore"):
+            return np.all((points >= lower) & (points <= upper), axis=-1)
+
+    scale = 2**levels
+    lattice = NodeLattice(parametric_function, u_range, v_range, cells * scale)
+    i, j = np.meshgrid(np.arange(cells), np.arange(cells), indexing="ij")
+    active = np.stack((i.ravel(), j.ravel(), np.zeros(i.size, dtype=int)), axis=1)
+    active = active * (scale, scale, 0) + (0, 0, scale)
+    lattice.evaluate(cell_nodes(active, BOUNDARY_OFFSETS[0::2]))
+
+    # Parameters along which the surface closes up, such as the longitude of
+    # a sphere, share the hanging nodes of both ends
+    ends = np.arange(cells + 1) * scale
+    first, last = np.zeros_like(ends), np.full_like(ends, lattice.size)
+
+    def closes_up(start, end):
+        gap = lattice[np.stack(start, axis=-1)] - lattice[np.stack(end, axis=-1)]
+        with np.errstate(invalid="ignore"):
+            return bool(np.all(np.linalg.norm(gap, axis=-1) <= 1e-3 * tolerance))
+
+    lattice.periodic = (
+        closes_up((first, ends), (last, ends)),
+        closes_up((ends, first), (ends, last)),
+    )
+
+    # One batched evaluation per level, for the nodes of all the tested cells
+    leaves = []
+    for _ in range(levels):
+        lattice.evaluate(cell_nodes(active, SPLIT_OFFSETS))
+        refine = needs_refinement(
+            lattice, active, tolerance, np.radians(max_angle), inside
+        )
+        leaves.append(active[~refine])
+        active = split_cells(active[refine])
+        if len(active) == 0:
+            break
+    leaves.append(active)
+    leaves = balance(lattice, np.concatenate(leaves))
+
+    # Drop the leaves spanning discontinuities
+    corners = lattice[cell_nodes(leaves, BOUNDARY_OFFSETS[0::2])]
+    with np.errstate(all="ignore"):
+        lengths = np.linalg.norm(corners - np.roll(corners, -1, axis=1), axis=-1)
+        continuous = lengths.max(axis=1) < max_edge_ratio * lengths.mean(axis=1)
+    if not continuous.any():
+        return lattice.points, np.empty((0, 3), dtype=np.int64)
+    triangles = triangulate(lattice, leaves[continuous])
+
+    # Keep the triangles inside the bounds
+    triangles = triangles[inside(lattice.points)[triangles].all(axis=1)]
+    return lattice.points, triangles
+
+
+def create_parametric_polydata(
+    parametric_function, u_range, v_range, bounds, min_samples=20, max_samples=100
+):
+    """
+    Triangulates a parametric surface adaptively at the resolution of a
+    uniform grid.
+
+    Parameters:
+    -----------
+    parametric_function : callable
+        Function that takes arrays (u, v) and returns arrays (x, y, z)
+    u_range, v_range : tuple
+        (min, max) of the parameters
+    bounds : tuple
+        (xmin, xmax, ymin, ymax, zmin, zmax) to clip the surface to
+    min_samples : int
+        Samples per parameter of the coarsest grid
+    max_samples : int
+        Samples per parameter of the uniform grid the refinement matches;
+        cells where the surface bends the most are refined
+        PARAMETRIC_EXTRA_LEVELS levels further
+
+    Returns:
+        vtkPolyData with the triangles inside the bounds
+    """
+    cells = max(min_samples - 1, 1)
+    levels = PARAMETRIC_EXTRA_LEVELS + max(
+        0, int(np.ceil(np.log2(max(max_samples - 1, 1) / cells)))
+    )
+    points, triangles = tessellate_parametric(
+        parametric_function, u_range, v_range, bounds, cells, levels
+    )
+    return triangles_to_vtk(points, triangles)
@@ -0,0 +1,170 @@
+"""
+Slab-streamed contouring of implicit surfaces.
+
+Sampling a whole lattice at once needs memory proportional to its volume. Here
+the lattice is evaluated in slabs of z layers, each overlapping the previous
+one by a single layer. Every slab is contoured as soon as it is sampled and
+released before the next one, so peak memory is one slab (plus the surface
+itself) whatever the lattice size.
+
+Slabs are contoured in lattice index coordinates. Vertices on the layer shared
+by two slabs are interpolated from the same samples at the same integer
+positions, so both slabs produce them bit for bit and they can be merged
+exactly.
+"""
+
+import numpy as np
+import vtk
+import vtk.util.numpy_support as numpy_support  # type: ignore
+from src.core.constants import SLAB_MAX_SAMPLES
+from src.utils.array_bridge import (
+    create_image_data,
+    points_to_vtk,
+    points_from_vtk,
+    create_cell_array,
+)
+from src.utils.field_utils import (
+    sample_axes,
+    evaluate_on_grid,
+    field_dtype,
+    may_vanish,
+)
+from src.utils.iso_surface import extract_iso_surface
+
+
+def layer_keys(points):
+    """
+    Packs the single precision (x, y) coordinates of points into sortable keys.
+    """
+    xy = np.ascontiguousarray(points[:, :2], dtype=np.float32)
+    return xy.view(np.uint64).ravel()
+
+
+def contour_slab(values, first_layer, iso_value=0.0, backend=None):
+    """
+    Contours one slab of samples in lattice index coordinates.
+
+    Parameters:
+    -----------
+    values : numpy array
+        Samples of shape (nx, ny, layers)
+    first_layer : int
+        Lattice index of the first layer of the slab
+    iso_value : float
+        Contoured value
+    backend : str or None
+        Name of an entry of ISO_SURFACE_BACKENDS, or None for the default
+
+    Returns:
+        tuple (points, triangles) with the single precision vertices and the
+        (m, 3) vertex indices of the triangles
+    """
+    nx, ny, layers = values.shape
+    index_bounds = (0, nx - 1, 0, ny - 1, first_layer, first_layer + layers - 1)
+
+    output, _ = extract_iso_surface(
+        create_image_data(values, index_bounds), iso_value, backend, normals=False
+    )
+    if output.GetNumberOfCells() == 0:
+        return np.empty((0, 3), dtype=np.float32), np.empty((0, 3), dtype=np.int64)
+    triangles = numpy_support.vtk_to_numpy(output.GetPolys().GetConnectivityArray())
+    return points_from_vtk(output.GetPoints()), triangles.reshape(-1, 3)
+
+
+def create_slab_polydata(
+    implicit_function,
+    bounds,
+    sample_dims,
+    iso_value=0.0,
+    max_samples=SLAB_MAX_SAMPLES,
+    backend=None,
+):
+    """
+    Extracts an implicit surface slab by slab with bounded memory.
+
+    Parameters:
+    -----------
+    implicit_function : callable
+        A function that takes three numpy arrays (x,y,z) and returns scalar values
+    bounds : tuple
+        (xmin, xmax, ymin, ymax, zmin, zmax) defining the volume to sample
+    sample_dims : tuple
+        Number of samples in each dimension (nx, ny, nz)
+    iso_value : float
+        The value at which to extract the isosurface
+    max_samples : int
+        Number of samples per slab; each slab has at least two layers
+    backend : str or None
+        Name of an entry of ISO_SURFACE_BACKENDS, or None for the default
+
+    Returns:
+        vtkPolyData with the stitched surface, or None if nothing was found
+    """
+    x, y, z = sample_axes(bounds, sample_dims)
+    layers = max(2, max_samples // (len(x) * len(y)))
+    # Slabs share the precision chosen for the whole lattice
+    dtype = field_dtype(implicit_function, x, y, z)
+
+    all_points, all_triangles, count = [], [], 0
+    # Keys and ids of the vertices on the last layer of the previous slab
+    shared_keys, shared_ids = np.empty(0, dtype=np.uint64), np.empty(0, np.int64)
+    for first in range(0, max(len(z) - 1, 1), layers - 1):
+        last = min(first + layers - 1, len(z) - 1)
+        slab_bounds = (bounds[0], bounds[1], bounds[2], bounds[3], z[first], z[last])
+        if not may_vanish(implicit_function, slab_bounds):
+            shared_keys, shared_ids = shared_keys[:0], shared_ids[:0]
+            continue
+
+        values = evaluate_on_grid(
+            implicit_function,
+            x,
+            y,
+            z[first : last + 1],
+            zero_set=iso_value == 0,
+            cache=False,
+            dtype=dtype,
+        )
+        if not isinstance(values, np.ndarray):
+            return None
+        values = np.broadcast_to(values, (len(x), len(y), last - first + 1))
+        points, triangles = contour_slab(values, first, iso_value, backend)
+        del values
+
+        # Vertices on the first layer were already output by the previous slab
+        ids = np.full(len(points), -1, dtype=np.int64)
+        on_first = np.flatnonzero(points[:, 2] == first)
+        if len(shared_keys) and len(on_first):
+            keys = layer_keys(points[on_first])
+            position = np.minimum(
+                np.searchsorted(shared_keys, keys), len(shared_keys) - 1
+            )
+            found = shared_keys[position] == keys
+            ids[on_first[found]] = shared_ids[position[found]]
+
+        new = ids < 0
+        ids[new] = count + np.arange(np.count_nonzero(new))
+        count += np.count_nonzero(new)
+        all_points.append(points[new])
+        all_triangles.append(ids[triangles])
+
+        on_last = np.flatnonzero(points[:, 2] == last)
+        keys = layer_keys(points[on_last])
+        order = np.argsort(keys)
+        shared_keys, shared_ids = keys[order], ids[on_last][order]
+
+    if count == 0:
+        return None
+
+    # Back from lattice indices to world coordinates
+    origin = np.array(bounds[0::2], dtype=float)
+    spacing = np.array(
+        [(axis[-1] - axis[0]) / max(len(axis) - 1, 1) for axis in (x, y, z)]
+    )
+    triangles = np.concatenate(all_triangles)
+
+    polydata = vtk.vtkPolyData()
+    polydata.SetPoints(points_to_vtk(origin + np.concatenate(all_points) * spacing))
+    polydata.SetPolys(
+        create_cell_array(np.arange(0, 3 * len(triangles) + 1, 3), triangles.ravel())
+    )
+    return polydata
@@ -1,7 +1,39 @@
 import sympy as sp
 import numpy as np
 import vtk
-from src.core.constants import COLORS, X_MIN, X_MAX, Y_MIN, Y_MAX, Z_MIN, Z_MAX
+import vtk.util.numpy_support as numpy_support  # type: ignore
+from src.core.constants import (
+    COLORS,
+    X_MIN,
+    X_MAX,
+    Y_MIN,
+    Y_MAX,
+    Z_MIN,
+    Z_MAX,
+    STREAMING_MIN_SAMPLES,
+    DECIMATION_BOUNDARY_WEIGHT,
+)
+from src.utils.array_bridge import (
+    create_image_data,
+    colors_to_vtk,
+    create_cell_array,
+    points_from_vtk,
+    points_to_vtk,
+    set_points_dtype,
+)
+from src.utils.field_utils import sample_axes, evaluate_on_grid, field_dtype
+from src.utils.iso_surface import (
+    DUAL_BACKENDS,
+    is_multi_level,
+    extract_iso_surface,
+    project_to_level_set,
+    set_gradient_normals,
+)
+from src.utils.height_field import create_height_field_polydata
+from src.utils.narrow_band import create_narrow_band_polydata
+from src.utils.parametric_tessellation import create_parametric_polydata
+from src.utils.slab_contour import create_slab_polydata
+from src.utils.tiled_surface import create_tiled_polydata
 
 
 def create_func_surface_actor(
@@ -9,6 +41,11 @@ def create_func_surface_actor(
     bounds=(X_MIN, X_MAX, Y_MIN, Y_MAX, Z_MIN, Z_MAX),
     sample_dims=(100, 100, 100),
     iso_value=0.0,
+    narrow_band=False,
+    streaming=None,
+    backend=None,
+    project=False,
+    tiled=False,
 ):
     """
     Creates a VTK actor for an implicit surface defined by a function f(x,y,z).
@@ -22,84 +59,362 @@ def create_func_surface_actor(
         (xmin, xmax, ymin, ymax, zmin, zmax) defining the volume to sample
     sample_dims : tuple
         Number of samples in each dimension (nx, ny, nz)
-    iso_value : float
-        The value at which to extract the isosurface
+    iso_value : float or sequence of floats
+        The value at which to extract the isosurface. Several values extract
+        a family of nested level sets from one field in a single pass, on the
+        plain lattice (narrow_band, tiled and streaming only apply to a single
+        level); the level of each vertex is kept in a "Levels" point array
+    narrow_band : bool
+        Spend the samples of sample_dims on a thin band around the surface,
+        at a higher resolution where the surface is small enough (see
+        create_narrow_band_polydata)
+    streaming : bool or None
+        Sample and contour the volume slab by slab, with bounded memory (see
+        create_slab_polydata). By default lattices with more than
+        STREAMING_MIN_SAMPLES samples are streamed
+    backend : str or None
+        Iso-surface extraction backend for sampled volumes, one of
+        ISO_SURFACE_BACKENDS in src.utils.iso_surface, also used by the tiles
+        and slabs. By default the fastest available one. Dual backends such
+        as surface_nets always contour the whole lattice at once
+    project : bool
+        Move the vertices onto the exact level set with Newton steps along the
+        analytic gradient of the function, if it has one (see
+        project_to_level_set)
+    tiled : bool
+        Sample on the global lattice and contour it in cached tiles, so that
+        changing bounds only evaluates the newly covered tiles (see
+        create_tiled_polydata). Takes precedence over streaming
 
     Returns:
     --------
     vtk.vtkActor
         Actor containing the surface representation
     """
-    # Create a structured grid of points
-    x = np.linspace(bounds[0], bounds[1], sample_dims[0])
-    y = np.linspace(bounds[2], bounds[3], sample_dims[1])
-    z = np.linspace(bounds[4], bounds[5], sample_dims[2])
+    if streaming is None:
+        streaming = np.prod(sample_dims) > STREAMING_MIN_SAMPLES
+    multi_level = is_multi_level(iso_value)
+    if multi_level:
+        iso_value = np.asarray(iso_value, dtype=float)
+        narrow_band = tiled = streaming = False
+    else:
+        iso_value = float(np.ravel(iso_value)[0])
+    if backend in DUAL_BACKENDS:
+        # Tiles and slabs are welded on the lattice edges they share
+        tiled = streaming = False
+    smooth = True
+
+    if narrow_band:
+        # The band takes as many samples as the lattice; it gives up (None) on
+        # surfaces too large to be sampled more finely, and on missing ones,
+        # which are then contoured as usual
+        try:
+            contour_output = create_narrow_band_polydata(
+                implicit_function,
+                bounds,
+                iso_value,
+                max_samples=int(np.prod(sample_dims)),
+            )
+        except Exception as e:
+            print(f"Error: {e}")
+            return vtk.vtkActor()
+        narrow_band = contour_output is not None
+
+    if narrow_band:
+        pass  # Contoured above
+    elif tiled:
+        try:
+            contour_output = create_tiled_polydata(
+                implicit_function, bounds, sample_dims, iso_value, backend=backend
+            )
+        except Exception as e:
+            print(f"Error: {e}")
+            return vtk.vtkActor()
+
+        if contour_output is None:
+            return vtk.vtkActor()
+    elif streaming:
+        try:
+            contour_output = create_slab_polydata(
+                implicit_function, bounds, sample_dims, iso_value, backend=backend
+            )
+        except Exception as e:
+            print(f"Error: {e}")
+            return vtk.vtkActor()
+
+        if contour_output is None:
+            return vtk.vtkActor()
+    else:
+        # Create a structured grid of points
+        x, y, z = sample_axes(bounds, sample_dims)
+
+        # Evaluate the implicit function, culling blocks that cannot contain
+        # the surface
+        try:
+            scalars = evaluate_on_grid(
+                implicit_function,
+                x,
+                y,
+                z,
+                zero_set=not multi_level and iso_value == 0,
+            )
+        except Exception as e:
+            print(f"Error: {e}")
+            return vtk.vtkActor()
+
+        if not isinstance(scalars, np.ndarray):
+            return vtk.vtkActor()
+
+        # Hand the field to VTK without copying
+        volume = create_image_data(scalars, bounds)
+
+        # Extract the surface
+        contour_output, smooth = extract_iso_surface(volume, iso_value, backend)
+        if contour_output.GetNumberOfPoints() == 0:
+            return vtk.vtkActor()
+
+    # The narrow band, tiles and slabs are contoured without normals
+    compute_normals = narrow_band or tiled or streaming
+
+    # Functions with an analytic gradient are shaded with the exact normals of
+    # the level set, so the mesh looks smooth without smoothing it; smoothing
+    # would also pull projected vertices off the level set again
+    if hasattr(implicit_function, "gradient"):
+        try:
+            if multi_level:
+                # Every vertex is projected onto its own level
+                iso_value = numpy_support.vtk_to_numpy(
+                    contour_output.GetPointData().GetArray("Levels")
+                ).astype(float)
+            if project:
+                spacing = np.subtract(bounds[1::2], bounds[0::2]) / np.maximum(
+                    np.subtract(sample_dims, 1), 1
+                )
+                project_to_level_set(
+                    contour_output,
+                    implicit_function,
+                    iso_value,
+                    np.linalg.norm(spacing),
+                    bounds=bounds,
+                )
+            set_gradient_normals(contour_output, implicit_function)
+            smooth = compute_normals = False
+        except Exception as e:
+            print(f"Error: {e}")
+            compute_normals = True
 
-    # Create 3D coordinate arrays
-    X, Y, Z = np.meshgrid(x, y, z, indexing="ij")
+    # Optional: Add smoothing for better visual quality
+    if smooth:
+        smoother = vtk.vtkWindowedSincPolyDataFilter()
+        smoother.SetInputData(contour_output)
+        smoother.SetNumberOfIterations(15)
+        smoother.SetFeatureEdgeSmoothing(False)
+        smoother.SetFeatureAngle(120.0)
+        smoother.SetEdgeAngle(90.0)
+        smoother.SetPassBand(0.1)
+        smoother.NonManifoldSmoothingOn()
+        smoother.NormalizeCoordinatesOn()
+        smoother.Update()
+        contour_output = smoother.GetOutput()
+
+    if compute_normals:
+        normals = vtk.vtkPolyDataNormals()
+        normals.SetInputData(contour_output)
+        normals.SplittingOff()
+        normals.Update()
+        contour_output = normals.GetOutput()
+
+    # Vertices are refined in double precision but may be stored in single
+    # precision, like the samples
+    set_points_dtype(
+        contour_output,
+        field_dtype(implicit_function, *sample_axes(bounds, sample_dims)),
+    )
 
-    # Evaluate the implicit function
+    # Create mapper
+    mapper = vtk.vtkPolyDataMapper()
+    mapper.SetInputData(contour_output)
+    mapper.ScalarVisibilityOff()
+
+    # Create actor
+    actor = vtk.vtkActor()
+    actor.SetMapper(mapper)
+
+    return actor
+
+
+def create_height_field_actor(
+    height_function,
+    axis,
+    bounds=(X_MIN, X_MAX, Y_MIN, Y_MAX, Z_MIN, Z_MAX),
+    samples=(400, 400),
+    implicit_function=None,
+):
+    """
+    Creates a VTK actor for an implicit surface solved for one coordinate.
+
+    Parameters:
+    -----------
+    height_function : callable
+        Function of the two other coordinates returning the solved one
+    axis : int
+        Index of the solved coordinate (0 for x, 1 for y, 2 for z)
+    bounds : tuple
+        (xmin, xmax, ymin, ymax, zmin, zmax) defining the volume to show
+    samples : tuple
+        Number of samples along each of the two other coordinates
+    implicit_function : callable
+        The implicit function, whose analytic gradient (if any) shades the
+        surface
+
+    Returns:
+    --------
+    vtk.vtkActor
+        Actor containing the surface representation
+    """
     try:
-        scalars = implicit_function(X, Y, Z)
+        polydata = create_height_field_polydata(height_function, axis, bounds, samples)
     except Exception as e:
         print(f"Error: {e}")
         return vtk.vtkActor()
 
-    if not isinstance(scalars, np.ndarray):
+    if polydata is None:
         return vtk.vtkActor()
 
-    # Create VTK structured points dataset
-    volume = vtk.vtkStructuredPoints()
-    volume.SetDimensions(sample_dims)
-    volume.SetOrigin(bounds[0], bounds[2], bounds[4])
-    volume.SetSpacing(
-        (bounds[1] - bounds[0]) / (sample_dims[0] - 1),
-        (bounds[3] - bounds[2]) / (sample_dims[1] - 1),
-        (bounds[5] - bounds[4]) / (sample_dims[2] - 1),
+    if not set_gradient_normals(polydata, implicit_function):
+        normals = vtk.vtkPolyDataNormals()
+        normals.SetInputData(polydata)
+        normals.SplittingOff()
+        normals.Update()
+        polydata = normals.GetOutput()
+
+    plane_axes = [a for a in range(3) if a != axis]
+    dims = [2] * 3
+    dims[plane_axes[0]], dims[plane_axes[1]] = samples
+    set_points_dtype(
+        polydata, field_dtype(implicit_function, *sample_axes(bounds, dims))
     )
 
-    # Add the scalar values to the dataset
-    scalar_array = vtk.vtkDoubleArray()
-    scalar_array.SetNumberOfComponents(1)
-    scalar_array.SetNumberOfValues(np.prod(sample_dims))
-    for i, val in enumerate(scalars.flatten(order="F")):  # VTK uses Fortran ordering
-        scalar_array.SetValue(i, val)
-    volume.GetPointData().SetScalars(scalar_array)
-
-    # Create the contour filter
-    contours = vtk.vtkContourFilter()
-    contours.SetInputData(volume)
-    contours.SetValue(0, iso_value)
-    contours.Update()
-
-    contour_output = contours.GetOutput()
-    if contour_output.GetNumberOfPoints() == 0:
-        return vtk.vtkActor()
-
-    # Optional: Add smoothing for better visual quality
-    smoother = vtk.vtkWindowedSincPolyDataFilter()
-    smoother.SetInputConnection(contours.GetOutputPort())
-    smoother.SetNumberOfIterations(15)
-    smoother.SetFeatureEdgeSmoothing(False)
-    smoother.SetFeatureAngle(120.0)
-    smoother.SetEdgeAngle(90.0)
-    smoother.SetPassBand(0.1)
-    smoother.NonManifoldSmoothingOn()
-    smoother.NormalizeCoordinatesOn()
-    smoother.Update()
-
-    # Create mapper
     mapper = vtk.vtkPolyDataMapper()
-    mapper.SetInputConnection(smoother.GetOutputPort())
+    mapper.SetInputData(polydata)
     mapper.ScalarVisibilityOff()
 
-    # Create actor
     actor = vtk.vtkActor()
     actor.SetMapper(mapper)
 
     return actor
 
 
+def mesh_topology(polydata):
+    """
+    Counts the holes and non-manifold edges of a triangle mesh.
+
+    Returns:
+        tuple (loops, non_manifold) with the number of connected loops of
+        boundary edges and the number of edges shared by more than two
+        triangles
+    """
+    edges = vtk.vtkFeatureEdges()
+    edges.SetInputData(polydata)
+    edges.BoundaryEdgesOn()
+    edges.NonManifoldEdgesOn()
+    edges.FeatureEdgesOff()
+    edges.ManifoldEdgesOff()
+    edges.ColoringOff()
+    edges.Update()
+    total = edges.GetOutput().GetNumberOfCells()
+
+    edges.NonManifoldEdgesOff()
+    edges.Update()
+    loops = vtk.vtkPolyDataConnectivityFilter()
+    loops.SetInputData(edges.GetOutput())
+    loops.SetExtractionModeToAllRegions()
+    loops.Update()
+    boundary = edges.GetOutput().GetNumberOfCells()
+    return loops.GetNumberOfExtractedRegions(), total - boundary
+
+
+def decimate_surface_actor(actor, triangle_budget, implicit_function=None):
+    """
+    Reduces the mesh of a surface actor to a triangle budget.
+
+    The mesh is simplified by quadric error edge collapses, with boundary
+    edges (such as where the surface meets the bounds) constrained to stay in
+    place. Quadric collapses do not preserve topology, so if they open holes
+    or non-manifold edges the mesh is decimated again with vtkDecimatePro,
+    which preserves the topology and the boundary vertices but may keep
+    more triangles than the budget. Point colors are dropped and must be set
+    again; normals are recomputed if the mesh had any. The "Levels" array of
+    multi-level surfaces is kept.
+
+    Parameters:
+    -----------
+    actor : vtk.vtkActor
+        The VTK actor to modify
+    triangle_budget : int
+        Largest number of triangles to keep; 0 or less keeps the mesh as is
+    implicit_function : callable or None
+        Function whose analytic gradient, if it has one, gives the normals
+
+    Returns:
+        bool, whether the mesh was decimated
+    """
+    mapper = actor.GetMapper()
+    polydata = mapper.GetInput() if mapper else None
+    if polydata is None or triangle_budget <= 0:
+        return False
+    if polydata.GetNumberOfCells() <= triangle_budget:
+        return False
+    has_normals = polydata.GetPointData().GetNormals() is not None
+    has_levels = polydata.GetPointData().GetArray("Levels") is not None
+
+    triangles = vtk.vtkTriangleFilter()
+    triangles.SetInputData(polydata)
+    triangles.PassVertsOff()
+    triangles.PassLinesOff()
+    triangles.Update()
+    polydata = triangles.GetOutput()
+    if polydata.GetNumberOfCells() <= triangle_budget:
+        return False
+
+    decimate = vtk.vtkQuadricDecimation()
+    decimate.SetInputData(polydata)
+    if has_levels:
+        # Levels are constant on every connected sheet, so carrying them as an
+        # attribute adds no error and only changes them by round-off
+        polydata.GetPointData().SetActiveScalars("Levels")
+        decimate.AttributeErrorMetricOn()
+        for attribute in ("Normals", "Vectors", "TCoords", "Tensors"):
+            getattr(decimate, f"{attribute}AttributeOff")()
+    reduction = 1 - triangle_budget / polydata.GetNumberOfCells()
+    decimate.SetTargetReduction(reduction)
+    decimate.VolumePreservationOn()
+    decimate.SetBoundaryWeightFactor(DECIMATION_BOUNDARY_WEIGHT)
+    decimate.Update()
+
+    loops, non_manifold = mesh_topology(polydata)
+    decimated_loops, decimated_non_manifold = mesh_topology(decimate.GetOutput())
+    if decimated_loops > loops or decimated_non_manifold > non_manifold:
+        decimate = vtk.vtkDecimatePro()
+        decimate.SetInputData(polydata)
+        decimate.SetTargetReduction(reduction)
+        decimate.PreserveTopologyOn()
+        decimate.BoundaryVertexDeletionOff()
+        decimate.SplittingOff()
+        decimate.Update()
+    polydata = decimate.GetOutput()
+
+    if has_normals and not set_gradient_normals(polydata, implicit_function):
+        normals = vtk.vtkPolyDataNormals()
+        normals.SetInputData(polydata)
+        normals.SplittingOff()
+        normals.Update()
+        polydata = normals.GetOutput()
+
+    mapper.SetInputData(polydata)
+    return True
+
+
 def set_z_gradient_coloring(actor, color1=(1, 0, 0), color2=(0, 0, 1), opacity=1.0):
     """
     Adds a gradient coloring to a VTK actor based on z-coordinate values.
@@ -133,23 +448,10 @@ def set_z_gradient_coloring(actor, color1=(1, 0, 0), color2=(0, 0, 1), opacity=1
     if not points:
         return actor
 
-    # Get number of points
-    n_points = points.GetNumberOfPoints()
-
-    # Create array for colors
-    colors = vtk.vtkUnsignedCharArray()
-    colors.SetNumberOfComponents(4)  # RGBA
-    colors.SetName("Colors")
-
     # Find z-coordinate range
-    z_min = float("inf")
-    z_max = float("-inf")
-
-    for i in range(n_points):
-        point = points.GetPoint(i)
-        z = point[2]
-        z_min = min(z_min, z)
-        z_max = max(z_max, z)
+    z = points_from_vtk(points)[:, 2]
+    z_min = np.min(z) if len(z) else 0.0
+    z_max = np.max(z) if len(z) else 0.0
 
     # Avoid division by zero if surface is flat
     z_range = z_max - z_min
@@ -157,26 +459,16 @@ def set_z_gradient_coloring(actor, color1=(1, 0, 0), color2=(0, 0, 1), opacity=1
         z_range = 1
 
     # Assign colors based on z-coordinate
-    for i in range(n_points):
-        point = points.GetPoint(i)
-        z = point[2]
+    t = ((z - z_min) / z_range)[:, np.newaxis]
+    start = np.array([color1[0], color1[1], color1[2]])
+    end = np.array([color2[0], color2[1], color2[2]])
+    rgba = np.empty((len(z), 4))
+    rgba[:, :3] = (start * (1 - t) + end * t) * 255
+    rgba[:, 3] = opacity * 255
 
-        # Calculate normalized position (0 to 1)
-        t = (z - z_min) / z_range
-
-        # Interpolate colors
-        try:
-            r = int((color1[0] * (1 - t) + color2[0] * t) * 255)
-            g = int((color1[1] * (1 - t) + color2[1] * t) * 255)
-            b = int((color1[2] * (1 - t) + color2[2] * t) * 255)
-            a = int(opacity * 255)
-        except Exception as e:
-            print(f"Error in color interpolation: {e}")
-            # color.InsertNextTuple4 a transparent color
-            colors.InsertNextTuple4(0, 0, 0, 0)
-            continue
-
-        colors.InsertNextTuple4(r, g, b, a)
+    # Points whose color cannot be interpolated are made transparent
+    rgba[~np.isfinite(rgba).all(axis=1)] = 0
+    colors = colors_to_vtk(rgba)
 
     # Add the colors to the polydata
     polydata.GetPointData().SetScalars(colors)
@@ -188,6 +480,99 @@ def set_z_gradient_coloring(actor, color1=(1, 0, 0), color2=(0, 0, 1), opacity=1
     return actor
 
 
+def set_level_coloring(actor, levels, color1=(1, 0, 0), color2=(0, 0, 1), opacity=1.0):
+    """
+    Colors a multi-level surface by level, from color1 for the lowest level to
+    color2 for the highest.
+
+    Parameters:
+    -----------
+    actor : vtk.vtkActor
+        The VTK actor to modify, whose mesh has a "Levels" point array
+    levels : sequence of floats
+        The extracted levels
+    color1 : tuple
+        RGB values (0-1) for the lowest level
+    color2 : tuple
+        RGB values (0-1) for the highest level
+    opacity : float
+        Opacity value (0-1) for the actor
+    """
+    mapper = actor.GetMapper()
+    polydata = mapper.GetInput() if mapper else None
+    if polydata is None or polydata.GetPointData().GetArray("Levels") is None:
+        return set_z_gradient_coloring(actor, color1, color2, opacity)
+
+    # Vertices take the color of the nearest level
+    levels = np.sort(np.asarray(levels, dtype=float))
+    values = numpy_support.vtk_to_numpy(polydata.GetPointData().GetArray("Levels"))
+    index = np.clip(np.searchsorted(levels, values), 1, max(len(levels) - 1, 1))
+    index -= np.abs(values - levels[index - 1]) < np.abs(values - levels[index])
+    t = (index / max(len(levels) - 1, 1))[:, np.newaxis]
+
+    start = np.array([color1[0], color1[1], color1[2]])
+    end = np.array([color2[0], color2[1], color2[2]])
+    rgba = np.empty((len(values), 4))
+    rgba[:, :3] = (start * (1 - t) + end * t) * 255
+    rgba[:, 3] = opacity * 255
+
+    # Setting the colors as scalars would drop the levels, which are needed
+    # to color the surface again
+    polydata.GetPointData().AddArray(colors_to_vtk(rgba))
+    polydata.GetPointData().SetActiveScalars("Colors")
+
+    mapper.SetScalarVisibility(1)
+    mapper.Update()
+
+    return actor
+
+
+def create_grid_quads(points, mask, max_edge_ratio=3.0):
+    """
+    Creates the quads of a sampled parametric surface in one shot.
+
+    A cell of the (u, v) grid becomes a quad if its four corners are valid and
+    its longest edge is below max_edge_ratio times the average edge length,
+    which drops the cells spanning discontinuities of the parametrization.
+
+    Parameters:
+    -----------
+    points : numpy array
+        Array of shape (nu, nv, 3) with the surface point of every grid node
+    mask : numpy array
+        Boolean array of shape (nu, nv) marking the nodes to keep
+    max_edge_ratio : float
+        Largest ratio between the longest and the average edge of a quad
+
+    Returns:
+        vtkPolyData with the kept nodes as points and the quads as polygons
+    """
+    indices = np.full(mask.shape, -1, dtype=np.int64)
+    indices[mask] = np.arange(np.count_nonzero(mask))
+
+    # Corners of every cell, counterclockwise in (u, v)
+    corners = (np.s_[:-1, :-1], np.s_[1:, :-1], np.s_[1:, 1:], np.s_[:-1, 1:])
+    valid = np.logical_and.reduce([mask[corner] for corner in corners])
+    with np.errstate(invalid="ignore", over="ignore"):
+        lengths = np.stack(
+            [
+                np.linalg.norm(points[b] - points[a], axis=-1)
+                for a, b in zip(corners, corners[1:] + corners[:1])
+            ]
+        )
+        valid &= lengths.max(axis=0) < max_edge_ratio * lengths.mean(axis=0)
+    connectivity = np.stack([indices[corner][valid] for corner in corners], axis=1)
+
+    polydata = vtk.vtkPolyData()
+    polydata.SetPoints(points_to_vtk(points[mask]))
+    polydata.SetPolys(
+        create_cell_array(
+            np.arange(0, 4 * len(connectivity) + 1, 4), connectivity.ravel()
+        )
+    )
+    return polydata
+
+
 def create_parametric_func_surface_actor(
     parametric_function,
     u_range=(0, 1),
@@ -198,6 +583,7 @@ def create_parametric_func_surface_actor(
     opacity=1.0,
     min_samples=20,
     max_samples=100,
+    adaptive=False,
 ):
     """
     Creates a VTK actor for a parametric surface with controlled cell connectivity.
@@ -210,7 +596,28 @@ def create_parametric_func_surface_actor(
         opacity: Surface opacity (0 to 1)
         min_samples: Minimum number of samples per dimension
         max_samples: Maximum number of samples per dimension
+        adaptive: Whether to refine a coarse grid where the surface bends
+            instead of sampling a uniform grid (see parametric_tessellation);
+            the uniform grid is used if the refinement fails
     """
+    if adaptive:
+        try:
+            polydata = create_parametric_polydata(
+                parametric_function,
+                u_range,
+                v_range,
+                global_bounds,
+                min_samples,
+                max_samples,
+            )
+        except Exception as e:
+            print(f"Error in adaptive tessellation, using a uniform grid: {e}")
+        else:
+            mapper = vtk.vtkPolyDataMapper()
+            mapper.SetInputData(polydata)
+            actor = vtk.vtkActor()
+            actor.SetMapper(mapper)
+            return set_z_gradient_coloring(actor, color1, color2, opacity)
 
     def estimate_sampling_density(
         func, param_range, other_range, is_u=True, test_samples=100
@@ -219,25 +626,16 @@ def create_parametric_func_surface_actor(
         p = np.linspace(param_range[0], param_range[1], test_samples)
         dp = (param_range[1] - param_range[0]) / (test_samples - 1)
 
-        test_vals_x = np.zeros(test_samples)
-        test_vals_y = np.zeros(test_samples)
-        test_vals_z = np.zeros(test_samples)
-
         other_mid = (other_range[0] + other_range[1]) / 2
 
-        for i, pi in enumerate(p):
-            if is_u:
-                U, V = np.meshgrid([pi], [other_mid])
-            else:
-                U, V = np.meshgrid([other_mid], [pi])
-
-            X, Y, Z = func(U, V)
-            X, Y, Z = np.atleast_1d(X), np.atleast_1d(Y), np.atleast_1d(Z)
-            test_vals_x[i] = X.flatten()[0]
-            test_vals_y[i] = Y.flatten()[0]
-            test_vals_z[i] = Z.flatten()[0]
-
-        test_vals = np.vstack((test_vals_x, test_vals_y, test_vals_z)).T
+        # Evaluate the whole line at once
+        if is_u:
+            test_vals = func(p, np.float64(other_mid))
+        else:
+            test_vals = func(np.float64(other_mid), p)
+        test_vals = np.stack(
+            [np.broadcast_to(w, p.shape).astype(float) for w in test_vals], axis=1
+        )
 
         # Calculate numerical derivatives
         derivatives = np.diff(test_vals, axis=0) / dp
@@ -267,7 +665,7 @@ def create_parametric_func_surface_actor(
     # Create parametric coordinate grids with adaptive sampling
     u = np.linspace(u_range[0], u_range[1], u_samples)
     v = np.linspace(v_range[0], v_range[1], v_samples)
-    U, V = np.meshgrid(u, v, indexing="ij")
+    U, V = np.meshgrid(u, v, indexing="ij", sparse=True)
 
     # Evaluate the parametric function
     try:
@@ -284,7 +682,7 @@ def create_parametric_func_surface_actor(
     Z = np.broadcast_to(Z, target_shape)
 
     # Validate output
-    if not (X.shape == Y.shape == Z.shape == U.shape):
+    if not (X.shape == Y.shape == Z.shape == target_shape):
         raise ValueError(
             "Parametric function must return x, y, z arrays of same shape as input"
         )
@@ -301,82 +699,19 @@ def create_parametric_func_surface_actor(
     )
 
     # Create polydata
-    polydata = vtk.vtkPolyData()
-    points = vtk.vtkPoints()
-    cells = vtk.vtkCellArray()
+    polydata = create_grid_quads(np.stack((X, Y, Z), axis=-1), mask)
 
-    # Create colors array
-    colors = vtk.vtkUnsignedCharArray()
-    colors.SetNumberOfComponents(4)
-    colors.SetName("Colors")
-
-    # Find z range for color mapping
-    z_min = np.min(Z[mask]) if np.any(mask) else np.min(Z)
-    z_max = np.max(Z[mask]) if np.any(mask) else np.max(Z)
+    # Color the points by their z-value
+    z_valid = Z[mask]
+    if len(z_valid) == 0:
+        z_valid = Z
+    z_min, z_max = np.min(z_valid), np.max(z_valid)
     z_range = z_max - z_min if z_max > z_min else 1.0
-
-    # Create point to index mapping
-    point_indices = -np.ones((u_samples, v_samples), dtype=int)
-    current_index = 0
-
-    # First pass: add points and store their indices
-    for i in range(u_samples):
-        for j in range(v_samples):
-            if mask[i, j]:
-                x, y, z = X[i, j], Y[i, j], Z[i, j]
-                points.InsertNextPoint(x, y, z)
-
-                # Calculate color based on z-value
-                t = (z - z_min) / z_range if z_range > 0 else 0.5
-                r = int((color1[0] * (1 - t) + color2[0] * t) * 255)
-                g = int((color1[1] * (1 - t) + color2[1] * t) * 255)
-                b = int((color1[2] * (1 - t) + color2[2] * t) * 255)
-                a = int(opacity * 255)
-                colors.InsertNextTuple4(r, g, b, a)
-
-                point_indices[i, j] = current_index
-                current_index += 1
-
-    # Second pass: create quad cells
-    for i in range(u_samples - 1):
-        for j in range(v_samples - 1):
-            # Get indices for the four corners of the quad
-            idx00 = point_indices[i, j]
-            idx10 = point_indices[i + 1, j]
-            idx01 = point_indices[i, j + 1]
-            idx11 = point_indices[i + 1, j + 1]
-
-            # Only create cell if all points are valid and at least one point is in bounds
-            if idx00 >= 0 and idx10 >= 0 and idx01 >= 0 and idx11 >= 0:
-                # Check if points are within a reasonable distance
-                p00 = np.array([X[i, j], Y[i, j], Z[i, j]])
-                p10 = np.array([X[i + 1, j], Y[i + 1, j], Z[i + 1, j]])
-                p01 = np.array([X[i, j + 1], Y[i, j + 1], Z[i, j + 1]])
-                p11 = np.array([X[i + 1, j + 1], Y[i + 1, j + 1], Z[i + 1, j + 1]])
-
-                # Calculate edge lengths
-                d1 = np.linalg.norm(p10 - p00)
-                d2 = np.linalg.norm(p01 - p00)
-                d3 = np.linalg.norm(p11 - p10)
-                d4 = np.linalg.norm(p11 - p01)
-
-                # Calculate average edge length
-                avg_edge = (d1 + d2 + d3 + d4) / 4
-                max_edge = max(d1, d2, d3, d4)
-
-                # Only create quad if edges are reasonably similar in length
-                if max_edge < 3 * avg_edge:
-                    quad = vtk.vtkQuad()
-                    quad.GetPointIds().SetId(0, idx00)
-                    quad.GetPointIds().SetId(1, idx10)
-                    quad.GetPointIds().SetId(2, idx11)
-                    quad.GetPointIds().SetId(3, idx01)
-                    cells.InsertNextCell(quad)
-
-    # Set the points and cells in the polydata
-    polydata.SetPoints(points)
-    polydata.SetPolys(cells)
-    polydata.GetPointData().SetScalars(colors)
+    t = ((Z[mask] - z_min) / z_range)[:, None]
+    rgba = np.empty((len(t), 4))
+    rgba[:, :3] = (np.asarray(color1) * (1 - t) + np.asarray(color2) * t) * 255
+    rgba[:, 3] = opacity * 255
+    polydata.GetPointData().SetScalars(colors_to_vtk(rgba.astype(np.uint8)))
 
     # Create mapper
     mapper = vtk.vtkPolyDataMapper()
@@ -446,6 +781,27 @@ def create_point_actor(
     return actor
 
 
+def update_point_actor_appearance(actor, color, thickness, opacity):
+    """
+    Applies color, radius and opacity to a point actor in place.
+
+    Parameters:
+    -----------
+    actor : vtk.vtkActor
+        Actor created by create_point_actor
+    color : tuple
+        RGB values (0-1) for the point
+    thickness : float
+        Sphere thickness
+    opacity : float
+        Opacity value (0-1) for the point
+    """
+    sphere = actor.GetMapper().GetInputConnection(0, 0).GetProducer()
+    sphere.SetRadius(thickness / 20)
+    actor.GetProperty().SetColor(color)
+    actor.GetProperty().SetOpacity(opacity)
+
+
 def detect_domain_boundary(
     parametric_function,
     u_range=(0, 1),
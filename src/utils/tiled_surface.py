@@ -0,0 +1,291 @@
+"""
+Tiled contouring of implicit surfaces on a global lattice.
+
+Sampling the box of the scene with a fixed number of samples per axis moves
+every sample whenever the box changes, so nothing can be reused. Here the
+samples lie on a lattice anchored at the origin instead, whose spacing only
+depends on the size of the box up to a power of 2**(1/SURFACE_LATTICE_LEVELS),
+plus the faces of the box itself. The lattice is split into tiles of
+SURFACE_TILE_CELLS cells at fixed positions, each contoured on its own and
+cached in the field cache by the samples it covers. When the box grows or is
+panned, the tiles it already covered are reused and only the newly exposed
+ones (and the tiles cut by the faces of the box) are evaluated and contoured.
+
+Tiles are contoured in their own index coordinates and mapped to world
+coordinates through their sample positions, so vertices on a face shared by
+two tiles are computed from the same numbers in both and can be welded.
+"""
+
+import numpy as np
+import vtk
+from src.core.constants import (
+    SURFACE_LATTICE_LEVELS,
+    SURFACE_TILE_CELLS,
+    STREAMING_MIN_SAMPLES,
+)
+from src.utils.array_bridge import points_to_vtk, create_cell_array
+from src.utils.field_cache import FIELD_CACHE
+from src.utils.field_utils import (
+    evaluate_on_grid,
+    field_dtype,
+    lattice_key,
+    may_vanish,
+)
+from src.utils.iso_surface import default_backend
+from src.utils.slab_contour import contour_slab
+
+
+def lattice_spacing(lower, upper, samples, levels=SURFACE_LATTICE_LEVELS):
+    """
+    Returns the global lattice spacing closest to sampling [lower, upper] with
+    the given number of samples.
+    """
+    spacing = (upper - lower) / max(samples - 1, 1)
+    return 2.0 ** (np.round(levels * np.log2(spacing)) / levels)
+
+
+def lattice_axis(lower, upper, spacing, tile_cells=SURFACE_TILE_CELLS):
+    """
+    Samples [lower, upper] on the global lattice.
+
+    Parameters:
+    -----------
+    lower, upper : float
+        Range of the axis
+    spacing : float
+        Lattice spacing
+    tile_cells : int
+        Lattice cells per tile
+
+    Returns:
+        tuple (samples, breaks) with the lattice points inside the range plus
+        its ends, and the indices of the samples where tiles start and end
+    """
+    tolerance = 1e-9 * spacing
+    first = int(np.ceil((lower - tolerance) / spacing))
+    last = int(np.floor((upper + tolerance) / spacing))
+    index = np.arange(first, last + 1)
+    samples = index * spacing
+    if len(samples) == 0:
+        return np.array([lower, upper], dtype=float), [0, 1]
+
+    # The ends of the range replace lattice points that almost coincide with
+    # them and extend the first and last tiles by one cell otherwise
+    starts = np.flatnonzero(index % tile_cells == 0)
+    if samples[0] - lower > tolerance:
+        samples = np.concatenate(([lower], samples))
+        starts = starts + 1
+    else:
+        samples[0] = lower
+    if upper - samples[-1] > tolerance:
+        samples = np.concatenate((samples, [upper]))
+    else:
+        samples[-1] = upper
+
+    breaks = sorted({0, len(samples) - 1, *starts.tolist()})
+    if len(breaks) == 1:
+        breaks.append(breaks[0])
+    return samples, breaks
+
+
+def local_to_world(points, axes):
+    """
+    Maps vertices in the index coordinates of a tile to world coordinates.
+    Vertices on a sample plane are mapped to its exact position.
+    """
+    world = np.empty(points.shape)
+    for axis, samples in enumerate(axes):
+        position = points[:, axis].astype(float)
+        index = np.minimum(np.floor(position), len(samples) - 1).astype(np.int64)
+        following = samples[np.minimum(index + 1, len(samples) - 1)]
+        world[:, axis] = samples[index] + (position - index) * (
+            following - samples[index]
+        )
+    return world
+
+
+def contour_tile(values, axes, iso_value, backend=None):
+    """
+    Contours the samples of one tile with an iso-surface backend (see
+    ISO_SURFACE_BACKENDS).
+
+    Returns:
+        tuple (points, triangles) with the world coordinates of the vertices
+        and the (m, 3) vertex indices of the triangles
+    """
+    # Most tiles of a box do not reach the surface
+    if np.all(values > iso_value) or np.all(values < iso_value):
+        return np.empty((0, 3)), np.empty((0, 3), dtype=np.int64)
+    points, triangles = contour_slab(values, 0, iso_value, backend)
+    return local_to_world(points, axes), triangles
+
+
+def create_tiled_polydata(
+    implicit_function,
+    bounds,
+    sample_dims,
+    iso_value=0.0,
+    tile_cells=SURFACE_TILE_CELLS,
+    max_samples=STREAMING_MIN_SAMPLES,
+    backend=None,
+):
+    """
+    Extracts an implicit surface tile by tile, reusing cached tiles.
+
+    Parameters:
+    -----------
+    implicit_function : callable
+        A function that takes three numpy arrays (x,y,z) and returns scalar
+        values; tiles are only cached if it has a `cache_key`
+    bounds : tuple
+        (xmin, xmax, ymin, ymax, zmin, zmax) defining the volume to sample
+    sample_dims : tuple
+        Approximate number of samples in each dimension (nx, ny, nz)
+    iso_value : float
+        The value at which to extract the isosurface
+    tile_cells : int
+        Lattice cells per tile
+    max_samples : int
+        Largest number of samples evaluated at once; missing tiles forming a
+        box of at most this many samples are evaluated together
+    backend : str or None
+        Name of an entry of ISO_SURFACE_BACKENDS, or None for the default;
+        tiles are cached per backend
+
+    Returns:
+        vtkPolyData with the welded surface, or None if nothing was found
+    """
+    spacing = tuple(
+        float(lattice_spacing(bounds[2 * axis], bounds[2 * axis + 1], samples))
+        for axis, samples in enumerate(sample_dims)
+    )
+    axes, breaks = zip(
+        *(
+            lattice_axis(
+                bounds[2 * axis], bounds[2 * axis + 1], spacing[axis], tile_cells
+            )
+            for axis in range(3)
+        )
+    )
+
+    def tile_axes(tile):
+        return tuple(
+            axes[axis][breaks[axis][i] : breaks[axis][i + 1] + 1]
+            for axis, i in enumerate(tile)
+        )
+
+    # All tiles share the precision chosen for the whole lattice, so that
+    # their faces match
+    dtype = field_dtype(implicit_function, *axes)
+    cache_key = getattr(implicit_function, "cache_key", None)
+    backend = backend or default_backend()
+
+    def piece_key(tile):
+        return (
+            "surface",
+            cache_key,
+            backend,
+            iso_value,
+            spacing,
+            lattice_key(*tile_axes(tile)),
+            np.dtype(dtype).name,
+        )
+
+    tiles = list(np.ndindex(*(len(b) - 1 for b in breaks)))
+    pieces = {}
+    if cache_key is not None:
+        for tile in tiles:
+            piece = FIELD_CACHE.get(piece_key(tile))
+            if piece is not None:
+                pieces[tile] = piece
+    missing = [tile for tile in tiles if tile not in pieces]
+
+    def store(tile, piece):
+        if cache_key is not None:
+            piece = FIELD_CACHE.put(piece_key(tile), piece)
+        pieces[tile] = piece
+
+    # Missing tiles usually form a box (everything, or the slab exposed by
+    # growing the box along one axis), which is evaluated in one go so that
+    # culling, symmetry and parallel evaluation apply to all of it
+    first = np.min(missing, axis=0) if missing else None
+    last = np.max(missing, axis=0) if missing else None
+    box_axes = None
+    if missing and np.prod(last - first + 1) == len(missing):
+        box_axes = tuple(
+            axes[axis][breaks[axis][first[axis]] : breaks[axis][last[axis] + 1] + 1]
+            for axis in range(3)
+        )
+        if np.prod([len(axis) for axis in box_axes]) > max_samples:
+            box_axes = None
+
+    if box_axes is not None:
+        values = evaluate_on_grid(
+            implicit_function,
+            *box_axes,
+            zero_set=iso_value == 0,
+            cache=False,
+            dtype=dtype,
+        )
+        if not isinstance(values, np.ndarray):
+            return None
+        values = np.broadcast_to(values, tuple(len(axis) for axis in box_axes))
+        offsets = [breaks[axis][first[axis]] for axis in range(3)]
+        for tile in missing:
+            window = tuple(
+                slice(
+                    breaks[axis][i] - offsets[axis],
+                    breaks[axis][i + 1] - offsets[axis] + 1,
+                )
+                for axis, i in enumerate(tile)
+            )
+            store(
+                tile,
+                contour_tile(values[window], tile_axes(tile), iso_value, backend),
+            )
+        del values
+    else:
+        for tile in missing:
+            x, y, z = tile_axes(tile)
+            tile_bounds = (x[0], x[-1], y[0], y[-1], z[0], z[-1])
+            if iso_value == 0 and not may_vanish(implicit_function, tile_bounds):
+                store(tile, (np.empty((0, 3)), np.empty((0, 3), dtype=np.int64)))
+                continue
+            values = evaluate_on_grid(
+                implicit_function,
+                x,
+                y,
+                z,
+                zero_set=iso_value == 0,
+                cache=False,
+                dtype=dtype,
+            )
+            if not isinstance(values, np.ndarray):
+                return None
+            values = np.broadcast_to(values, (len(x), len(y), len(z)))
+            store(tile, contour_tile(values, (x, y, z), iso_value, backend))
+
+    # Stitch the pieces together
+    all_points, all_triangles, count = [], [], 0
+    for tile in tiles:
+        points, triangles = pieces[tile]
+        all_points.append(points)
+        all_triangles.append(triangles + count)
+        count += len(points)
+    if not any(len(triangles) for triangles in all_triangles):
+        return None
+    triangles = np.concatenate(all_triangles)
+
+    polydata = vtk.vtkPolyData()
+    polydata.SetPoints(points_to_vtk(np.concatenate(all_points)))
+    polydata.SetPolys(
+        create_cell_array(np.arange(0, 3 * len(triangles) + 1, 3), triangles.ravel())
+    )
+
+    # Weld the vertices shared by neighbouring tiles
+    clean = vtk.vtkStaticCleanPolyData()
+    clean.SetInputData(polydata)
+    clean.ToleranceIsAbsoluteOn()
+    clean.SetAbsoluteTolerance(1e-6 * min(spacing))
+    clean.Update()
+    return clean.GetOutput()
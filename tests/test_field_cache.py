@@ -0,0 +1,87 @@
+"""
+Least recently used and byte-cap eviction of src.utils.field_cache.FieldCache.
+"""
+
+import numpy as np
+import pytest
+from src.utils.field_cache import FieldCache, array_nbytes
+
+
+def field(n, value=0.0):
+    return np.full(n, value)  # n float64 samples, 8 * n bytes
+
+
+def test_get_returns_stored_value_and_counts_lookups():
+    cache = FieldCache(1024)
+    value = field(4)
+    assert cache.put("a", value) is value
+    assert cache.get("a") is value
+    assert cache.get("b") is None
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["hit_rate"]) == (1, 1, 0.5)
+    assert (stats["entries"], stats["nbytes"]) == (1, 32)
+
+
+def test_byte_cap_evicts_least_recently_used():
+    cache = FieldCache(3 * 80)
+    for key in "abc":
+        cache.put(key, field(10))
+    # Reading "a" makes "b" the least recently used entry
+    cache.get("a")
+    cache.put("d", field(10))
+    assert cache.get("b") is None
+    assert all(cache.get(key) is not None for key in "acd")
+    assert cache.nbytes == 240
+    assert cache.stats()["evictions"] == 1
+
+
+def test_large_value_evicts_several_entries():
+    cache = FieldCache(120)
+    for key in "abc":
+        cache.put(key, field(4))
+    cache.put("d", field(10))
+    assert list(cache.entries) == ["c", "d"]
+    assert cache.nbytes == 112
+    assert cache.stats()["evictions"] == 2
+
+
+def test_values_larger_than_the_cap_are_not_stored():
+    cache = FieldCache(64)
+    cache.put("a", field(4))
+    value = field(100)
+    assert cache.put("b", value) is value
+    assert cache.get("b") is None
+    assert cache.get("a") is not None
+    assert value.flags.writeable
+
+
+def test_replacing_a_key_updates_its_size():
+    cache = FieldCache(1024)
+    cache.put("a", field(10))
+    cache.put("a", field(4))
+    assert cache.nbytes == 32
+    assert len(cache.entries) == 1
+
+
+def test_cached_arrays_are_read_only():
+    cache = FieldCache(1024)
+    points, triangles = np.zeros((4, 3)), np.zeros((2, 3), dtype=np.int32)
+    cache.put("piece", (points, triangles))
+    with pytest.raises(ValueError):
+        points[0, 0] = 1.0
+    assert not triangles.flags.writeable
+    assert cache.nbytes == 4 * 3 * 8 + 2 * 3 * 4
+
+
+def test_broadcast_dimensions_are_not_counted():
+    axis = np.broadcast_to(np.arange(10.0)[:, None, None], (10, 20, 30))
+    assert array_nbytes(axis) == 80
+    assert array_nbytes((axis, np.zeros(5))) == 120
+
+
+def test_clear_empties_the_cache():
+    cache = FieldCache(1024)
+    cache.put("a", field(4))
+    cache.clear()
+    assert cache.get("a") is None
+    assert cache.nbytes == 0
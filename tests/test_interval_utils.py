@@ -0,0 +1,124 @@
+"""
+Soundness of the interval extensions in src.math.interval_utils.
+
+Culling trusts the bounds blindly: a range that misses a value of the
+function deletes that piece of the surface, traces or contours. Every
+supported operation is bounded on random boxes, including boxes across
+poles, period boundaries and domain edges, and the samples of the function
+in each box must lie inside the returned range.
+"""
+
+import zlib
+
+import numpy as np
+import pytest
+import sympy as sp
+from src.math.interval_utils import lambdify_interval
+
+x, y, z = sp.symbols("x y z")
+
+EXPRESSIONS = [
+    # Powers with negative, odd, even and fractional exponents
+    x**2,
+    x**3,
+    x**5,
+    x**-1,
+    x**-2,
+    x**-3,
+    x**0,
+    sp.sqrt(x),
+    x ** sp.Rational(3, 2),
+    x ** sp.Rational(-1, 2),
+    x ** sp.Rational(1, 3),
+    sp.Abs(x) ** y,
+    (x**2 + 1) ** (y / 3),
+    # Trigonometric functions across period boundaries
+    sp.sin(x),
+    sp.cos(x),
+    sp.tan(x),
+    sp.sin(3 * x + 1),
+    sp.cos(x * y),
+    sp.tan(x / 2 - 1),
+    # Domains with edges
+    sp.log(x),
+    sp.log(x**2 - 1),
+    sp.asin(x / 4),
+    sp.acos(x / 4),
+    # Piecewise constant and non-smooth functions
+    sp.Abs(x),
+    sp.Abs(x - y),
+    sp.floor(x),
+    sp.ceiling(x),
+    sp.sign(x),
+    sp.floor(x) * sp.sign(y),
+    # Monotonic and even functions
+    sp.exp(x),
+    sp.sinh(x),
+    sp.cosh(x),
+    sp.tanh(x),
+    sp.atan(x),
+    # Combinations as they appear in surfaces
+    x**2 + y**2 + z**2 - 16,
+    x * y - z,
+    sp.sin(x * y * z) - sp.Rational(1, 10),
+    sp.sin(x) * sp.cos(y) + sp.sin(y) * sp.cos(z) + sp.sin(z) * sp.cos(x),
+    x**2 / (y**2 + 1) - sp.exp(-z),
+    (sp.sqrt(x**2 + y**2) - 3) ** 2 + z**2 - 1,
+    sp.log(x**2 + y**2) - z,
+    1 / (x - y) + z,
+]
+
+
+def random_boxes(rng, count):
+    """Boxes of widely varying size, some with corners on 0, poles or periods."""
+    center = rng.uniform(-10, 10, (count, 3))
+    half = 10 ** rng.uniform(-6, 1.3, (count, 3))
+    lo, hi = center - half, center + half
+    special = np.array([0.0, 1.0, -1.0, np.pi / 2, np.pi, -np.pi / 2, 2 * np.pi])
+    snapped = rng.random((count, 3)) < 0.25
+    lo = np.where(snapped, rng.choice(special, (count, 3)), lo)
+    snapped = rng.random((count, 3)) < 0.25
+    hi = np.where(snapped & (hi > 0), rng.choice(special, (count, 3)), hi)
+    return np.minimum(lo, hi), np.maximum(lo, hi)
+
+
+@pytest.mark.parametrize("expr", EXPRESSIONS, ids=str)
+def test_interval_contains_samples(expr):
+    rng = np.random.default_rng(zlib.crc32(str(expr).encode()))
+    bound = lambdify_interval((x, y, z), expr)
+    function = sp.lambdify((x, y, z), expr, "numpy")
+
+    lo, hi = random_boxes(rng, 2000)
+    lower, upper = bound(*zip(lo.T, hi.T))
+
+    # Corners and random points of every box
+    corners = np.array(np.meshgrid([0, 1], [0, 1], [0, 1])).reshape(3, -1).T
+    fractions = np.concatenate([corners, rng.random((32, 3))])
+    points = lo[:, None, :] + fractions[None] * (hi - lo)[:, None, :]
+    points = np.clip(points, lo[:, None, :], hi[:, None, :])
+    with np.errstate(all="ignore"):
+        values = np.broadcast_to(
+            function(points[..., 0], points[..., 1], points[..., 2]),
+            points.shape[:2],
+        ).astype(float)
+
+    finite = np.isfinite(values)
+    outside = finite & ((values < lower[:, None]) | (values > upper[:, None]))
+    box, sample = np.nonzero(outside)
+    assert len(box) == 0, (
+        f"{expr} = {values[box[0], sample[0]]!r} at {points[box[0], sample[0]]} "
+        f"outside [{lower[box[0]]!r}, {upper[box[0]]!r}] on box "
+        f"{lo[box[0]]} - {hi[box[0]]}"
+    )
+
+
+def test_undefined_boxes_are_unbounded():
+    bound = lambdify_interval((x,), sp.log(x))
+    lower, upper = bound((np.array([-2.0]), np.array([-1.0])))
+    assert lower[0] == -np.inf and upper[0] == np.inf
+
+
+def test_unknown_functions_are_unbounded():
+    bound = lambdify_interval((x,), sp.gamma(x))
+    lower, upper = bound((np.array([1.0]), np.array([2.0])))
+    assert lower[0] == -np.inf and upper[0] == np.inf
@@ -0,0 +1,53 @@
+"""
+Parsing and formatting of level lists in src.math.level_utils.
+"""
+
+import pytest
+from src.math.level_utils import format_levels, parse_levels
+
+
+@pytest.mark.parametrize(
+    "text, levels",
+    [
+        ("", (0.0,)),
+        ("   ", (0.0,)),
+        ("1", (1.0,)),
+        ("2, -1, 0.5", (-1.0, 0.5, 2.0)),
+        ("1, 1, 2,", (1.0, 2.0)),
+        ("-1:1:5", (-1.0, -0.5, 0.0, 0.5, 1.0)),
+        ("1:-1:3", (-1.0, 0.0, 1.0)),
+        ("3:3:4", (3.0,)),
+        ("0:1:1", (0.0,)),
+        ("1e-3, 2E2", (1e-3, 200.0)),
+    ],
+)
+def test_parse_levels(text, levels):
+    assert parse_levels(text) == levels
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        "a",
+        "1, b",
+        ",",
+        "0:1",
+        "0:1:2:3",
+        "0:1:0",
+        "0:1:-2",
+        "0:1:2.5",
+        "x:1:3",
+        "inf",
+        "1, nan",
+        "-inf:0:3",
+    ],
+)
+@pytest.mark.filterwarnings("ignore::RuntimeWarning")
+def test_parse_levels_errors(text):
+    with pytest.raises(ValueError):
+        parse_levels(text)
+
+
+def test_format_levels_round_trips():
+    levels = (-1.0, 0.1, 0.125, 2.0, 1e-12)
+    assert parse_levels(format_levels(levels)) == tuple(sorted(levels))
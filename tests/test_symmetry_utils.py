@@ -0,0 +1,37 @@
+"""
+Reflection and exchange symmetries found by src.math.symmetry_utils.
+"""
+
+import pytest
+import sympy as sp
+from src.math.symmetry_utils import find_symmetries
+
+x, y, z, a = sp.symbols("x y z a")
+
+
+@pytest.mark.parametrize(
+    "expr, mirrors, swaps",
+    [
+        (x**2 + y**2 + z**2 - 16, (0, 1, 2), ((0, 1), (0, 2), (1, 2))),
+        (x * y - z, (), ((0, 1),)),
+        (x * y * z, (), ((0, 1), (0, 2), (1, 2))),
+        (sp.sin(x) + y, (), ()),
+        (sp.cos(x) * sp.cos(y) + z**2, (0, 1, 2), ((0, 1),)),
+        (sp.Abs(x) + sp.Abs(y) - z, (0, 1), ((0, 1),)),
+        ((x - y) ** 2 + z, (), ((0, 1),)),
+        # Only expanded polynomials reveal this one
+        ((x + y) * (x - y) + z**2, (0, 1, 2), ((0, 2),)),
+        # Coefficients are left alone
+        (x**2 + a * y, (0,), ()),
+        (a * x**2 + y**2 + z, (0, 1), ()),
+    ],
+    ids=str,
+)
+def test_find_symmetries(expr, mirrors, swaps):
+    assert find_symmetries(expr, (x, y, z)) == (mirrors, swaps)
+
+
+def test_missing_variables_are_not_symmetries():
+    # f(x, y) = x**2 does not depend on y or z, which the lattice handles by
+    # broadcasting rather than mirroring
+    assert find_symmetries(x**2, (x, y, z)) == ((0,), ())